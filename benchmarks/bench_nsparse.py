@@ -0,0 +1,81 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Microbenchmark of namespace parsing
+
+Parses a repeating mix of 12 URL segments with a copy of nsParse as it
+was when it used namespace_pattern, with the scanner of the current
+nsParse alone, and with nsParse itself, which memoizes the scanner's
+results.  Times are per segment.
+
+Run it with the package importable, e.g.::
+
+  python benchmarks/bench_nsparse.py [rounds]
+"""
+from __future__ import print_function
+
+import sys
+import timeit
+
+from zope.traversing.namespace import _nsParse, namespace_pattern, nsParse
+
+SEGMENTS = [
+    '++resource++zope3_tablelayout.css',
+    '++resource++images/logo.png',
+    '@@index.html',
+    '@@absolute_url',
+    '++skin++Boston',
+    '++etc++site',
+    '++vh++http:www.example.com:80',
+    '++',
+    '++attribute++title',
+    '+add',
+    '@@contents.html',
+    '++view++edit.html',
+]
+
+
+def baselineNsParse(name):
+    ns = ''
+    if name.startswith('@@'):
+        ns = 'view'
+        name = name[2:]
+    else:
+        match = namespace_pattern.match(name)
+        if match:
+            prefix, ns = match.group(0, 1)
+            name = name[len(prefix):]
+
+    return ns, name
+
+
+def parseAll(parse):
+    for segment in SEGMENTS:
+        parse(segment)
+
+
+def main(rounds=100000, repeat=5):
+    for parse in (baselineNsParse, _nsParse, nsParse):
+        assert [parse(s) for s in SEGMENTS] == \
+            [baselineNsParse(s) for s in SEGMENTS]
+    for label, parse in (('regex', baselineNsParse),
+                         ('scanner', _nsParse),
+                         ('nsParse', nsParse)):
+        best = min(timeit.repeat(lambda: parseAll(parse),
+                                 number=rounds, repeat=repeat))
+        print('%-10s %.0f ns per segment'
+              % (label, best / rounds / len(SEGMENTS) * 1e9))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,115 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Microbenchmark of single-name traversal
+
+Compares zope.traversing.api.traverseName with a copy of traverseName and
+traversePathElement as they were before traversal of single names was
+optimized: a new further path list per call, namespace checks for every
+name and a plain ITraversable adaptation.  Both look up an attribute
+through DefaultTraversable.
+
+Run it with the package importable, e.g.::
+
+  python benchmarks/bench_traversename.py [calls]
+"""
+from __future__ import print_function
+
+import sys
+import timeit
+
+import zope.component
+from zope.component.testing import setUp, tearDown
+from zope.location.interfaces import LocationError
+
+from zope.traversing.adapters import DefaultTraversable
+from zope.traversing.api import traverseName
+from zope.traversing.interfaces import ITraversable
+from zope.traversing.namespace import namespaceLookup, nsParse
+
+_marker = object()
+
+
+class Folder(object):
+    pass
+
+
+def baselineTraversePathElement(obj, name, further_path, default=_marker,
+                                traversable=None, request=None):
+    __traceback_info__ = (obj, name)
+
+    if name == '.':
+        return obj
+
+    if name == '..':
+        return obj.__parent__
+
+    if name and name[:1] in '@+':
+        ns, nm = nsParse(name)
+        if ns:
+            return namespaceLookup(ns, nm, obj, request)
+    else:
+        nm = name
+
+    if traversable is None:
+        traversable = ITraversable(obj, None)
+        if traversable is None:
+            raise LocationError('No traversable adapter found', obj)
+
+    try:
+        return traversable.traverse(nm, further_path)
+    except LocationError:
+        if default is not _marker:
+            return default
+        else:
+            raise
+
+    return obj
+
+
+def baselineTraverseName(obj, name, default=_marker, traversable=None,
+                         request=None):
+    further_path = []
+    if default is _marker:
+        obj = baselineTraversePathElement(obj, name, further_path,
+                                          traversable=traversable,
+                                          request=request)
+    else:
+        obj = baselineTraversePathElement(obj, name, further_path,
+                                          default=default,
+                                          traversable=traversable,
+                                          request=request)
+    if further_path:
+        raise NotImplementedError('further_path returned from traverse')
+    else:
+        return obj
+
+
+def main(calls=200000, repeat=5):
+    setUp()
+    try:
+        zope.component.provideAdapter(DefaultTraversable, (None,),
+                                      ITraversable)
+        folder = Folder()
+        folder.item = Folder()
+        for label, func in (('baseline', baselineTraverseName),
+                            ('traverseName', traverseName)):
+            best = min(timeit.repeat(lambda: func(folder, 'item'),
+                                     number=calls, repeat=repeat))
+            print('%-15s %.3f us per call' % (label, best / calls * 1e6))
+    finally:
+        tearDown()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
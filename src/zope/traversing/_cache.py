@@ -0,0 +1,185 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Small caching helpers used by the traversal machinery
+"""
+import threading
+import weakref
+
+# Fields of the links of LRUCache's list
+_PREV, _NEXT, _KEY, _VALUE = 0, 1, 2, 3
+
+
+class LRUCache(object):
+    """A bounded mapping that discards the least recently used entries.
+
+      >>> cache = LRUCache(2)
+      >>> cache['a'] = 1
+      >>> cache['b'] = 2
+      >>> cache.get('a')
+      1
+      >>> cache['c'] = 3
+      >>> cache.get('b') is None
+      True
+      >>> sorted(cache.keys())
+      ['a', 'c']
+
+    The entries are kept in a dictionary of links of a circular, doubly
+    linked list ordered by use.  All operations hold a lock, so the cache
+    can be shared by threads.
+
+    If 'discarded' is given, it is called with the key and value of every
+    entry dropped to make room, while the lock is held; it must not use
+    the cache.
+    """
+
+    def __init__(self, maxsize, discarded=None):
+        self.maxsize = maxsize
+        self._discarded = discarded
+        self._lock = threading.Lock()
+        self.clear()
+
+    def _unlink(self, link):
+        link[_PREV][_NEXT] = link[_NEXT]
+        link[_NEXT][_PREV] = link[_PREV]
+
+    def _append(self, link):
+        # Insert 'link' as the most recently used entry
+        root = self._root
+        last = root[_PREV]
+        link[_PREV] = last
+        link[_NEXT] = root
+        last[_NEXT] = root[_PREV] = link
+
+    def get(self, key, default=None):
+        with self._lock:
+            link = self._links.get(key)
+            if link is None:
+                return default
+            self._unlink(link)
+            self._append(link)
+            return link[_VALUE]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            links = self._links
+            link = links.get(key)
+            if link is not None:
+                self._unlink(link)
+                link[_VALUE] = value
+            else:
+                link = links[key] = [None, None, key, value]
+            self._append(link)
+            while len(links) > self.maxsize:
+                oldest = self._root[_NEXT]
+                self._unlink(oldest)
+                del links[oldest[_KEY]]
+                if self._discarded is not None:
+                    self._discarded(oldest[_KEY], oldest[_VALUE])
+
+    def pop(self, key, default=None):
+        with self._lock:
+            link = self._links.pop(key, None)
+            if link is None:
+                return default
+            self._unlink(link)
+            return link[_VALUE]
+
+    def __contains__(self, key):
+        return key in self._links
+
+    def __len__(self):
+        return len(self._links)
+
+    def keys(self):
+        return [key for key, value in self.items()]
+
+    def items(self):
+        """Return the (key, value) pairs, least recently used first"""
+        with self._lock:
+            result = []
+            root = self._root
+            link = root[_NEXT]
+            while link is not root:
+                result.append((link[_KEY], link[_VALUE]))
+                link = link[_NEXT]
+            return result
+
+    def clear(self):
+        with self._lock:
+            self._links = {}
+            root = self._root = []
+            root[:] = [root, root, None, None]
+
+
+def registryCache(registry, name):
+    """Return a dictionary cache bound to the state of an adapter registry.
+
+    'registry' is an adapter registry, such as the 'adapters' attribute of
+    a site manager.  The cache is stored on the registry under the
+    attribute 'name' (which should start with '_v_' so it is never
+    persisted) and is discarded whenever the registry's generation counter
+    changes.  The counter is bumped on every registration and
+    unregistration, including changes to the registry's bases.
+
+    Interface specifications can change without the registry noticing,
+    e.g. through classImplements().  Entries derived from a specification
+    must therefore be added together with a call to watchSpecs(), which
+    clears the cache when any of the specifications changes.
+    """
+    generation = registry._generation
+    cached = getattr(registry, name, None)
+    if cached is None or cached[0] != generation:
+        cache = {}
+        cached = (generation, cache, _SpecWatcher(cache))
+        setattr(registry, name, cached)
+    return cached[1]
+
+
+def watchSpecs(registry, name, specs):
+    """Clear the cache 'name' of 'registry' when one of 'specs' changes
+
+    See registryCache().
+    """
+    watcher = getattr(registry, name)[2]
+    for spec in specs:
+        spec.subscribe(watcher)
+
+
+class _SpecWatcher(object):
+    """Dependent of interface specifications clearing a cache on changes
+
+    Specifications only hold weak references to their dependents, so the
+    watcher lives as long as the cache it belongs to.
+    """
+
+    __slots__ = ('cache', '__weakref__')
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def changed(self, originally_changed):
+        self.cache.clear()
+
+
+def objectRef(obj, callback=None):
+    """Return a callable returning 'obj'.
+
+    This is a weak reference if 'obj' supports them, and 'callback' is
+    called with it when 'obj' goes away.  Otherwise, the object is kept
+    alive, so that its id is never reused while the reference exists.
+    """
+    try:
+        return weakref.ref(obj, callback)
+    except TypeError:
+        return lambda: obj
@@ -14,30 +14,81 @@
 """Adapters for the traversing mechanism
 """
 
-import six
+from functools import partial
+
 import zope.interface
+from zope.component import getSiteManager
+from zope.interface import directlyProvidedBy, implementedBy, providedBy
 
 from zope.location.interfaces import ILocationInfo, LocationError
+from zope.security.proxy import removeSecurityProxy
+from zope.traversing import pathindex
+from zope.traversing import tracing
+from zope.traversing._cache import registryCache, watchSpecs
+from zope.traversing.interfaces import IBatchTraversable
+from zope.traversing.interfaces import IQueryTraversable
+from zope.traversing.interfaces import ISideEffectFreeTraversable
 from zope.traversing.interfaces import ITraversable, ITraverser
+from zope.traversing.interfaces import ITraverseItemsFirst
+from zope.traversing.interfaces import ITraverseItemsOnly
+from zope.traversing.namespace import _queryHandler
 from zope.traversing.namespace import namespaceLookup
 from zope.traversing.namespace import nsParse
+from zope.traversing.namespace import queryByTraversing
+from zope.traversing.plan import compilePath
+from zope.traversing.plan import NAME, NAMESPACE, PARENT, SELF
 
 from zope.location.traversing import RootPhysicallyLocatable  # BBB
 
 
 _marker = object()  # opaque marker that doesn't get security proxied
+_missing = object()  # internal result of a step that could not be found
 
 
-@zope.interface.implementer(ITraversable)
+@zope.interface.implementer(IQueryTraversable, ISideEffectFreeTraversable)
 class DefaultTraversable(object):
-    """Traverses objects via attribute and item lookup"""
+    """Traverses objects via attribute and item lookup
+
+    Attributes are looked up before items, unless the object provides
+    ITraverseItemsFirst or ITraverseItemsOnly.
+    """
 
-    def __init__(self, subject):
+    def __init__(self, subject, _mode=None):
         self._subject = subject
+        # The _lookupMode() of the subject's specification, which the
+        # adapter factory cache of _queryTraversable() supplies
+        self._mode = _mode
 
     def traverse(self, name, furtherPath):
+        result = self._lookup(name, furtherPath)
+        if result is _marker:
+            raise LocationError(self._subject, name)
+        return result
+
+    def queryTraverse(self, name, furtherPath, default=None):
+        if type(self).traverse != DefaultTraversable.traverse:
+            return queryByTraversing(self, name, furtherPath, default)
+        result = self._lookup(name, furtherPath)
+        if result is _marker:
+            return default
+        return result
+
+    def _lookup(self, name, furtherPath):
         subject = self._subject
         __traceback_info__ = (subject, name, furtherPath)
+        mode = self._mode
+        if mode is None:
+            mode = _lookupMode(providedBy(subject))
+        if mode is not _ATTRIBUTES_FIRST:
+            if hasattr(subject, '__getitem__'):
+                try:
+                    return subject[name]
+                except KeyError:
+                    pass
+            if mode is _ITEMS_ONLY:
+                return _marker
+            return getattr(subject, name, _marker)
+
         attr = getattr(subject, name, _marker)
         if attr is not _marker:
             return attr
@@ -46,7 +97,22 @@ class DefaultTraversable(object):
                 return subject[name]
             except (KeyError, TypeError):
                 pass
-        raise LocationError(subject, name)
+        return _marker
+
+
+_ATTRIBUTES_FIRST = 'attributes first'
+_ITEMS_FIRST = 'items first'
+_ITEMS_ONLY = 'items only'
+
+
+def _lookupMode(spec):
+    """Return how DefaultTraversable looks up names for the specification
+    'spec' of an object"""
+    if spec.isOrExtends(ITraverseItemsOnly):
+        return _ITEMS_ONLY
+    if spec.isOrExtends(ITraverseItemsFirst):
+        return _ITEMS_FIRST
+    return _ATTRIBUTES_FIRST
 
 
 @zope.interface.implementer(ITraverser)
@@ -58,36 +124,409 @@ class Traverser(object):
     def __init__(self, wrapper):
         self.context = wrapper
 
-    def traverse(self, path, default=_marker, request=None):
+    def traverse(self, path, default=_marker, request=None, simplify=False):
+        """Traverse 'path'; see ITraverser
+
+        If 'simplify' is true, '.' segments are dropped and 'name/..'
+        pairs are skipped without looking up 'name' wherever the
+        traversable involved provides ISideEffectFreeTraversable.
+
+        Absolute paths of plain names are looked up in the installed
+        path index first, if any (see zope.traversing.pathindex).
+        """
         if not path:
             return self.context
 
-        if isinstance(path, six.string_types):
-            path = path.split('/')
-            if len(path) > 1 and not path[-1]:
-                # Remove trailing slash
-                path.pop()
+        plan = compilePath(path)
+        curr = self.context
+        index = None
+        if plan.absolute:
+            # Start at the root
+            curr = root = ILocationInfo(self.context).getRoot()
+            if (plan.names and pathindex.index is not None
+                    and removeSecurityProxy(root) is root):
+                index = pathindex.index
+                found = index.lookup(root, plan.names)
+                if found is not None:
+                    return found
+        if default is _marker:
+            curr = _walk(curr, list(plan.furtherPath), plan.steps, request,
+                         simplify=simplify)
         else:
-            path = list(path)
-
-        path.reverse()
-        pop = path.pop
+            try:
+                curr = _walk(curr, list(plan.furtherPath), plan.steps,
+                             request, _missing, simplify)
+            except LocationError:
+                return default
+            if curr is _missing:
+                return default
+        if index is not None:
+            index.remember(root, plan.names, curr)
+        return curr
+
+    def iterTraverse(self, path, request=None):
+        """Traverse 'path', yielding a (segment, object) pair for each step.
+
+        Absolute paths first yield the root for the segment ''.  Steps are
+        taken only as the iterator is consumed, so callers may stop early.
+        LocationError is raised when a step cannot be found.
+        """
+        if not path:
+            return
 
+        plan = compilePath(path)
         curr = self.context
-        if not path[-1]:
-            # Start at the root
-            pop()
-            curr = ILocationInfo(self.context).getRoot()
-        try:
-            while path:
-                name = pop()
-                curr = traversePathElement(curr, name, path, request=request)
-
-            return curr
-        except LocationError:
-            if default == _marker:
-                raise
-            return default
+        if plan.absolute:
+            curr = ILocationInfo(curr).getRoot()
+            yield '', curr
+        for step in _iterWalk(curr, list(plan.furtherPath), plan.steps,
+                              request):
+            yield step
+
+    def traverseMany(self, paths, default=_marker, request=None,
+                     defaults=None, captureErrors=False):
+        """Traverse several paths, sharing the work for common prefixes.
+
+        Returns a list holding one result per path, in input order.  The
+        paths are merged into a trie of their segments ('.' segments and
+        trailing slashes are dropped), and every distinct prefix is
+        traversed only once.
+
+        A path that cannot be found yields 'default', or the matching
+        item of the 'defaults' sequence if one is given.  With neither,
+        'captureErrors' puts the LocationError itself into the result
+        list; otherwise the error of the first failing path is raised.
+
+        Sibling names below an IBatchTraversable are looked up with a
+        single traverseBatch() call; a LocationError it raises is
+        reported for every path below those names.  Unless the
+        traversable provides ISideEffectFreeTraversable, a name may depend
+        on the remaining path, so the paths continuing below it are
+        traversed one by one from there, each with its own remaining path.
+        The same happens when a traversable changes the remaining path.
+        """
+        context = self.context
+        results = []
+        plans = []
+        positions = []
+        tries = {}
+        for index, path in enumerate(paths):
+            results.append(context)
+            plan = compilePath(path) if path else None
+            plans.append(plan)
+            # The positions in plan.steps of the steps in the trie
+            route = []
+            positions.append(route)
+            if plan is None:
+                continue
+            node = tries.get(plan.absolute)
+            if node is None:
+                # A node is [step, children, ends, first index, depth]
+                node = tries[plan.absolute] = [None, {}, [], index, -1]
+            for position, step in enumerate(plan.steps):
+                if step[0] is SELF:
+                    continue
+                children = node[1]
+                node = children.get(step[1])
+                if node is None:
+                    node = children[step[1]] = [step, {}, [], index,
+                                                len(route)]
+                route.append(position)
+            node[2].append(index)
+
+        def furtherPath(index, depth):
+            # The names following the step at 'depth' of path 'index'
+            plan = plans[index]
+            return list(plan.furtherPath[
+                :len(plan.steps) - positions[index][depth] - 1])
+
+        def walkEach(obj, node):
+            # Traverse the paths below 'node' separately, starting at the
+            # step of the node, which is to be taken from 'obj'
+            for index in _pathIndexes(node):
+                steps = plans[index].steps[positions[index][node[4]]:]
+                try:
+                    result = _walk(
+                        obj, furtherPath(index, node[4]) + [steps[0][1]],
+                        steps, request, miss)
+                except LocationError as error:
+                    failures[index] = error
+                else:
+                    if result is _missing:
+                        # Only reported through a default
+                        failures[index] = None
+                    else:
+                        results[index] = result
+
+        # Without defaults, misses must be reported with their errors
+        if defaults is None and default is _marker:
+            miss = _marker
+        else:
+            miss = _missing
+        failures = {}
+        stack = []
+        for absolute, node in tries.items():
+            start = context
+            if absolute:
+                start = ILocationInfo(context).getRoot()
+            for index in node[2]:
+                results[index] = start
+            stack.append((start, node))
+
+        while stack:
+            obj, node = stack.pop()
+            try:
+                batch = _traverseBatch(obj, node[1].values())
+            except LocationError as e:
+                # None of the names below 'obj' could be looked up
+                batch = e
+            shared = _marker
+            for child in node[1].values():
+                step, children, ends, first, depth = child
+                if step[0] is NAME and isinstance(batch, LocationError):
+                    for index in _pathIndexes(child):
+                        failures[index] = batch
+                    continue
+                if step[0] is NAME and batch is None:
+                    if shared is _marker:
+                        shared = _providesMarker(_queryTraversable(obj),
+                                                 ISideEffectFreeTraversable)
+                    if not shared and (len(ends) > 1 or children):
+                        walkEach(obj, child)
+                        continue
+
+                further_path = furtherPath(first, depth)
+                rest = list(further_path)
+                error = None
+                try:
+                    if batch is not None and step[0] is NAME:
+                        next = batch.get(step[3], _missing)
+                    else:
+                        next = _traverseStep(obj, step, further_path,
+                                             request, _missing)
+                except LocationError as e:
+                    error = e
+                else:
+                    if next is _missing:
+                        error = LocationError(obj, step[3])
+                if error is not None:
+                    for index in _pathIndexes(child):
+                        failures[index] = error
+                    continue
+
+                if further_path != rest:
+                    # The traversable consumed or rewrote the remaining
+                    # path, so its result cannot be shared.
+                    walkEach(obj, child)
+                    continue
+
+                for index in ends:
+                    results[index] = next
+                if children:
+                    stack.append((next, child))
+
+        for index in sorted(failures):
+            if defaults is not None:
+                results[index] = defaults[index]
+            elif default is not _marker:
+                results[index] = default
+            elif captureErrors:
+                results[index] = failures[index]
+            else:
+                raise failures[index]
+
+        return results
+
+
+def _traverseBatch(obj, nodes):
+    """Look up the plain names of several trie nodes at once.
+
+    Returns the mapping from IBatchTraversable.traverseBatch(), or None
+    if 'obj' does not support batches or there is nothing to batch.
+    """
+    names = [node[0][3] for node in nodes if node[0][0] is NAME]
+    if len(names) < 2:
+        return None
+    traversable = _queryTraversable(obj)
+    if not IBatchTraversable.providedBy(traversable):
+        return None
+    return traversable.traverseBatch(names)
+
+
+def _providesMarker(traversable, marker):
+    """Tell whether 'traversable' provides the marker interface 'marker'
+    for its own traverse() method.
+
+    The marker must be provided directly or be declared by the class that
+    defines traverse(): a subclass overriding traverse() does not inherit
+    it, as the override may not live up to it.  Such a subclass can
+    declare the marker again with classImplementsOnly().
+    """
+    if not marker.providedBy(traversable):
+        return False
+    if directlyProvidedBy(traversable).isOrExtends(marker):
+        return True
+    cls = type(traversable)
+    for base in getattr(cls, '__mro__', (cls,)):
+        if 'traverse' in base.__dict__:
+            for iface in implementedBy(base).declared:
+                if iface.isOrExtends(marker):
+                    return True
+            return False
+    return False
+
+
+def _pathIndexes(node):
+    """Return the indexes of all paths ending at or below a trie node."""
+    indexes = []
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        indexes.extend(node[2])
+        nodes.extend(node[1].values())
+    return indexes
+
+
+def _traverseStep(obj, step, further_path, request=None, default=_marker):
+    """Traverse a single compiled step (see zope.traversing.plan).
+
+    If 'default' is given, it is returned rather than raising
+    LocationError wherever the traversables involved support
+    IQueryTraversable.
+    """
+    kind, segment, ns, nm = step
+    if kind is NAME:
+        return _traverseName(obj, nm, further_path, default, None, request)
+    if kind is NAMESPACE:
+        if default is _marker:
+            return namespaceLookup(ns, nm, obj, request)
+        return namespaceLookup(ns, nm, obj, request, default)
+    if kind is PARENT:
+        return obj.__parent__
+    return obj
+
+
+def _walk(curr, path, steps, request=None, default=_marker, simplify=False):
+    """Traverse from 'curr' along 'path' and return the object reached.
+
+    See _iterWalk() for the arguments.
+    """
+    for name, curr in _iterWalk(curr, path, steps, request, default,
+                                simplify):
+        pass
+    return curr
+
+
+def _iterWalk(curr, path, steps, request=None, default=_marker,
+              simplify=False):
+    """Traverse from 'curr' along 'path', yielding (name, object) pairs.
+
+    'path' is the reversed list of names still to be traversed and is
+    handed to traversables as 'further_path'.  'steps' holds the compiled
+    steps for these names in traversal order; a name is parsed again only
+    if a traversable has changed the remaining path.
+
+    If 'default' is given, it is yielded last as soon as a step reports a
+    miss without raising (see _traverseStep).
+
+    If 'simplify' is true, '.' steps are skipped, and so are 'name/..'
+    pairs that can be left out (see _skipsBack); nothing is yielded for
+    them.
+    """
+    nsteps = len(steps)
+    pop = path.pop
+    i = 0
+    while path:
+        name = pop()
+        __traceback_info__ = (curr, name)
+        if (i < nsteps and len(path) == nsteps - i - 1
+                and steps[i][1] is name):
+            step = steps[i]
+            i += 1
+            if simplify:
+                if step[0] is SELF:
+                    continue
+                skip = _skipsBack(curr, step, steps, i, request)
+                if skip:
+                    del path[-skip:]
+                    i += skip
+                    continue
+            curr = _traverseStep(curr, step, path, request, default)
+        else:
+            i = nsteps
+            curr = traversePathElement(curr, name, path, default,
+                                       request=request)
+        yield name, curr
+        if curr is default:
+            return
+
+
+def _skipsBack(obj, step, steps, i, request):
+    """Tell how many steps after 'step' lead back to 'obj'.
+
+    'step' is to be taken from 'obj' and 'steps[i:]' are the steps after
+    it.  If these are any number of '.' steps followed by '..', and the
+    traversable that would look up 'step' provides
+    ISideEffectFreeTraversable for its own traverse() method (see
+    _providesMarker), returns the number of steps up to and including the
+    '..'.  Otherwise, returns 0.
+    """
+    kind = step[0]
+    if kind is not NAME and kind is not NAMESPACE:
+        return 0
+    nsteps = len(steps)
+    j = i
+    while j < nsteps and steps[j][0] is SELF:
+        j += 1
+    if j == nsteps or steps[j][0] is not PARENT:
+        return 0
+
+    if kind is NAME:
+        traversable = _queryTraversable(obj)
+    else:
+        traversable = _queryHandler(step[2], obj, request)
+    if _providesMarker(traversable, ISideEffectFreeTraversable):
+        return j + 1 - i
+    return 0
+
+
+def _queryTraversable(obj, interface=ITraversable,
+                      cacheName='_v_zope_traversing_traversables'):
+    """Adapt 'obj' to ITraversable, or return None.
+
+    This is equivalent to ITraversable(obj, None), but the adapter factory
+    is looked up once per interface specification and cached on the
+    current site manager's adapter registry, until the registry or the
+    specification changes.  Deep paths through objects of the same few
+    classes thus do one registry lookup per class rather than one per
+    step.
+
+    Other traversal interfaces, such as IAsyncTraversable, may be looked
+    up the same way by passing 'interface' and a registry attribute name
+    of their own as 'cacheName'.
+    """
+    spec = providedBy(obj)
+    if (spec.isOrExtends(interface)
+            or getattr(obj, '__conform__', None) is not None):
+        return interface(obj, None)
+
+    registry = getSiteManager().adapters
+    cache = registryCache(registry, cacheName)
+    factory = cache.get(spec, _marker)
+    if factory is _marker:
+        factory = registry.lookup1(spec, interface)
+        if factory is DefaultTraversable:
+            # Decide once how names are looked up for the specification
+            factory = partial(DefaultTraversable, _mode=_lookupMode(spec))
+        cache[spec] = factory
+        watchSpecs(registry, cacheName, (spec,))
+    if factory is not None:
+        traversable = factory(obj)
+        if traversable is not None:
+            return traversable
+
+    # Let any other adapter hooks have their say
+    return interface(obj, None)
 
 
 def traversePathElement(obj, name, further_path, default=_marker,
@@ -126,11 +565,88 @@ def traversePathElement(obj, name, further_path, default=_marker,
     else:
         nm = name
 
+    return _traverseName(obj, nm, further_path, default, traversable, request)
+
+
+class _NoFurtherPath(list):
+    """The empty 'further_path' passed when traversing a single name
+
+    Traversables may read it like any list, and changes leaving it empty,
+    such as 'del further_path[:]', do nothing.  Adding names raises the
+    NotImplementedError that traverseName() used to raise after the fact.
+    A single instance can thus be shared by all calls.
+    """
+
+    __slots__ = ()
+
+    def _immutable(self, *args, **kw):
+        raise NotImplementedError('further_path returned from traverse')
+
+    append = insert = _immutable
+
+    def extend(self, names):
+        if list(names):
+            self._immutable()
+
+    def __iadd__(self, names):
+        self.extend(names)
+        return self
+
+    def __setitem__(self, index, names):
+        if isinstance(index, slice):
+            names = list(names)
+            if names:
+                self._immutable()
+        list.__setitem__(self, index, names)
+
+    def __setslice__(self, i, j, names):  # Python 2
+        self[max(0, i):max(0, j)] = names
+
+_noFurtherPath = _NoFurtherPath()
+
+
+def traverseSingleName(obj, name, default=_marker, traversable=None,
+                       request=None):
+    """Traverse the single path segment 'name' relative to 'obj'.
+
+    This is traversePathElement() for callers that have no further path:
+    no list is allocated and plain names, the common case, are dispatched
+    to the traversable without checking for namespaces.  Raises
+    NotImplementedError if a traversable tries to add names to the further
+    path.
+    """
+    if name[:1] not in '.@+':
+        return _traverseName(obj, name, _noFurtherPath, default, traversable,
+                             request)
+    return traversePathElement(obj, name, _noFurtherPath, default,
+                               traversable, request)
+
+
+def _traverseName(obj, nm, further_path, default=_marker, traversable=None,
+                  request=None):
+    """Traverse the plain (non-namespace) name 'nm' of 'obj'."""
+    tracer = tracing.tracer
+    if tracer is not None:
+        started = tracing.clocks()
+
     if traversable is None:
-        traversable = ITraversable(obj, None)
+        traversable = _queryTraversable(obj)
         if traversable is None:
             raise LocationError('No traversable adapter found', obj)
 
+    if tracer is None:
+        return _callTraversable(traversable, nm, further_path, default)
+    try:
+        return _callTraversable(traversable, nm, further_path, default)
+    finally:
+        wall, cpu = tracing.elapsed(started)
+        tracer.trace(request, obj, nm, '', traversable.__class__, wall, cpu)
+
+
+def _callTraversable(traversable, nm, further_path, default):
+    if default is not _marker and IQueryTraversable.providedBy(traversable):
+        return traversable.queryTraverse(nm, further_path, default)
+
     try:
         return traversable.traverse(nm, further_path)
     except LocationError:
@@ -138,5 +654,3 @@ def traversePathElement(obj, name, further_path, default=_marker,
             return default
         else:
             raise
-
-    return obj
@@ -14,9 +14,27 @@
 """Convenience functions for traversing the object tree.
 """
 import six
-from zope.interface import moduleProvides
-from zope.location.interfaces import ILocationInfo, IRoot
+from transaction import TransactionManager as _TransactionManager
+from zope.component.hooks import getSite as _getSite
+from zope.component.hooks import setSite as _setSite
+from zope.interface import implementer, moduleProvides
+from zope.location.interfaces import ILocationInfo, IRoot, LocationError
+from zope.location.traversing import LocationPhysicallyLocatable
+from zope.proxy import isProxy as _isProxy
+from zope.security.interfaces import IParticipation
+from zope.security.management import endInteraction as _endInteraction
+from zope.security.management import newInteraction as _newInteraction
+from zope.security.management import queryInteraction as _queryInteraction
+from zope.security.proxy import getChecker as _getChecker
+from zope.security.proxy import Proxy as _Proxy
+from zope.security.proxy import removeSecurityProxy
+from zope.traversing._cache import LRUCache as _LRUCache
+from zope.traversing import pathcache as _pathcache
+from zope.traversing.scope import current as _currentScope
 from zope.traversing.interfaces import ITraversalAPI, ITraverser
+from zope.traversing.path import Path as _Path
+from zope.traversing.path import PathArray as _PathArray
+from zope.traversing.plan import compilePath as _compilePath
 
 
 moduleProvides(ITraversalAPI)
@@ -42,8 +60,14 @@ def joinPath(path, *args):
     respectively. A '.' should be removed and a '..' should cause the
     segment to the left to be removed.  joinPath('/', '..') should
     raise an exception.
+
+    If 'path' is a zope.traversing.path.Path, the result is a Path, too.
     """
 
+    if isinstance(path, _Path):
+        return path.join(*args)
+    args = [six.text_type(arg) if isinstance(arg, _Path) else arg
+            for arg in args]
     if not args:
         # Concatenating u'' is much quicker than unicode(path)
         return u'' + path
@@ -57,26 +81,142 @@ def joinPath(path, *args):
     return _normalizePath(path + u'/'.join(args))
 
 
+def joinPaths(base, paths, captureErrors=True, compact=False):
+    """Join each of 'paths' to 'base', as joinPath(base, path) would.
+
+    Returns a list of the joined paths, in the order of 'paths'.  'base'
+    is validated and normalized only once, and paths without '.', '..'
+    or empty segments are simply appended to it.
+
+    If 'captureErrors' is true, the exception raised for a path that
+    cannot be joined takes its place in the result, else it is raised.
+    If 'compact' is true, the result is a zope.traversing.path.PathArray
+    rather than a list.  Raises ValueError if 'base' is badly formed.
+    """
+    if isinstance(base, _Path):
+        join = base.join
+    else:
+        # Normalize the base once, with a placeholder for the joined path
+        prefix = joinPath(base, u'x')[:-1]
+
+        def join(path):
+            if isinstance(path, _Path):
+                path = six.text_type(path)
+            if path and _isNormal(path):
+                return prefix + path
+            return joinPath(base, path)
+
+    results = []
+    for path in paths:
+        try:
+            results.append(join(path))
+        except (ValueError, IndexError) as error:
+            if not captureErrors:
+                raise
+            results.append(error)
+    if compact:
+        return _PathArray(results)
+    return results
+
+
+def _isNormal(path):
+    """Tell whether a relative path is free of '.', '..' and empty segments
+    and of leading and trailing slashes."""
+    path = u'/' + path + u'/'
+    return not (u'//' in path or u'/./' in path or u'/../' in path)
+
+
 def getPath(obj):
     """Returns a string representing the physical path to the object.
+
+    The path is memoized while a zope.traversing.scope.LocationScope is
+    active, or if zope.traversing.pathcache is enabled.
     """
+    scope = _currentScope()
+    if scope is not None:
+        return scope.getPath(obj)
+    if _pathcache.cache is not None:
+        return _pathcache.getPath(obj)
     return ILocationInfo(obj).getPath()
 
 
+def getPaths(objects):
+    """Returns an iterator over the paths of the given objects.
+
+    Yields the same paths as getPath() would, in the order of 'objects',
+    which may be any iterable.  The paths of the containers passed on the
+    way are remembered for the duration of the iteration, so each
+    container is walked only once, however many of the objects it holds.
+    """
+    memo = _LRUCache(_GETPATHS_MEMO_SIZE)
+    for obj in objects:
+        info = ILocationInfo(obj)
+        if type(info) is LocationPhysicallyLocatable:
+            yield _memoizedPath(obj, memo)
+        else:
+            yield info.getPath()
+
+
+_GETPATHS_MEMO_SIZE = 10000
+
+
+def _memoizedPath(obj, memo):
+    """Compute the path of 'obj' like LocationPhysicallyLocatable does
+
+    'memo' maps the ids of containers to (container, path) pairs; the
+    containers between 'obj' and the nearest one found there (or the
+    root) are added to it.
+    """
+    chain = []
+    context = obj
+    while True:
+        if context is None:
+            raise TypeError("Not enough context to determine location root")
+        entry = memo.get(id(context))
+        if entry is not None and entry[0] is context:
+            path = entry[1]
+            break
+        if IRoot.providedBy(context):
+            path = u'/'
+            break
+        chain.append(context)
+        if len(chain) > 9998:
+            raise TypeError("Maximum location depth exceeded, "
+                            "probably due to a a location cycle.")
+        context = context.__parent__
+
+    for context in reversed(chain):
+        if path == u'/':
+            path = u'/' + context.__name__
+        else:
+            path = path + u'/' + context.__name__
+        if context is not obj:
+            memo[id(context)] = (context, path)
+    return path
+
+
 def getRoot(obj):
     """Returns the root of the traversal for the given object.
     """
+    scope = _currentScope()
+    if scope is not None:
+        return scope.getRoot(obj)
     return ILocationInfo(obj).getRoot()
 
 
-def traverse(object, path, default=_marker, request=None):
+def traverse(object, path, default=_marker, request=None, simplify=False):
     """Traverse 'path' relative to the given object.
 
-    'path' is a string with path segments separated by '/'.
+    'path' is a string with path segments separated by '/', or a
+    PathPlan returned by compilePath().
 
     'request' is passed in when traversing from presentation code. This
     allows paths like @@foo to work.
 
+    If 'simplify' is true, 'name/..' pairs are skipped where the
+    traversable declares ISideEffectFreeTraversable, and '.' segments
+    are dropped.
+
     Raises LocationError if path cannot be found
 
     Note: calling traverse with a path argument taken from an untrusted
@@ -86,10 +226,239 @@ def traverse(object, path, default=_marker, request=None):
           Consider using traverseName instead.
     """
     traverser = ITraverser(object)
-    if default is _marker:
-        return traverser.traverse(path, request=request)
+    kw = {'request': request}
+    if default is not _marker:
+        kw['default'] = default
+    if simplify:
+        kw['simplify'] = True
+    return traverser.traverse(path, **kw)
+
+
+def traverseAsync(object, path, default=_marker, request=None, loader=None):
+    """Traverse 'path' relative to the given object, asynchronously.
+
+    Returns an awaitable resolving to the traversed object.  Objects
+    adaptable to IAsyncTraversable are traversed without blocking the
+    event loop; all others are traversed synchronously as by traverse().
+
+    Lookups on IBatchTraversable containers are coalesced through
+    'loader', a zope.traversing.batch.BatchLoader, or the request's loader
+    if there is a request.
+
+    Requires Python 3.5 or later.
+    """
+    from zope.traversing.asynchronous import AsyncTraverser
+    return AsyncTraverser(object).traverse(path, default, request, loader)
+
+
+def iterTraverse(object, path, request=None):
+    """Traverse 'path' lazily, yielding each object along the way.
+
+    Yields a (segment, object) pair for every step of 'path'; an absolute
+    path first yields the root with the segment ''.  The traversal
+    advances only as the iterator is consumed, so callers may stop early.
+
+    Raises LocationError when a step cannot be found.
+    """
+    traverser = ITraverser(object)
+    iterTraverse = getattr(traverser, 'iterTraverse', None)
+    if iterTraverse is not None:
+        return iterTraverse(path, request=request)
+    return _iterByTraversing(traverser, path, request)
+
+
+def _iterByTraversing(traverser, path, request):
+    """Yield the steps of 'path' by traversing each of its prefixes
+
+    This serves ITraversers without an iterTraverse() method.
+    """
+    if not path:
+        return
+    plan = _compilePath(path)
+    prefix = ('',) if plan.absolute else ()
+    if prefix:
+        yield '', traverser.traverse(prefix, request=request)
+    for step in plan.steps:
+        prefix += (step[1],)
+        yield step[1], traverser.traverse(prefix, request=request)
+
+
+def traverseMany(object, paths, default=_marker, request=None,
+                 defaults=None, captureErrors=False, executor=None):
+    """Traverse each of 'paths' relative to the given object.
+
+    Returns a list of the traversed objects, in the order of 'paths'.
+    Common prefixes of the paths are traversed only once.
+
+    A path that cannot be found yields 'default', or the matching item of
+    the 'defaults' sequence if given.  Otherwise, if 'captureErrors' is
+    true, the LocationError is put into the result list in place of the
+    object, else it is raised.
+
+    If 'executor' (a concurrent.futures.Executor, typically a thread
+    pool) is given, the paths are traversed in parallel, one task per
+    path, without sharing common prefixes.  Each task runs with the
+    component site and location scope of the calling thread, and in a new
+    security interaction for the caller's participations.  Results and
+    errors are reported as without an executor.
+
+    Database connections must not be used by several threads, so if
+    'object' has a '_p_jar', each task opens a connection of its own to
+    the database instead of using the caller's location scope, and
+    traverses from its copy of 'object'.  Persistent objects found are
+    returned as loaded by the caller's connection; paths that lead to
+    other objects or to none are traversed again by the caller.  The
+    tasks see the last committed state of the database, without the
+    changes of the caller's transaction.
+    """
+    traverser = ITraverser(object)
+    if executor is not None:
+        paths = list(paths)
+        jar = getattr(removeSecurityProxy(object), '_p_jar', None)
+        if jar is None:
+            task = _inCallersContext(_traverseCapturing)
+            futures = [executor.submit(task, traverser, path, request)
+                       for path in paths]
+            outcomes = [future.result() for future in futures]
+        else:
+            task = _inCallersContext(_traverseInConnection, withScope=False)
+            futures = [executor.submit(task, object, path, request)
+                       for path in paths]
+            outcomes = []
+            for path, future in zip(paths, futures):
+                found = future.result()
+                if found is None:
+                    outcomes.append(
+                        _traverseCapturing(traverser, path, request))
+                else:
+                    oid, checker = found
+                    found = jar.get(oid)
+                    if checker is not None:
+                        found = _Proxy(found, checker)
+                    outcomes.append((found, None))
     else:
-        return traverser.traverse(path, default=default, request=request)
+        traverseMany = getattr(traverser, 'traverseMany', None)
+        if traverseMany is not None:
+            return traverseMany(paths, default=default, request=request,
+                                defaults=defaults,
+                                captureErrors=captureErrors)
+        outcomes = [_traverseCapturing(traverser, path, request)
+                    for path in paths]
+
+    results = []
+    for index, (obj, error) in enumerate(outcomes):
+        if error is None:
+            results.append(obj)
+        elif defaults is not None:
+            results.append(defaults[index])
+        elif default is not _marker:
+            results.append(default)
+        elif captureErrors:
+            results.append(error)
+        else:
+            raise error
+    return results
+
+
+def _traverseCapturing(traverser, path, request):
+    """Return the (object, None) or (None, LocationError) traversal outcome
+    """
+    try:
+        return traverser.traverse(path, request=request), None
+    except LocationError as error:
+        return None, error
+
+
+def _traverseInConnection(object, path, request):
+    """Traverse 'path' from 'object' in a new connection to its database
+
+    Returns the object id and the security checker (or None) of the
+    persistent object found.  Returns None if nothing was found or the
+    object is not a persistent object of the new connection, as it could
+    not be used by the caller.
+    """
+    start = removeSecurityProxy(object)
+    manager = _TransactionManager()
+    connection = start._p_jar.db().open(transaction_manager=manager)
+    try:
+        start = connection.get(start._p_oid)
+        if object is not removeSecurityProxy(object):
+            start = _Proxy(start, _getChecker(object))
+        found, error = _traverseCapturing(ITraverser(start), path, request)
+        if error is not None:
+            return None
+        checker = None
+        if removeSecurityProxy(found) is not found:
+            checker = _getChecker(found)
+            found = removeSecurityProxy(found)
+        if (_isProxy(found)
+                or getattr(found, '_p_jar', None) is not connection):
+            return None
+        return found._p_oid, checker
+    finally:
+        manager.abort()
+        connection.close()
+
+
+@implementer(IParticipation)
+class _Participation(object):
+    """Stand-in for a participation of the caller in a worker's interaction
+
+    A participation takes part in one interaction only, which sets its
+    'interaction' attribute.  Other attributes are those of the original.
+    """
+
+    interaction = None
+
+    def __init__(self, participation):
+        self._participation = participation
+        self.principal = participation.principal
+
+    def __getattr__(self, name):
+        return getattr(self._participation, name)
+
+
+def _inCallersContext(func, withScope=True):
+    """Wrap 'func' to run with the calling thread's site, principals and,
+    if 'withScope' is true, location scope
+
+    All of these are thread-local, so tasks run by a worker thread would
+    otherwise look up components, check permissions and memoize locations
+    in the wrong context.  An interaction is not meant to be shared by
+    threads, so each task gets a new one from the security policy, for
+    participations standing in for the caller's.
+    """
+    site = _getSite()
+    interaction = _queryInteraction()
+    if interaction is not None:
+        participations = list(getattr(interaction, 'participations', ()))
+    scope = _currentScope() if withScope else None
+
+    def inContext(*args):
+        if interaction is not None:
+            _newInteraction(*[_Participation(participation)
+                              for participation in participations])
+        oldSite = _getSite()
+        _setSite(site)
+        try:
+            if scope is None:
+                return func(*args)
+            with scope:
+                return func(*args)
+        finally:
+            _setSite(oldSite)
+            if interaction is not None:
+                _endInteraction()
+    return inContext
+
+
+def compilePath(path):
+    """Parse 'path' once into a reusable PathPlan.
+
+    The plan can be passed to traverse() in place of the path, which
+    saves splitting and classifying the path on every traversal.
+    """
+    return _compilePath(path)
 
 
 def traverseName(obj, name, default=_marker, traversable=None, request=None):
@@ -109,22 +478,22 @@ def traverseName(obj, name, default=_marker, traversable=None, request=None):
     not provided.
 
     """
-    further_path = []
+    # Like traverseSingleName(), without the additional call
     if default is _marker:
-        obj = traversePathElement(obj, name, further_path,
-                                  traversable=traversable, request=request)
-    else:
-        obj = traversePathElement(obj, name, further_path, default=default,
-                                  traversable=traversable, request=request)
-    if further_path:
-        raise NotImplementedError('further_path returned from traverse')
-    else:
-        return obj
+        default = _traversalMarker
+    if name[:1] not in '.@+':
+        return _traverseName(obj, name, _noFurtherPath, default, traversable,
+                             request)
+    return traversePathElement(obj, name, _noFurtherPath, default,
+                               traversable, request)
 
 
 def getName(obj):
     """Get the name an object was traversed via
     """
+    scope = _currentScope()
+    if scope is not None:
+        return scope.getName(obj)
     return ILocationInfo(obj).getName()
 
 
@@ -135,8 +504,12 @@ def getParent(obj):
     Raises TypeError if the object doesn't have enough context to get the
     parent.
     """
+    scope = _currentScope()
     try:
-        location_info = ILocationInfo(obj)
+        if scope is not None:
+            location_info = scope.locationInfo(obj)
+        else:
+            location_info = ILocationInfo(obj)
     except TypeError:
         pass
     else:
@@ -163,10 +536,145 @@ def getParents(obj):
 
     Raises a TypeError if the context doesn't go all the way down to
     a containment root.
+
+    The parents are memoized if zope.traversing.pathcache is enabled.
     """
+    if _pathcache.cache is not None:
+        return _pathcache.getParents(obj)
     return ILocationInfo(obj).getParents()
 
 
+def iterParents(obj):
+    """Returns an iterator over the parents of the given object.
+
+    Yields the same objects as getParents(), starting with the object's
+    parent, but walks up the parents only as far as the iterator is
+    consumed.  The TypeError raised if the parents do not end in a
+    containment root is raised when the iterator gets there.
+    """
+    if _pathcache.cache is not None and _pathcache.queryDepth(obj):
+        return iter(_pathcache.getParents(obj))
+    info = ILocationInfo(obj)
+    if type(info) is LocationPhysicallyLocatable:
+        return _iterParents(obj)
+    return iter(info.getParents())
+
+
+def _iterParents(obj):
+    # Lazy version of LocationPhysicallyLocatable.getParents()
+    parent = None
+    while True:
+        obj = getattr(obj, '__parent__', None)
+        if obj is None:
+            break
+        parent = obj
+        yield obj
+    if parent is None or not IRoot.providedBy(parent):
+        raise TypeError("Not enough context information to get all parents")
+
+
+def isAncestor(ancestor, obj):
+    """Tells whether 'ancestor' is one of the parents of 'obj'.
+
+    Only follows the __parent__ attributes of 'obj' up to 'ancestor'.
+    If the depths of both objects are memoized (see
+    zope.traversing.pathcache), 'obj' is checked only at the depth of
+    'ancestor'.
+    """
+    ancestor = removeSecurityProxy(ancestor)
+    depth = _pathcache.queryDepth(ancestor)
+    if depth is not None:
+        steps = _pathcache.queryDepth(obj)
+        if steps is not None:
+            steps -= depth
+            if steps <= 0:
+                return False
+            for i in range(steps):
+                obj = getattr(obj, '__parent__', None)
+            return removeSecurityProxy(obj) is ancestor
+
+    while True:
+        obj = getattr(obj, '__parent__', None)
+        if obj is None:
+            return False
+        if removeSecurityProxy(obj) is ancestor:
+            return True
+
+
+def commonAncestor(obj, other):
+    """Returns the nearest object that is or contains both given objects.
+
+    Returns None if there is no such object.  The __parent__ attributes
+    of both objects are followed in turn, so only as many parents are
+    visited as lie between the objects and their common ancestor.
+    """
+    chains = commonAncestorChains(obj, other)
+    if chains is None:
+        return None
+    return chains[0][-1]
+
+
+def commonAncestorChains(obj, other):
+    """Returns the objects leading from two objects to their nearest
+    common ancestor.
+
+    Returns a pair of lists: the objects from 'obj' up to and including
+    the common ancestor, and the objects from 'other' up to but excluding
+    it.  Returns None if there is no common ancestor.  The __parent__
+    attributes of both objects are followed in turn.
+    """
+    chain, otherChain = [], []
+    seen, otherSeen = {}, {}
+    while obj is not None or other is not None:
+        if obj is not None:
+            key = id(removeSecurityProxy(obj))
+            if key in otherSeen:
+                chain.append(obj)
+                return chain, otherChain[:otherSeen[key]]
+            if key in seen:
+                # A location cycle
+                obj = None
+            else:
+                seen[key] = len(chain)
+                chain.append(obj)
+                obj = getattr(obj, '__parent__', None)
+        if other is not None:
+            key = id(removeSecurityProxy(other))
+            if key in seen:
+                return chain[:seen[key] + 1], otherChain
+            if key in otherSeen:
+                other = None
+            else:
+                otherSeen[key] = len(otherChain)
+                otherChain.append(other)
+                other = getattr(other, '__parent__', None)
+    return None
+
+
+def relativePath(obj, other):
+    """Returns the path leading from 'obj' to 'other'.
+
+    The path consists of '..' segments up to the nearest common ancestor
+    of the objects, followed by the names down to 'other', or is '.' if
+    the objects are the same.  Traversing it from 'obj' leads to 'other'.
+    Only the parents up to the common ancestor are visited.
+
+    Raises TypeError if the objects have no common ancestor.
+    """
+    chains = commonAncestorChains(obj, other)
+    if chains is None:
+        raise TypeError("Objects are not located in the same tree",
+                        obj, other)
+    up, down = chains
+    segments = [u'..'] * (len(up) - 1)
+    for ob in reversed(down):
+        name = getattr(ob, '__name__', None)
+        if not name:
+            raise TypeError("Not enough context to determine location", ob)
+        segments.append(name)
+    return u'/'.join(segments) or u'.'
+
+
 def _normalizePath(path):
     """Normalize a path by resolving '.' and '..' path elements."""
 
@@ -194,13 +702,46 @@ def _normalizePath(path):
     return prefix + u'/'.join(new_segments)
 
 
+def canonicalPaths(paths_or_objects, captureErrors=True, compact=False):
+    """Returns the canonical paths for the given paths or objects.
+
+    Returns a list with the result canonicalPath() gives for each item,
+    in order.  Paths that are canonical already are only validated.
+
+    If 'captureErrors' is true, the exception raised for an item takes its
+    place in the result, else it is raised.  If 'compact' is true, the
+    result is a zope.traversing.path.PathArray rather than a list.
+    """
+    results = []
+    for item in paths_or_objects:
+        if (isinstance(item, six.string_types) and item[:1] == u'/'
+                and (item == u'/' or _isNormal(item[1:]))):
+            results.append(u'' + item)
+            continue
+        try:
+            results.append(canonicalPath(item))
+        except (ValueError, IndexError, TypeError) as error:
+            if not captureErrors:
+                raise
+            results.append(error)
+    if compact:
+        return _PathArray(results)
+    return results
+
+
 def canonicalPath(path_or_object):
     """Returns a canonical absolute unicode path for the given path or object.
 
-    Resolves segments that are '.' or '..'.
+    Resolves segments that are '.' or '..'.  A zope.traversing.path.Path
+    is returned as a normalized Path.
 
     Raises ValueError if a badly formed path is given.
     """
+    if isinstance(path_or_object, _Path):
+        if not path_or_object.absolute:
+            raise ValueError('canonical path must start with a "/": %s'
+                             % path_or_object)
+        return path_or_object.normalize()
     if isinstance(path_or_object, six.string_types):
         path = path_or_object
         if not path:
@@ -224,3 +765,5 @@ def canonicalPath(path_or_object):
 
 # import this down here to avoid circular imports
 from zope.traversing.adapters import traversePathElement
+from zope.traversing.adapters import _noFurtherPath, _traverseName
+from zope.traversing.adapters import _marker as _traversalMarker
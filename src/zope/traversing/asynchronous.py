@@ -0,0 +1,114 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Asynchronous traversal
+
+This module requires Python 3.5 or later.  It lets object graphs whose
+children are loaded asynchronously be traversed from an asyncio event
+loop, without blocking it for each step.
+"""
+import zope.interface
+
+from zope.location.interfaces import ILocationInfo, LocationError
+from zope.traversing.adapters import _marker, _traverseName
+from zope.traversing.adapters import _queryTraversable
+from zope.traversing.batch import getBatchLoader
+from zope.traversing.interfaces import IAsyncTraversable, IAsyncTraverser
+from zope.traversing.interfaces import IBatchTraversable
+from zope.traversing.namespace import namespaceLookup
+from zope.traversing.plan import compilePath, parseSegment
+from zope.traversing.plan import NAME, NAMESPACE, PARENT
+
+# Registry attribute caching IAsyncTraversable factories per specification
+_ASYNC_TRAVERSABLES = '_v_zope_traversing_async_traversables'
+
+
+@zope.interface.implementer(IAsyncTraverser)
+class AsyncTraverser(object):
+    """Traverse paths through asynchronously loaded objects
+
+    Objects adaptable to IAsyncTraversable are traversed by awaiting
+    their traverse() method; all other objects are traversed through
+    ITraversable just like zope.traversing.adapters.Traverser does.  The
+    '.', '..' and namespace semantics are those of traversePathElement().
+    """
+
+    def __init__(self, context):
+        self.context = context
+
+    async def traverse(self, path, default=_marker, request=None,
+                       loader=None):
+        """Traverse 'path'; see IAsyncTraverser
+
+        Lookups on IBatchTraversable containers are batched through
+        'loader', a zope.traversing.batch.BatchLoader.  If none is given
+        and there is a request, the request's loader is used.
+        """
+        if loader is None and request is not None:
+            loader = getBatchLoader(request)
+        if not path:
+            return self.context
+
+        plan = compilePath(path)
+        steps = plan.steps
+        nsteps = len(steps)
+        path = list(plan.furtherPath)
+        pop = path.pop
+
+        curr = self.context
+        if plan.absolute:
+            # Start at the root
+            curr = ILocationInfo(self.context).getRoot()
+        try:
+            i = 0
+            while path:
+                name = pop()
+                if (i < nsteps and len(path) == nsteps - i - 1
+                        and steps[i][1] is name):
+                    step = steps[i]
+                    i += 1
+                else:
+                    # A traversable has changed the remaining path
+                    step = parseSegment(name)
+                    i = nsteps
+                curr = await _traverseStep(curr, step, path, request, loader)
+            return curr
+        except LocationError:
+            if default is _marker:
+                raise
+            return default
+
+
+async def _traverseStep(obj, step, further_path, request=None,
+                        loader=None):
+    """Traverse a single compiled step (see zope.traversing.plan)"""
+    kind, segment, ns, nm = step
+    if kind is NAME:
+        traversable = _queryTraversable(obj, IAsyncTraversable,
+                                        _ASYNC_TRAVERSABLES)
+        asynchronous = traversable is not None
+        if not asynchronous:
+            traversable = _queryTraversable(obj)
+            if traversable is None:
+                raise LocationError('No traversable adapter found', obj)
+        if loader is not None and IBatchTraversable.providedBy(traversable):
+            return await loader.load(obj, traversable, nm)
+        if asynchronous:
+            return await traversable.traverse(nm, further_path)
+        return _traverseName(obj, nm, further_path, traversable=traversable,
+                             request=request)
+    if kind is NAMESPACE:
+        return namespaceLookup(ns, nm, obj, request)
+    if kind is PARENT:
+        return obj.__parent__
+    return obj
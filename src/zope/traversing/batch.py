@@ -0,0 +1,111 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Batched child lookups for asynchronous traversal
+
+A BatchLoader collects the lookups that concurrent traversals make on
+IBatchTraversable containers during one iteration of the asyncio event
+loop, and resolves them with a single traverseBatch() call per container.
+"""
+from zope.location.interfaces import LocationError
+
+_key = 'zope.traversing.batch.BatchLoader'
+
+
+class BatchLoader(object):
+    """Coalesce child lookups into one traverseBatch() call per container"""
+
+    def __init__(self):
+        self._pending = {}
+
+    def load(self, obj, traversable, name):
+        """Return a future resolving to the child 'name' of 'obj'
+
+        'traversable' is the IBatchTraversable for 'obj'.  The lookup is
+        made on the next iteration of the event loop, together with all
+        other lookups on 'obj' requested until then.  The future fails
+        with LocationError if the child cannot be found.
+        """
+        import asyncio
+        loop = asyncio.get_event_loop()
+        if not self._pending:
+            loop.call_soon(self.dispatch)
+        entry = self._pending.get(id(obj))
+        if entry is None:
+            entry = self._pending[id(obj)] = (obj, traversable, {})
+        futures = entry[2]
+        future = futures.get(name)
+        if future is None:
+            future = futures[name] = loop.create_future()
+        return future
+
+    def dispatch(self):
+        """Issue the batched lookups collected so far"""
+        import asyncio
+        import inspect
+        pending, self._pending = self._pending, {}
+        for obj, traversable, futures in pending.values():
+            try:
+                found = traversable.traverseBatch(list(futures))
+            except Exception as error:
+                _fail(futures, error)
+                continue
+            if inspect.isawaitable(found):
+                asyncio.ensure_future(found).add_done_callback(
+                    _resolver(obj, futures))
+            else:
+                _resolve(obj, futures, found)
+
+
+def _resolve(obj, futures, found):
+    for name, future in futures.items():
+        if future.done():
+            continue
+        try:
+            future.set_result(found[name])
+        except KeyError:
+            future.set_exception(LocationError(obj, name))
+
+
+def _fail(futures, error):
+    for future in futures.values():
+        if not future.done():
+            future.set_exception(error)
+
+
+def _resolver(obj, futures):
+    def resolve(batch):
+        if batch.cancelled():
+            for future in futures.values():
+                future.cancel()
+        elif batch.exception() is not None:
+            _fail(futures, batch.exception())
+        else:
+            _resolve(obj, futures, batch.result())
+    return resolve
+
+
+def getBatchLoader(request):
+    """Return the BatchLoader for 'request', creating it if necessary
+
+    The loader is kept in the request's annotations, so all traversals
+    done for one request share it.  Returns None for requests without
+    annotations.
+    """
+    annotations = getattr(request, 'annotations', None)
+    if annotations is None:
+        return None
+    loader = annotations.get(_key)
+    if loader is None:
+        loader = annotations[_key] = BatchLoader()
+    return loader
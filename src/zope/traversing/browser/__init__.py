@@ -14,5 +14,6 @@
 """Absolute URL View components
 """
 from zope.traversing.browser.absoluteurl import absoluteURL
+from zope.traversing.browser.absoluteurl import relativeURL
 from zope.traversing.browser.absoluteurl import AbsoluteURL
 from zope.traversing.browser.absoluteurl import SiteAbsoluteURL
@@ -24,6 +24,7 @@ from zope.interface import implementer
 from zope.location.interfaces import ILocation
 from zope.proxy import sameProxiedObjects
 from zope.publisher.browser import BrowserView
+from zope.traversing.api import commonAncestorChains
 from zope.traversing.browser.interfaces import IAbsoluteURL
 from zope.i18nmessageid import MessageFactory
 _ = MessageFactory('zope')
@@ -39,6 +40,52 @@ def absoluteURL(ob, request):
     return zope.component.getMultiAdapter((ob, request), IAbsoluteURL)()
 
 
+def relativeURL(ob, target, request):
+    """Return the URL of 'target' relative to the URL of 'ob'
+
+    The URL is computed from the names of the objects between 'ob' and
+    'target' and their nearest common ancestor, without walking up to the
+    root.  It therefore assumes that the URLs of the objects involved
+    follow their containment, as those computed by AbsoluteURL do.  The
+    absolute URL of 'target' is returned where a relative one cannot be
+    given, e.g. if the objects are not located below the same virtual
+    host root.
+    """
+    chains = commonAncestorChains(ob, target)
+    if chains is None:
+        return absoluteURL(target, request)
+    up, down = chains
+    vh_root = request.getVirtualHostRoot()
+    if vh_root is not None:
+        for obj in up[:-1] + down:
+            if sameProxiedObjects(obj, vh_root):
+                return absoluteURL(target, request)
+
+    # A relative URL is resolved against the URL of the container of 'ob'
+    names = [getattr(obj, '__name__', None) for obj in reversed(down)]
+    ups = len(up) - 2
+    if ups < 0:
+        # 'target' is 'ob' or below it
+        names.insert(0, getattr(ob, '__name__', None))
+        ups = 0
+        top = ob
+    elif not names:
+        # 'target' is a parent of 'ob'
+        names.append(getattr(target, '__name__', None))
+        ups += 1
+        top = target
+    else:
+        top = None
+    if top is not None and sameProxiedObjects(top, vh_root):
+        return absoluteURL(target, request)
+    if not all(names):
+        return absoluteURL(target, request)
+
+    segments = ['..'] * ups
+    segments.extend(quote(name.encode('utf-8'), _safe) for name in names)
+    return '/'.join(segments)
+
+
 @implementer(IAbsoluteURL)
 class AbsoluteURL(BrowserView):
 
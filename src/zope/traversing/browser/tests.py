@@ -14,6 +14,10 @@
 """Test the AbsoluteURL view
 """
 from unittest import TestCase, main, makeSuite
+try:
+    from urlparse import urljoin
+except ImportError:
+    from urllib.parse import urljoin
 
 import zope.component
 from zope.component import getMultiAdapter, adapter
@@ -301,6 +305,45 @@ class TestAbsoluteURL(PlacelessSetup, TestCase):
         self.assertEqual(str(view), 'http://127.0.0.1')
         self.assertEqual(absoluteURL(None, request), 'http://127.0.0.1')
 
+    def testRelativeURL(self):
+        from zope.traversing.browser import relativeURL
+        request = TestRequest()
+        root = Root()
+        a = contained(TrivialContent(), root, name='a')
+        b = contained(TrivialContent(), a, name='b')
+        c = contained(TrivialContent(), b, name='c')
+        d = contained(TrivialContent(), a, name='d')
+        e = contained(TrivialContent(), d, name=u'\xe9')
+        for ob, target, url in ((b, d, 'd'),
+                                (b, b, 'b'),
+                                (b, c, 'b/c'),
+                                (c, a, '../../a'),
+                                (c, e, '../d/%C3%A9'),
+                                (a, d, 'a/d'),
+                                (b, root, 'http://127.0.0.1'),
+                                (b, TrivialContent(), None)):
+            if url is None:
+                self.assertRaises(TypeError, relativeURL, ob, target,
+                                  request)
+                continue
+            self.assertEqual(relativeURL(ob, target, request), url)
+            self.assertEqual(urljoin(absoluteURL(ob, request), url),
+                             absoluteURL(target, request))
+
+    def testRelativeURLVirtualHosting(self):
+        from zope.traversing.browser import relativeURL
+        request = TestRequest()
+        a = contained(TrivialContent(), Root(), name='a')
+        b = contained(TrivialContent(), a, name='b')
+        c = contained(TrivialContent(), b, name='c')
+        other = contained(TrivialContent(), a.__parent__, name='other')
+        request._vh_root = a
+        self.assertEqual(relativeURL(c, b, request), '../b')
+        self.assertEqual(relativeURL(b, c, request), 'b/c')
+        self.assertEqual(relativeURL(b, a, request), 'http://127.0.0.1')
+        self.assertEqual(relativeURL(c, other, request),
+                         absoluteURL(other, request))
+
 
 def test_suite():
     return makeSuite(TestAbsoluteURL)
@@ -44,6 +44,62 @@ class ITraversable(Interface):
         """
 
 
+class IQueryTraversable(ITraversable):
+    """A traversable that can report a miss without raising an exception
+
+    Traversal code uses queryTraverse() instead of traverse() when it
+    would otherwise just catch the LocationError, e.g. when a default is
+    given.
+    """
+
+    def queryTraverse(name, furtherPath, default=None):
+        """Get the next item on the path, or 'default'
+
+        Like traverse(), but return 'default' where traverse() would
+        raise LocationError.
+        """
+
+
+class ISideEffectFreeTraversable(ITraversable):
+    """A traversable whose lookups have no side effects
+
+    Looking up a name neither changes any state nor depends on the rest of
+    the path, and the object found has the traversed object as its
+    __parent__.  Traversal asked to simplify paths may therefore skip a
+    'name/..' pair without looking up 'name' at all (which also means that
+    'name' is not checked to exist).
+    """
+
+
+class IBatchTraversable(ITraversable):
+    """A traversable that can look up several names in one go
+
+    This pays off for containers whose items live in external storage,
+    where every separate lookup costs a round trip.
+    """
+
+    def traverseBatch(names):
+        """Look up all of 'names' at once
+
+        Returns a mapping from each name that was found to its object;
+        names that cannot be found are left out.  When used from the
+        asynchronous traverser, the method may also return an awaitable
+        resolving to such a mapping.
+        """
+
+
+class IAsyncTraversable(Interface):
+    """An object whose children are loaded asynchronously"""
+
+    def traverse(name, furtherPath):
+        """Return an awaitable resolving to the next item on the path
+
+        Has the same contract as ITraversable.traverse(), but the lookup
+        happens when the returned awaitable (usually a coroutine) is
+        awaited.
+        """
+
+
 class ITraverser(Interface):
     """Provide traverse features"""
 
@@ -63,6 +119,20 @@ class ITraverser(Interface):
 
         If the object is not found, return 'default' argument.
 
+        Implementations may accept a 'simplify' keyword argument; if it is
+        true, 'name/..' pairs whose lookup is known to be free of side
+        effects (see ISideEffectFreeTraversable) are skipped.
+        """
+
+
+class IAsyncTraverser(Interface):
+    """Provide asynchronous traverse features"""
+
+    def traverse(path, default=_RAISE_KEYERROR, request=None):
+        """Return an awaitable resolving to the object at 'path'.
+
+        Same as ITraverser.traverse(), but objects adaptable to
+        IAsyncTraversable are traversed without blocking the event loop.
         """
 
 
@@ -89,22 +159,44 @@ class ITraversalAPI(Interface):
         raise an exception.
         """
 
+    def joinPaths(base, paths, captureErrors=True, compact=False):
+        """Join each of 'paths' to 'base', as joinPath(base, path) would.
+
+        Returns a list of the joined paths.  If 'captureErrors' is true,
+        a path that cannot be joined is represented by its exception
+        rather than raising it.  If 'compact' is true, a compact
+        zope.traversing.path.PathArray is returned instead of a list.
+        """
+
     def getPath(obj):
         """Returns a string representing the physical path to the object.
         """
 
+    def getPaths(objects):
+        """Returns an iterator over the paths of the given objects.
+
+        Yields the same paths as getPath() would, in the order of
+        'objects'.  The path of each container passed on the way is
+        computed only once.
+        """
+
     def getRoot(obj):
         """Returns the root of the traversal for the given object.
         """
 
-    def traverse(object, path, default=None, request=None):
+    def traverse(object, path, default=None, request=None, simplify=False):
         """Traverse 'path' relative to the given object.
 
-        'path' is a string with path segments separated by '/'.
+        'path' is a string with path segments separated by '/', or a
+        PathPlan returned by compilePath().
 
         'request' is passed in when traversing from presentation code. This
         allows paths like @@foo to work.
 
+        If 'simplify' is true, 'name/..' pairs are skipped where the
+        traversable declares ISideEffectFreeTraversable, and '.' segments
+        are dropped.
+
         Raises LocationError if path cannot be found
 
         Note: calling traverse with a path argument taken from an untrusted
@@ -114,6 +206,61 @@ class ITraversalAPI(Interface):
               Consider using traverseName instead.
         """
 
+    def traverseAsync(object, path, default=None, request=None,
+                      loader=None):
+        """Traverse 'path' relative to the given object, asynchronously.
+
+        Returns an awaitable resolving to the traversed object.  Objects
+        adaptable to IAsyncTraversable are traversed without blocking the
+        event loop; all others are traversed synchronously as by
+        traverse().
+
+        Lookups on IBatchTraversable containers are coalesced through
+        'loader', a zope.traversing.batch.BatchLoader, or the request's
+        loader if there is a request.
+
+        Requires Python 3.5 or later.
+        """
+
+    def iterTraverse(object, path, request=None):
+        """Traverse 'path' lazily, yielding each object along the way.
+
+        Yields a (segment, object) pair for every step of 'path'; an
+        absolute path first yields the root with the segment ''.  The
+        traversal advances only as the iterator is consumed, so callers
+        may stop early.
+
+        Raises LocationError when a step cannot be found.
+        """
+
+    def traverseMany(object, paths, default=None, request=None,
+                     defaults=None, captureErrors=False, executor=None):
+        """Traverse each of 'paths' relative to the given object.
+
+        Returns a list of the traversed objects, in the order of 'paths'.
+        Common prefixes of the paths are traversed only once.
+
+        A path that cannot be found yields 'default', or the matching item
+        of the 'defaults' sequence if given.  Otherwise, if
+        'captureErrors' is true, the LocationError is put into the result
+        list in place of the object, else it is raised.
+
+        If 'executor', a concurrent.futures.Executor, is given, the paths
+        are traversed in parallel, one task per path, with the component
+        site of the calling thread and a new security interaction for its
+        participations.  If 'object' belongs to a database connection,
+        each task traverses in a connection of its own, and the
+        persistent objects found are returned from the caller's
+        connection.
+        """
+
+    def compilePath(path):
+        """Parse 'path' once into a reusable PathPlan.
+
+        The plan can be passed to traverse() in place of the path, which
+        saves splitting and classifying the path on every traversal.
+        """
+
     def traverseName(obj, name, default=None, traversable=None,
                      request=None):
         """Traverse a single step 'name' relative to the given object.
@@ -154,6 +301,42 @@ class ITraversalAPI(Interface):
         a containment root.
         """
 
+    def iterParents(obj):
+        """Returns an iterator over the parents of the given object.
+
+        Yields the same objects as getParents(), but walks up the parents
+        only as far as the iterator is consumed.
+        """
+
+    def isAncestor(ancestor, obj):
+        """Tells whether 'ancestor' is one of the parents of 'obj'.
+        """
+
+    def commonAncestor(obj, other):
+        """Returns the nearest object that is or contains both objects.
+
+        Returns None if there is no such object.
+        """
+
+    def commonAncestorChains(obj, other):
+        """Returns the objects leading from two objects to their nearest
+        common ancestor.
+
+        Returns a pair of lists: the objects from 'obj' up to and
+        including the common ancestor, and the objects from 'other' up to
+        but excluding it.  Returns None if there is no common ancestor.
+        """
+
+    def relativePath(obj, other):
+        """Returns the path leading from 'obj' to 'other'.
+
+        The path consists of '..' segments up to the nearest common
+        ancestor of the objects, followed by the names down to 'other'.
+        It is '.' if the objects are the same.
+
+        Raises TypeError if the objects have no common ancestor.
+        """
+
     def canonicalPath(path_or_object):
         """Returns a canonical absolute unicode path for the path or object.
 
@@ -162,6 +345,83 @@ class ITraversalAPI(Interface):
         Raises ValueError if a badly formed path is given.
         """
 
+    def canonicalPaths(paths_or_objects, captureErrors=True, compact=False):
+        """Returns the canonical paths for the given paths or objects.
+
+        Returns a list with the result of canonicalPath() for each item.
+        If 'captureErrors' is true, an item that fails is represented by
+        its exception rather than raising it.  If 'compact' is true, a
+        compact zope.traversing.path.PathArray is returned instead of a
+        list.
+        """
+
+
+class ITraverseItemsFirst(Interface):
+    """Marker for objects whose items should be traversed before attributes
+
+    The default traversable looks up an attribute first and falls back to
+    item access.  For objects providing this interface, typically
+    containers, it tries item access first and falls back to attributes.
+    """
+
+
+class ITraverseItemsOnly(ITraverseItemsFirst):
+    """Marker for objects that should be traversed by item access only
+
+    The default traversable never looks up attributes of objects
+    providing this interface.
+    """
+
+
+class ITraversalTracer(Interface):
+    """Receives timing information about traversal steps
+
+    See zope.traversing.tracing.setTracer().
+    """
+
+    def trace(request, context, segment, namespace, adapter, wall, cpu):
+        """Record a traversal step
+
+        'context' is the object that was traversed from, 'segment' the name
+        looked up and 'namespace' its namespace, or '' for a plain name.
+        'adapter' is the class of the component that did the lookup (an
+        ITraversable, namespace handler or IPublishTraverse adapter) and
+        'request' the request, or None.  'wall' and 'cpu' are the elapsed
+        wall clock and CPU time in seconds.
+        """
+
+
+class IPathIndex(Interface):
+    """Maps absolute paths to the objects located there
+
+    Paths are given as tuples of names, without the leading '' of the
+    root.  See zope.traversing.pathindex.setPathIndex().
+    """
+
+    def lookup(root, names):
+        """Return the object at 'names' below 'root', or None
+
+        An object is only returned if its __parent__ and __name__
+        attributes lead back to 'root' along 'names'.
+        """
+
+    def remember(root, names, obj):
+        """Remember that 'obj' was found at 'names' below 'root'
+
+        Nothing is remembered unless 'obj' is located there.
+        """
+
+    def move(obj, oldRoot, oldNames, newRoot, newNames):
+        """Record that 'obj' was moved from 'oldNames' below 'oldRoot' to
+        'newNames' below 'newRoot'
+
+        Objects known below 'obj' move along.  Either path and its root
+        may be None for objects that are added or removed.
+        """
+
+    def clear():
+        """Forget all objects"""
+
 
 class IPathAdapter(Interface):
     """Marker interface for adapters to be used in paths
@@ -16,6 +16,7 @@
 __docformat__ = 'restructuredtext'
 
 import re
+import string
 
 import six
 import zope.component
@@ -27,8 +28,12 @@ from zope.location.interfaces import LocationError
 from zope.publisher.interfaces.browser import IBrowserSkinType
 from zope.publisher.skinnable import applySkin
 from zope.security.proxy import removeSecurityProxy
+from zope.traversing import tracing
+from zope.traversing._cache import registryCache, watchSpecs
 from zope.traversing.interfaces import IEtcNamespace
 from zope.traversing.interfaces import IPathAdapter
+from zope.traversing.interfaces import IQueryTraversable
+from zope.traversing.interfaces import ISideEffectFreeTraversable
 from zope.traversing.interfaces import ITraversable
 
 
@@ -40,12 +45,31 @@ class ExcessiveDepth(LocationError):
     "Too many levels of containment. We don't believe them."
 
 
-def namespaceLookup(ns, name, object, request=None):
+_marker = object()
+
+
+def queryByTraversing(traversable, name, furtherPath, default=None):
+    """Implement queryTraverse() in terms of traverse()
+
+    Query-enabled traversables use this when a subclass has overridden
+    traverse(), whose behaviour then takes precedence.
+    """
+    try:
+        return traversable.traverse(name, furtherPath)
+    except LocationError:
+        return default
+
+
+def namespaceLookup(ns, name, object, request=None, default=_marker):
     """Lookup a value from a namespace
 
     We look up a value using a view or an adapter, depending on
     whether a request is passed.
 
+    If 'default' is given, it is returned instead of raising LocationError
+    when there is no handler for the namespace, or when the handler
+    provides IQueryTraversable and does not find the name.
+
     Let's start with adapter-based transersal:
 
       >>> class I(zope.interface.Interface):
@@ -77,6 +101,11 @@ def namespaceLookup(ns, name, object, request=None):
         ...
       LocationError: (<zope.traversing.namespace.C object at 0x...>, '++fiz++bar')
 
+    unless we ask for a default:
+
+      >>> namespaceLookup('fiz', 'bar', C(), default='missing')
+      'missing'
+
     We'll get the same thing if we provide a request:
 
       >>> from zope.publisher.browser import TestRequest
@@ -104,19 +133,120 @@ def namespaceLookup(ns, name, object, request=None):
       >>> from zope.testing.cleanup import cleanUp
       >>> cleanUp()
     """
-    if request is not None:
-        traverser = zope.component.queryMultiAdapter((object, request),
-                                                     ITraversable, ns)
-    else:
-        traverser = zope.component.queryAdapter(object, ITraversable, ns)
+    tracer = tracing.tracer
+    if tracer is not None:
+        started = tracing.clocks()
 
+    traverser = _queryHandler(ns, object, request)
     if traverser is None:
+        if default is not _marker:
+            return default
         raise LocationError(object, "++%s++%s" % (ns, name))
 
+    if tracer is None:
+        return _callHandler(traverser, name, default)
+    try:
+        return _callHandler(traverser, name, default)
+    finally:
+        wall, cpu = tracing.elapsed(started)
+        tracer.trace(request, object, name, ns, traverser.__class__,
+                     wall, cpu)
+
+
+def _queryHandler(ns, object, request=None):
+    """Return the handler of the namespace 'ns' for 'object', or None.
+
+    This is equivalent to looking up the ITraversable adapter or view
+    named 'ns', but the factory is looked up once per namespace and
+    interface specifications of the object and request, and cached on the
+    current site manager's adapter registry.  Registrations and changes
+    of the specifications, such as classImplements(), clear the cache;
+    applying a skin or layer to a request gives it a new specification
+    and so leads to a new lookup.
+    """
+    registry = zope.component.getSiteManager().adapters
+    if _unknownNamespace(ns, registry):
+        return None
+    cache = registryCache(registry, '_v_zope_traversing_namespaces')
+    if request is not None:
+        required = (providedBy(object), providedBy(request))
+    else:
+        required = (providedBy(object),)
+    key = required + (ns,)
+    factory = cache.get(key, _marker)
+    if factory is _marker:
+        factory = cache[key] = registry.lookup(required, ITraversable, ns)
+        watchSpecs(registry, '_v_zope_traversing_namespaces', required)
+    if factory is None:
+        return None
+    if request is not None:
+        return factory(object, request)
+    return factory(object)
+
+
+def registeredNamespaces(registry=None):
+    """Return the names of all namespaces that have a handler.
+
+    These are the names of all ITraversable adapters and views registered
+    in 'registry', an adapter registry, and its bases.  'registry'
+    defaults to the adapter registry of the current site manager.  The
+    set is computed once and cached until the registry changes.
+
+    Returns None if the registry does not support listing its
+    registrations (zope.interface before 5.3).
+    """
+    if registry is None:
+        registry = zope.component.getSiteManager().adapters
+    cache = registryCache(registry, '_v_zope_traversing_namespace_names')
+    names = cache.get('names', _marker)
+    if names is _marker:
+        names = cache['names'] = _registeredNamespaces(registry)
+    return names
+
+
+def _registeredNamespaces(registry):
+    names = set()
+    registries = [registry]
+    seen = set()
+    while registries:
+        registry = registries.pop()
+        if id(registry) in seen:
+            continue
+        seen.add(id(registry))
+        allRegistrations = getattr(registry, 'allRegistrations', None)
+        if allRegistrations is None:
+            return None
+        for required, provided, name, value in allRegistrations():
+            if provided.isOrExtends(ITraversable):
+                names.add(name)
+        registries.extend(registry.__bases__)
+    return frozenset(names)
+
+
+def _unknownNamespace(ns, registry=None):
+    """Tell whether no handler is registered for the namespace 'ns'.
+
+    This is a cheap test that lets lookups of made-up namespaces fail
+    without querying the registry.
+    """
+    names = registeredNamespaces(registry)
+    return names is not None and ns not in names
+
+
+def _callHandler(traverser, name, default):
+    if default is not _marker and IQueryTraversable.providedBy(traverser):
+        return traverser.queryTraverse(name, (), default)
+
     return traverser.traverse(name, ())
 
 
-namespace_pattern = re.compile('[+][+]([a-zA-Z0-9_]+)[+][+]')
+namespace_pattern = re.compile('[+][+]([a-zA-Z0-9_]+)[+][+]')  # BBB
+
+_nsChars = string.ascii_letters + string.digits + '_'
+
+# Recently parsed names; cleared when full
+_parsed = {}
+_PARSED_MAX = 1000
 
 
 def nsParse(name):
@@ -147,17 +277,26 @@ def nsParse(name):
       ('', '@foo')
 
     """
-    ns = ''
-    if name.startswith('@@'):
-        ns = 'view'
-        name = name[2:]
-    else:
-        match = namespace_pattern.match(name)
-        if match:
-            prefix, ns = match.group(0, 1)
-            name = name[len(prefix):]
-
-    return ns, name
+    result = _parsed.get(name)
+    if result is None:
+        if len(_parsed) >= _PARSED_MAX:
+            _parsed.clear()
+        result = _parsed[name] = _nsParse(name)
+    return result
+
+
+def _nsParse(name):
+    prefix = name[:2]
+    if prefix == '@@':
+        return 'view', name[2:]
+    if prefix == '++':
+        # The namespace ends at the first '++'; it cannot contain a '+'
+        end = name.find('++', 2)
+        if end > 2:
+            ns = name[2:end]
+            if not ns.strip(_nsChars):
+                return ns, name[end + 2:]
+    return '', name
 
 
 def getResource(site, name, request):
@@ -202,10 +341,24 @@ class SimpleHandler(object):
         self.context = context
 
 
+@zope.interface.implementer(IQueryTraversable)
 class acquire(SimpleHandler):
     """Traversal adapter for the acquire namespace
+
+    At most 'maxDepth' objects are searched for a name before
+    ExcessiveDepth is raised; see setAcquireDepth().
+
+    Used as a view, the handler memoizes the result of acquiring a name
+    from each object visited for the rest of the request, so a name is
+    usually looked up in the objects' traversables once per request.
     """
 
+    maxDepth = 200
+
+    def __init__(self, context, request=None):
+        SimpleHandler.__init__(self, context, request)
+        self.request = request
+
     def traverse(self, name, remaining):
         """Acquire a name
 
@@ -246,31 +399,100 @@ class acquire(SimpleHandler):
           ...
           LocationError: (splat, 'd')
         """
-        i = 0
+        next = self.queryTraverse(name, remaining, _marker)
+        if next is _marker:
+            raise LocationError(self.context, name)
+        return next
+
+    def queryTraverse(self, name, remaining, default=None):
+        """Acquire a name, or return default
+
+          >>> ob = object()
+          >>> acquire(ob).queryTraverse('d', (), 42)
+          42
+        """
+        if type(self).traverse != acquire.traverse:
+            return queryByTraversing(self, name, remaining, default)
+
+        memo = _acquisitionMemo(self.request)
+        visited = []
+        result = _marker
+        depth = 0
         ob = self.context
-        while i < 200:
-            i += 1
+        while ob is not None:
+            if depth == self.maxDepth:
+                raise ExcessiveDepth(self.context, name)
+            depth += 1
+            if memo is not None:
+                entry = memo.get(_acquisitionKey(ob, name))
+                if entry is not None:
+                    # The memoized search took entry[2] steps from 'ob'
+                    depth += entry[2] - 1
+                    if depth > self.maxDepth:
+                        raise ExcessiveDepth(self.context, name)
+                    result = entry[1]
+                    break
+                visited.append((ob, depth))
+
             traversable = ITraversable(ob, None)
             if traversable is not None:
-                try:
-                    # ??? what do we do if the path gets bigger?
-                    path = []
-                    next = traversable.traverse(name, path)
+                # ??? what do we do if the path gets bigger?
+                path = []
+                if IQueryTraversable.providedBy(traversable):
+                    next = traversable.queryTraverse(name, path, _marker)
+                else:
+                    try:
+                        next = traversable.traverse(name, path)
+                    except LocationError:
+                        next = _marker
+                if next is not _marker:
                     if path:
+                        # Try the same object again, as always
                         continue
-                except LocationError:
-                    pass
-
-                else:
-                    return next
+                    result = next
+                    break
 
             ob = getattr(ob, '__parent__', None)
-            if ob is None:
-                raise LocationError(self.context, name)
 
-        raise ExcessiveDepth(self.context, name)
+        # Acquiring the name from any object visited gives the same result,
+        # in as many steps as remained when the object was first visited
+        for ob, steps in reversed(visited):
+            # Keep 'ob' alive, so that its id is not reused
+            memo[_acquisitionKey(ob, name)] = (ob, result, depth - steps + 1)
+        if result is _marker:
+            return default
+        return result
+
+
+def setAcquireDepth(depth):
+    """Set how many objects ++acquire++ searches for a name at most
+
+    The limit applies to all acquire handlers that do not set their own
+    'maxDepth'.  Returns the previous limit; the default is 200.
+    """
+    old = acquire.maxDepth
+    acquire.maxDepth = depth
+    return old
+
 
+_acquisitionAnnotation = 'zope.traversing.namespace.acquire'
 
+
+def _acquisitionMemo(request):
+    """Return the acquisition results memoized for 'request', or None"""
+    annotations = getattr(request, 'annotations', None)
+    if annotations is None:
+        return None
+    return annotations.setdefault(_acquisitionAnnotation, {})
+
+
+def _acquisitionKey(ob, name):
+    # Security proxied objects only share results with other proxies
+    unproxied = removeSecurityProxy(ob)
+    return id(unproxied), unproxied is not ob, name
+
+
+@zope.interface.implementer(ISideEffectFreeTraversable)
 class attr(SimpleHandler):
 
     def traverse(self, name, ignored):
@@ -287,6 +509,7 @@ class attr(SimpleHandler):
         return getattr(self.context, name)
 
 
+@zope.interface.implementer(ISideEffectFreeTraversable)
 class item(SimpleHandler):
 
     def traverse(self, name, ignored):
@@ -302,30 +525,64 @@ class item(SimpleHandler):
         return self.context[name]
 
 
+@zope.interface.implementer(IQueryTraversable)
 class etc(SimpleHandler):
+    """Traversal adapter for the etc namespace
+
+    The IEtcNamespace utilities are looked up once per site manager and
+    cached until its registrations change.  ++etc++site is resolved by
+    calling the context's getSiteManager() method unless a utility is
+    registered for it.
+    """
 
     def traverse(self, name, ignored):
-        utility = zope.component.queryUtility(IEtcNamespace, name)
+        ob = self.queryTraverse(name, ignored, _marker)
+        if ob is _marker:
+            raise LocationError(self.context, name)
+        return ob
+
+    def queryTraverse(self, name, ignored, default=None):
+        if type(self).traverse != etc.traverse:
+            return queryByTraversing(self, name, ignored, default)
+        utility = _etcUtilities().get(name)
         if utility is not None:
             return utility
 
         ob = self.context
 
         if name not in ('site',):
-            raise LocationError(ob, name)
+            return default
 
         method_name = "getSiteManager"
         method = getattr(ob, method_name, None)
         if method is None:
-            raise LocationError(ob, name)
+            return default
 
         try:
             return method()
         except ComponentLookupError:
-            raise LocationError(ob, name)
+            return default
 
 
-@zope.interface.implementer(ITraversable)
+def _etcUtilities():
+    """Return the IEtcNamespace utilities of the current site manager
+
+    The mapping of names to utilities is cached on the site manager's
+    utility registry and discarded whenever it or its bases change.
+    """
+    sm = zope.component.getSiteManager()
+    registry = getattr(sm, 'utilities', None)
+    if registry is None:
+        return dict(sm.getUtilitiesFor(IEtcNamespace))
+    cache = registryCache(registry, '_v_zope_traversing_etc')
+    utilities = cache.get('utilities')
+    if utilities is None:
+        utilities = cache['utilities'] = dict(
+            registry.lookupAll((), IEtcNamespace))
+    return utilities
+
+
+@zope.interface.implementer(IQueryTraversable)
 class view(object):
 
     def __init__(self, context, request):
@@ -340,6 +597,12 @@ class view(object):
 
         return view
 
+    def queryTraverse(self, name, ignored, default=None):
+        if type(self).traverse != view.traverse:
+            return queryByTraversing(self, name, ignored, default)
+        return zope.component.queryMultiAdapter((self.context, self.request),
+                                                name=name, default=default)
+
 
 class resource(view):
 
@@ -348,6 +611,11 @@ class resource(view):
         # resource, which is needed to generate the absolute URL.
         return getResource(self.context, name, self.request)
 
+    def queryTraverse(self, name, ignored, default=None):
+        if type(self).traverse != resource.traverse:
+            return queryByTraversing(self, name, ignored, default)
+        return queryResource(self.context, name, self.request, default)
+
 
 class lang(view):
 
@@ -409,6 +677,7 @@ class vh(view):
         return self.context
 
 
+@zope.interface.implementer(IQueryTraversable)
 class adapter(SimpleHandler):
 
     def traverse(self, name, ignored):
@@ -452,6 +721,12 @@ class adapter(SimpleHandler):
         except ComponentLookupError:
             raise LocationError(self.context, name)
 
+    def queryTraverse(self, name, ignored, default=None):
+        if type(self).traverse != adapter.traverse:
+            return queryByTraversing(self, name, ignored, default)
+        return zope.component.queryAdapter(self.context, IPathAdapter, name,
+                                           default)
+
 
 class debug(view):
 
@@ -584,3 +859,11 @@ class debug(view):
             ...
             ValueError: Debug flags only allowed in debug mode
         """
+
+
+try:
+    from zope.testing.cleanup import addCleanUp
+except ImportError:  # pragma: no cover
+    pass
+else:
+    addCleanUp(setAcquireDepth, (200,))
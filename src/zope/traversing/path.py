@@ -0,0 +1,242 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Path values
+
+A Path is an immutable tuple of path segments.  Like the segment
+sequences accepted by traversal, an absolute path starts with an empty
+segment:
+
+  >>> path = Path('/folder/item')
+  >>> path
+  Path('/folder/item')
+  >>> tuple(path) == ('', 'folder', 'item')
+  True
+  >>> path.absolute
+  True
+  >>> print(path)
+  /folder/item
+
+Paths are interned, so equal paths built from the same string are the
+same object:
+
+  >>> Path('/folder/item') is path
+  True
+
+A path is split only once; operations on it work on the segments:
+
+  >>> print(path.join('sub/../other', 'x'))
+  /folder/item/other/x
+  >>> print(path.parent())
+  /folder
+  >>> print(path.parent().parent())
+  /
+  >>> print(Path('/a/./b/../c').normalize())
+  /a/c
+  >>> print(path.relativeTo('/folder'))
+  item
+  >>> path.startswith('/folder'), path.startswith('/fold')
+  (True, False)
+
+Since a Path is a tuple of segments, it can be passed wherever
+traversal accepts a path, and is accepted by the path functions of
+zope.traversing.api.
+
+Large numbers of path strings can be kept compactly in a PathArray.
+"""
+from array import array
+
+import six
+
+from zope.traversing._cache import LRUCache
+
+_interned = LRUCache(5000)
+
+
+@six.python_2_unicode_compatible
+class Path(tuple):
+    """An immutable, hashable path
+
+    Construct it from a slash delimited string or a sequence of segments;
+    a Path is returned unchanged.  The empty path is relative and has no
+    segments, the root path consists of the single segment ''.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, path=()):
+        if type(path) is cls:
+            return path
+        key = path if isinstance(path, six.string_types) else tuple(path)
+        interned = _interned.get(key)
+        if interned is not None:
+            return interned
+
+        if isinstance(path, six.string_types):
+            segments = path.split('/') if path else []
+            if len(segments) > 1 and not segments[-1]:
+                # Remove trailing slash
+                segments.pop()
+            segments = tuple(segments)
+            interned = _interned.get(segments)
+            if interned is None:
+                interned = _interned[segments] = tuple.__new__(cls, segments)
+        else:
+            interned = tuple.__new__(cls, key)
+        _interned[key] = interned
+        return interned
+
+    @property
+    def absolute(self):
+        """Tells whether the path starts at the root"""
+        return bool(self) and not self[0]
+
+    def __str__(self):
+        if self.absolute:
+            return u'/' + u'/'.join(self[1:])
+        return u'/'.join(self)
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, str(self))
+
+    def join(self, *paths):
+        """Append the given relative paths, then normalize the result
+
+        Raises ValueError if one of 'paths' is absolute.
+        """
+        segments = list(self)
+        for path in paths:
+            path = Path(path)
+            if path.absolute:
+                raise ValueError(
+                    "Can only join relative paths: %s" % (path,))
+            segments.extend(path)
+        return Path(segments).normalize()
+
+    def parent(self):
+        """Return the path without its last segment
+
+        Raises ValueError for the root and the empty path.
+        """
+        if len(self) < 1 + self.absolute:
+            raise ValueError("Path has no parent: %s" % (self,))
+        return Path(self[:-1])
+
+    def normalize(self):
+        """Resolve '.' and '..' segments
+
+        Leading '..' segments of relative paths are kept.  Raises
+        ValueError for empty segments and for '..' above the root.
+        """
+        absolute = self.absolute
+        segments = self[1:] if absolute else self
+        if '.' not in segments and '..' not in segments \
+                and '' not in segments:
+            return self
+
+        result = [''] if absolute else []
+        base = len(result)
+        for segment in segments:
+            if segment == '.':
+                continue
+            if segment == '..':
+                if len(result) > base and result[-1] != '..':
+                    result.pop()
+                elif absolute:
+                    raise ValueError(
+                        "Path goes above the root: %s" % (self,))
+                else:
+                    result.append(segment)
+                continue
+            if not segment:
+                raise ValueError(
+                    'path must not contain empty segments: %s' % (self,))
+            result.append(segment)
+        return Path(result)
+
+    def startswith(self, prefix):
+        """Tell whether 'prefix' consists of the first segments of the path
+        """
+        prefix = Path(prefix)
+        return self[:len(prefix)] == prefix
+
+    def relativeTo(self, other):
+        """Return the path leading from 'other' to this path
+
+        Raises ValueError unless 'other' is a prefix of the path.
+        """
+        other = Path(other)
+        if not self.startswith(other):
+            raise ValueError("%s is not within %s" % (self, other))
+        return Path(self[len(other):])
+
+
+class PathArray(object):
+    """A compact, read-only sequence of path strings
+
+    The paths are kept in a single string, with their end offsets in an
+    array, rather than as separate string objects:
+
+      >>> error = ValueError('bad')
+      >>> paths = PathArray([u'/a', u'/a/b', error, u'/c'])
+      >>> len(paths)
+      4
+      >>> print(paths[1])
+      /a/b
+      >>> paths[2] is error
+      True
+      >>> print(paths[-1])
+      /c
+
+    Exceptions take the place of paths that could not be computed and are
+    also available from the 'errors' mapping of indexes to exceptions.
+    """
+
+    __slots__ = ('_text', '_ends', 'errors')
+
+    def __init__(self, paths):
+        parts = []
+        ends = array('l')
+        errors = {}
+        end = 0
+        for index, path in enumerate(paths):
+            if isinstance(path, Exception):
+                errors[index] = path
+            else:
+                path = six.text_type(path)
+                parts.append(path)
+                end += len(path)
+            ends.append(end)
+        self._text = u''.join(parts)
+        self._ends = ends
+        self.errors = errors
+
+    def __len__(self):
+        return len(self._ends)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        ends = self._ends
+        if index < 0:
+            index += len(ends)
+        end = ends[index]
+        if self.errors:
+            error = self.errors.get(index)
+            if error is not None:
+                return error
+        return self._text[ends[index - 1] if index else 0:end]
+
+    def __iter__(self):
+        for index in range(len(self._ends)):
+            yield self[index]
@@ -0,0 +1,232 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Memoized object paths
+
+Computing the path of an object walks its __parent__ chain up to the
+root.  Once enableCache() has been called, zope.traversing.api.getPath(),
+canonicalPath() and getParents() remember the result per object until
+the object or one of its parents is moved or removed.
+
+The cache relies on the IObjectMovedEvent notifications sent by
+zope.container (IObjectRemovedEvent is a kind of move), for which
+objectMoved() is registered in configure.zcml.  Objects relocated by
+setting __parent__ or __name__ directly, without an event, keep their old
+path until invalidate() is called for them.
+
+Besides the LRU cache, the memoized paths are kept in a tree keyed by
+path segments, so that moving an object only has to visit the entries
+below it.
+"""
+import threading
+
+from zope.location.interfaces import ILocationInfo, LocationError
+from zope.security.proxy import removeSecurityProxy
+from zope.traversing._cache import LRUCache, objectRef
+
+# The LRUCache mapping id(object) to [reference, path, parents, node], or
+# None; 'node' is the node of the entry in the tree of paths
+cache = None
+
+# The tree of memoized paths.  Each node is an [entries, children, parent,
+# name] list, where 'entries' maps cache keys to the entries memoizing the
+# path of the node.
+_tree = None
+_lock = threading.Lock()
+
+# The node of entries that left the cache before their path was memoized
+_GONE = object()
+
+
+def enableCache(maxsize=10000):
+    """Start memoizing the paths of up to 'maxsize' objects"""
+    global cache, _tree
+    _tree = [{}, {}, None, None]
+    cache = LRUCache(maxsize, _forget)
+
+
+def disableCache():
+    """Stop memoizing paths and forget all memoized ones"""
+    global cache, _tree
+    cache = _tree = None
+
+
+def _entry(obj):
+    """Return the cache entry for 'obj', creating it if necessary"""
+    key = id(obj)
+    entry = cache.get(key)
+    if entry is not None:
+        if entry[0]() is obj:
+            return entry
+        # The id has been reused
+        _forget(key, entry)
+    entry = [objectRef(obj), None, None, None]
+    cache[key] = entry
+    return entry
+
+
+def _remember(key, entry, path):
+    """Add a cache entry to the tree of paths under 'path'"""
+    with _lock:
+        if entry[3] is not None:
+            return
+        node = _tree
+        for name in path.split('/'):
+            if name:
+                children = node[1]
+                child = children.get(name)
+                if child is None:
+                    child = children[name] = [{}, {}, node, name]
+                node = child
+        node[0][key] = entry
+        entry[3] = node
+
+
+def _forget(key, entry):
+    """Remove a cache entry from the tree of paths"""
+    with _lock:
+        node = entry[3]
+        entry[3] = _GONE
+        if node is None or node is _GONE:
+            return
+        node[0].pop(key, None)
+        # Drop the nodes left empty
+        while not node[0] and not node[1] and node[2] is not None:
+            parent = node[2]
+            if parent[1].get(node[3]) is node:
+                del parent[1][node[3]]
+            node[2] = None
+            node = parent
+
+
+def _detach(path):
+    """Remove the subtree of 'path' from the tree of paths
+
+    Returns the keys of the cache entries it held.
+    """
+    node = _tree
+    for name in path.split('/'):
+        if name:
+            node = node[1].get(name)
+            if node is None:
+                return []
+    if node[2] is not None:
+        del node[2][1][node[3]]
+        node[2] = None
+    else:
+        # The root node stays in place
+        node = list(_tree)
+        _tree[:] = [{}, {}, None, None]
+    keys = []
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        for key, entry in node[0].items():
+            entry[3] = _GONE
+            keys.append(key)
+        nodes.extend(node[1].values())
+    return keys
+
+
+def getPath(obj):
+    """Return the path of 'obj', memoized"""
+    unproxied = removeSecurityProxy(obj)
+    entry = _entry(unproxied)
+    path = entry[1]
+    if path is None:
+        path = entry[1] = ILocationInfo(obj).getPath()
+        _remember(id(unproxied), entry, path)
+    return path
+
+
+def queryDepth(obj):
+    """Return the number of parents of 'obj' if its path is memoized
+
+    Returns None if the path of 'obj' is not memoized.
+    """
+    if cache is None:
+        return None
+    obj = removeSecurityProxy(obj)
+    entry = cache.get(id(obj))
+    if entry is None or entry[1] is None or entry[0]() is not obj:
+        return None
+    path = entry[1]
+    return 0 if path == u'/' else path.count(u'/')
+
+
+def getParents(obj):
+    """Return the parents of 'obj', memoized
+
+    The parents of security proxied objects are not memoized, as the
+    proxies of the parents depend on the caller.
+    """
+    if removeSecurityProxy(obj) is not obj:
+        return ILocationInfo(obj).getParents()
+    entry = _entry(obj)
+    parents = entry[2]
+    if parents is None:
+        parents = entry[2] = ILocationInfo(obj).getParents()
+    if entry[1] is None:
+        entry[1] = ILocationInfo(obj).getPath()
+        _remember(id(obj), entry, entry[1])
+    return list(parents)
+
+
+def invalidate(obj, oldParent=None, oldName=None):
+    """Forget the memoized paths of 'obj' and everything below it
+
+    'oldParent' and 'oldName' tell where 'obj' was located before being
+    moved, if known.  Only the entries below these locations are visited.
+    """
+    if cache is None:
+        return
+    obj = removeSecurityProxy(obj)
+    prefixes = []
+    key = id(obj)
+    entry = cache.pop(key)
+    if entry is not None:
+        if entry[1] is not None and entry[0]() is obj:
+            prefixes.append(entry[1])
+        _forget(key, entry)
+    if oldParent is not None and oldName is not None:
+        try:
+            path = getPath(oldParent)
+        except (TypeError, LocationError):
+            with _lock:
+                _tree[:] = [{}, {}, None, None]
+            cache.clear()
+            return
+        if path.endswith('/'):
+            prefixes.append(path + oldName)
+        else:
+            prefixes.append(path + '/' + oldName)
+
+    keys = []
+    with _lock:
+        for prefix in set(prefixes):
+            keys.extend(_detach(prefix))
+    for key in keys:
+        cache.pop(key)
+
+
+def objectMoved(obj, event):
+    """Subscriber invalidating the paths below a moved or removed object"""
+    invalidate(obj, event.oldParent, event.oldName)
+
+
+try:
+    from zope.testing.cleanup import addCleanUp
+except ImportError:  # pragma: no cover
+    pass
+else:
+    addCleanUp(disableCache)
@@ -0,0 +1,218 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Reverse path index
+
+Traversing an absolute path loads and adapts every object on the way.
+Once a PathIndex is installed with setPathIndex(), Traverser.traverse()
+resolves absolute paths consisting of plain names through the index
+instead, and remembers the objects it had to find by regular traversal.
+
+An object found in the index is only returned if following its
+__parent__ and __name__ attributes leads back to the traversal root along
+the path; otherwise the path is traversed as usual.  The index thus
+assumes that an object found this way is the one regular traversal
+would find, which holds for containers and their items.
+
+The index follows the IObjectMovedEvent notifications sent by
+zope.container (added and removed objects are moved from or to None),
+for which objectMoved() is registered in configure.zcml.  Objects are
+only referenced weakly, so the index does not keep them alive.
+"""
+import threading
+
+import zope.interface
+from zope.location.interfaces import ILocationInfo
+from zope.security.proxy import removeSecurityProxy
+from zope.traversing._cache import objectRef
+from zope.traversing.interfaces import IPathIndex
+
+# The installed IPathIndex, or None
+index = None
+
+
+def setPathIndex(new):
+    """Install the IPathIndex 'new', or None to stop using an index
+
+    Returns the previously installed index.
+    """
+    global index
+    old, index = index, new
+    return old
+
+
+def getPathIndex():
+    """Return the installed path index, or None"""
+    return index
+
+
+def _verify(obj, names, root):
+    """Tell whether 'obj' is located at 'names' below 'root'"""
+    for name in reversed(names):
+        if getattr(obj, '__name__', None) != name:
+            return False
+        obj = getattr(obj, '__parent__', None)
+    return obj is root
+
+
+@zope.interface.implementer(IPathIndex)
+class PathIndex(object):
+    """Trees of weak references to objects, keyed by path segments
+
+    There is one tree per root object, so that the objects of different
+    roots, such as the root folders of different database connections,
+    are kept apart.  Each node is a [reference, children, parent, name]
+    list; 'reference' is None for nodes that were only created to hold
+    children.  The top node of a tree refers to its root and has the id
+    of the root as its name.  Moving a node moves the whole subtree below
+    it.
+
+    Nodes are removed once their object goes away and nothing is known
+    below them, and the tree of a root is dropped with the root.  The
+    weak reference callbacks only queue the nodes, which are removed by
+    the next call changing the index.
+    """
+
+    def __init__(self):
+        self._trees = {}
+        self._dead = []
+        self._lock = threading.Lock()
+
+    def _ref(self, obj, node):
+        dead = self._dead
+        return objectRef(obj, lambda ref: dead.append((node, ref)))
+
+    def _top(self, root, create=False):
+        key = id(root)
+        node = self._trees.get(key)
+        if node is None or node[0]() is not root:
+            if not create:
+                return None
+            node = self._trees[key] = [None, {}, None, key]
+            node[0] = self._ref(root, node)
+        return node
+
+    def _node(self, root, names, create=False):
+        node = self._top(root, create)
+        if node is None:
+            return None
+        for name in names:
+            children = node[1]
+            child = children.get(name)
+            if child is None:
+                if not create:
+                    return None
+                child = children[name] = [None, {}, node, name]
+            node = child
+        return node
+
+    def _prune(self, node):
+        # Remove 'node' and its ancestors as long as they are empty
+        while node[0] is None and not node[1]:
+            parent = node[2]
+            if parent is None:
+                if self._trees.get(node[3]) is node:
+                    del self._trees[node[3]]
+                return
+            if parent[1].get(node[3]) is node:
+                del parent[1][node[3]]
+            node[2] = None
+            node = parent
+
+    def _removeDead(self):
+        dead = self._dead
+        while dead:
+            node, ref = dead.pop()
+            if node[0] is not ref:
+                # The node refers to another object by now
+                continue
+            node[0] = None
+            if node[2] is None:
+                # The root went away, and its tree with it
+                node[1].clear()
+            self._prune(node)
+
+    def lookup(self, root, names):
+        node = self._node(root, names)
+        if node is None or node[0] is None:
+            return None
+        obj = node[0]()
+        if obj is not None and _verify(obj, names, root):
+            return obj
+        return None
+
+    def remember(self, root, names, obj):
+        if names and _verify(obj, names, root):
+            with self._lock:
+                self._removeDead()
+                node = self._node(root, names, True)
+                if node[0] is None or node[0]() is not obj:
+                    node[0] = self._ref(obj, node)
+
+    def move(self, obj, oldRoot, oldNames, newRoot, newNames):
+        with self._lock:
+            self._removeDead()
+            node = None
+            if oldNames:
+                parent = self._node(oldRoot, oldNames[:-1])
+                if parent is not None:
+                    node = parent[1].pop(oldNames[-1], None)
+                    self._prune(parent)
+            if newNames:
+                parent = self._node(newRoot, newNames[:-1], True)
+                if node is None:
+                    node = [None, {}, None, None]
+                node[2:] = [parent, newNames[-1]]
+                if node[0] is None or node[0]() is not obj:
+                    node[0] = self._ref(obj, node)
+                parent[1][newNames[-1]] = node
+
+    def clear(self):
+        with self._lock:
+            self._trees = {}
+            del self._dead[:]
+
+
+def _location(parent, name):
+    """Return the root and the path segments of 'name' in 'parent'
+
+    Returns (None, None) for objects that are not located below a root.
+    """
+    if parent is None or name is None:
+        return None, None
+    info = ILocationInfo(parent)
+    try:
+        path = info.getPath()
+    except TypeError:
+        return None, None
+    names = [n for n in path.split('/') if n]
+    names.append(name)
+    return removeSecurityProxy(info.getRoot()), tuple(names)
+
+
+def objectMoved(obj, event):
+    """Subscriber keeping the installed index current"""
+    # zope.container dispatches the event to all sublocations of the
+    # moved object as well.  Moving the top object takes care of them.
+    if index is not None and removeSecurityProxy(obj) is event.object:
+        oldRoot, oldNames = _location(event.oldParent, event.oldName)
+        newRoot, newNames = _location(event.newParent, event.newName)
+        index.move(obj, oldRoot, oldNames, newRoot, newNames)
+
+
+try:
+    from zope.testing.cleanup import addCleanUp
+except ImportError:  # pragma: no cover
+    pass
+else:
+    addCleanUp(setPathIndex, (None,))
@@ -0,0 +1,150 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Compiled traversal paths
+
+A path plan is a path that has been split and classified once, so that
+repeated traversals of the same path do not have to parse it again:
+
+  >>> plan = compilePath('/folder/../++etc++site/@@index.html/item')
+  >>> plan.absolute
+  True
+  >>> for step in plan.steps:
+  ...     print(step)
+  (4, 'folder', '', 'folder')
+  (2, '..', '', '..')
+  (3, '++etc++site', 'etc', 'site')
+  (3, '@@index.html', 'view', 'index.html')
+  (4, 'item', '', 'item')
+
+Plans for strings and tuples are cached, so compiling the same path
+again is cheap and returns the same plan:
+
+  >>> compilePath('/folder/../++etc++site/@@index.html/item') is plan
+  True
+
+A plan iterates over the segments of the original path, so it can be
+passed wherever a sequence of path segments is accepted:
+
+  >>> list(compilePath('/a/b/'))
+  ['', 'a', 'b']
+  >>> list(compilePath(('a', '.', 'b')))
+  ['a', '.', 'b']
+  >>> compilePath(plan) is plan
+  True
+"""
+import six
+
+from zope.traversing._cache import LRUCache
+from zope.traversing.namespace import nsParse
+
+# Step kinds
+SELF = 1
+PARENT = 2
+NAMESPACE = 3
+NAME = 4
+
+_plans = LRUCache(5000)
+
+
+def parseSegment(name):
+    """Classify a single path segment.
+
+    Returns a tuple ``(kind, segment, namespace, name)``:
+
+      >>> parseSegment('.')
+      (1, '.', '', '.')
+      >>> parseSegment('..')
+      (2, '..', '', '..')
+      >>> parseSegment('++acquire++foo')
+      (3, '++acquire++foo', 'acquire', 'foo')
+      >>> parseSegment('@foo')
+      (4, '@foo', '', '@foo')
+      >>> parseSegment('foo')
+      (4, 'foo', '', 'foo')
+    """
+    if name == '.':
+        return (SELF, name, '', name)
+    if name == '..':
+        return (PARENT, name, '', name)
+    if name and name[:1] in '@+':
+        ns, nm = nsParse(name)
+        if ns:
+            return (NAMESPACE, name, ns, nm)
+        return (NAME, name, '', nm)
+    return (NAME, name, '', name)
+
+
+class PathPlan(object):
+    """An immutable, pre-parsed traversal path.
+
+    'absolute' tells whether traversal starts at the root, 'steps' is a
+    tuple of classified segments as returned by parseSegment() and
+    'furtherPath' holds the same segments in reverse order, ready to be
+    copied into the list handed to traversables.  If all steps are plain
+    names, 'names' is a tuple of them, else it is None.
+    """
+
+    __slots__ = ('path', 'absolute', 'steps', 'furtherPath', 'names')
+
+    def __init__(self, path):
+        if isinstance(path, six.string_types):
+            segments = path.split('/')
+            if len(segments) > 1 and not segments[-1]:
+                # Remove trailing slash
+                segments.pop()
+        else:
+            segments = list(path)
+
+        absolute = bool(segments) and not segments[0]
+        if absolute:
+            del segments[0]
+
+        self.path = path
+        self.absolute = absolute
+        self.steps = tuple([parseSegment(name) for name in segments])
+        if all(step[0] is NAME for step in self.steps):
+            self.names = tuple([step[3] for step in self.steps])
+        else:
+            self.names = None
+        segments.reverse()
+        self.furtherPath = tuple(segments)
+
+    def __iter__(self):
+        if self.absolute:
+            yield ''
+        for step in self.steps:
+            yield step[1]
+
+    def __len__(self):
+        return len(self.steps) + self.absolute
+
+    def __repr__(self):
+        return '<%s %r>' % (self.__class__.__name__, self.path)
+
+
+def compilePath(path):
+    """Return a PathPlan for the given path.
+
+    'path' is a slash delimited string or a sequence of segments; a
+    PathPlan is returned unchanged.  Plans for hashable paths are kept
+    in a bounded cache.
+    """
+    if isinstance(path, PathPlan):
+        return path
+    if isinstance(path, (six.string_types, tuple)):
+        plan = _plans.get(path)
+        if plan is None:
+            plan = _plans[path] = PathPlan(path)
+        return plan
+    return PathPlan(path)
@@ -19,6 +19,7 @@ import six
 from zope.component import queryMultiAdapter
 from zope.publisher.interfaces import NotFound
 from zope.security.checker import ProxyFactory
+from zope.traversing import tracing
 from zope.traversing.namespace import namespaceLookup
 from zope.traversing.namespace import nsParse
 from zope.traversing.interfaces import TraversalError
@@ -62,17 +63,29 @@ class PublicationTraverser(object):
         if nm == '.':
             return ob
 
+        tracer = tracing.tracer
+        if tracer is not None:
+            started = tracing.clocks()
+
         if IPublishTraverse.providedBy(ob):
-            ob2 = ob.publishTraverse(request, nm)
+            adapter = ob
         else:
             # self is marker
             adapter = queryMultiAdapter((ob, request), IPublishTraverse,
                                         default=self)
-            if adapter is not self:
-                ob2 = adapter.publishTraverse(request, nm)
-            else:
+            if adapter is self:
                 raise NotFound(ob, name, request)
 
+        if tracer is None:
+            ob2 = adapter.publishTraverse(request, nm)
+        else:
+            try:
+                ob2 = adapter.publishTraverse(request, nm)
+            finally:
+                wall, cpu = tracing.elapsed(started)
+                tracer.trace(request, ob, nm, '', adapter.__class__,
+                             wall, cpu)
+
         return self.proxy(ob2)
 
     def traversePath(self, request, ob, path):
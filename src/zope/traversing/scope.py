@@ -0,0 +1,243 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Short-lived memoization of location information
+
+While a LocationScope is active, zope.traversing.api.getRoot(),
+getPath(), getName() and getParent() look up the ILocationInfo adapter
+of each object and compute each result only once:
+
+  >>> with LocationScope() as scope:
+  ...     current() is scope
+  True
+  >>> current() is None
+  True
+
+A scope forgets everything when it is closed, which happens when the
+outermost 'with' block using it is left.  The scopes returned by
+requestScope() and transactionScope() can be entered repeatedly and are
+closed at the end of the request or transaction, so no memoized result
+outlives them.  Moving an object while scopes are active makes them forget
+what they know about the objects below it, through the IObjectMovedEvent
+subscriber objectMoved() registered in configure.zcml.
+"""
+import threading
+import weakref
+
+import transaction
+from transaction.interfaces import IDataManager
+from zope.interface import implementer
+from zope.location.interfaces import ILocationInfo
+
+
+class _Local(threading.local):
+    # The innermost active scope and the stack of active scopes
+    scope = None
+    stack = None
+
+
+_local = _Local()
+_requestKey = 'zope.traversing.scope.LocationScope'
+_transactionScopes = weakref.WeakKeyDictionary()
+
+
+def current():
+    """Return the innermost active scope of this thread, or None"""
+    return _local.scope
+
+
+class LocationScope(object):
+    """Memoizes ILocationInfo adapters and their results
+
+    Objects are kept alive for the lifetime of the scope.  A scope may be
+    active in several threads at once; it is closed when the last 'with'
+    block using it is left.
+    """
+
+    # Whether leaving the outermost 'with' block closes the scope
+    _closeOnExit = True
+
+    def __init__(self):
+        self._entries = {}
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        stack = _local.stack
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        _local.scope = self
+        with self._lock:
+            self._active += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        stack = _local.stack
+        stack.pop()
+        _local.scope = stack[-1] if stack else None
+        with self._lock:
+            self._active -= 1
+            close = not self._active and self._closeOnExit
+        if close:
+            self.close()
+
+    def close(self):
+        """Forget all memoized information"""
+        self._entries = {}
+
+    def invalidate(self, obj, oldParent=None, oldName=None):
+        """Forget the memoized roots and paths of 'obj' and everything
+        below it
+
+        'oldParent' and 'oldName' tell where 'obj' was located before being
+        moved, if known.  Objects whose path is not memoized forget their
+        root as well.
+        """
+        prefixes = set()
+        entry = self._entries.get(id(obj))
+        if entry is not None and entry[3] is not None:
+            prefixes.add(entry[3])
+        if oldParent is not None and oldName is not None:
+            try:
+                path = self.getPath(oldParent)
+            except TypeError:
+                prefixes = None
+            else:
+                prefixes.add(path.rstrip('/') + '/' + oldName)
+        for entry in self._entries.values():
+            path = entry[3]
+            if (prefixes is None or path is None
+                    or [prefix for prefix in prefixes
+                        if path == prefix or path.startswith(prefix + '/')]):
+                entry[2] = entry[3] = None
+
+    def _entry(self, obj):
+        entry = self._entries.get(id(obj))
+        if entry is None:
+            # obj, ILocationInfo, root, path
+            entry = self._entries[id(obj)] = [obj, ILocationInfo(obj),
+                                              None, None]
+        return entry
+
+    def locationInfo(self, obj):
+        """Return the ILocationInfo adapter of 'obj'"""
+        return self._entry(obj)[1]
+
+    def getRoot(self, obj):
+        entry = self._entry(obj)
+        root = entry[2]
+        if root is None:
+            root = entry[2] = entry[1].getRoot()
+        return root
+
+    def getPath(self, obj):
+        entry = self._entry(obj)
+        path = entry[3]
+        if path is None:
+            path = entry[3] = entry[1].getPath()
+        return path
+
+    def getName(self, obj):
+        return self._entry(obj)[1].getName()
+
+    def getParent(self, obj):
+        return self._entry(obj)[1].getParent()
+
+
+class _BoundScope(LocationScope):
+    # A scope closed by the end of a request or transaction
+    _closeOnExit = False
+
+
+def requestScope(request):
+    """Return the scope of 'request'
+
+    The scope is kept in the request's annotations and closed by
+    endRequest() when the request ends.
+    """
+    scope = request.annotations.get(_requestKey)
+    if scope is None:
+        scope = request.annotations[_requestKey] = _BoundScope()
+    return scope
+
+
+def endRequest(event):
+    """Subscriber closing the scope of a request that ends"""
+    annotations = getattr(event.request, 'annotations', None)
+    if annotations is not None:
+        scope = annotations.pop(_requestKey, None)
+        if scope is not None:
+            scope.close()
+
+
+def objectMoved(obj, event):
+    """Subscriber invalidating the active scopes below a moved object
+
+    Only the scopes active in the current thread are invalidated.
+    """
+    for scope in _local.stack or ():
+        scope.invalidate(obj, event.oldParent, event.oldName)
+
+
+def transactionScope(txn=None):
+    """Return the scope of the transaction 'txn', or of the current one
+
+    The scope is closed when the transaction commits or aborts.
+    """
+    if txn is None:
+        txn = transaction.get()
+    scope = _transactionScopes.get(txn)
+    if scope is None:
+        scope = _transactionScopes[txn] = _BoundScope()
+        txn.join(_ScopeCloser(scope))
+    return scope
+
+
+@implementer(IDataManager)
+class _ScopeCloser(object):
+    """Data manager closing a scope when its transaction ends"""
+
+    transaction_manager = None
+
+    def __init__(self, scope):
+        self.scope = scope
+
+    def abort(self, txn):
+        self.scope.close()
+
+    def tpc_begin(self, txn):
+        pass
+
+    def commit(self, txn):
+        pass
+
+    def tpc_vote(self, txn):
+        pass
+
+    def tpc_finish(self, txn):
+        self.scope.close()
+
+    def tpc_abort(self, txn):
+        self.scope.close()
+
+    def sortKey(self):
+        return 'zope.traversing.scope:%d' % id(self)
+
+
+try:
+    from zope.testing.cleanup import addCleanUp
+except ImportError:  # pragma: no cover
+    pass
+else:
+    addCleanUp(_local.__dict__.clear)
@@ -17,6 +17,7 @@ __docformat__ = "reStructuredText"
 
 import zope.component
 import zope.interface
+from zope.component.testing import PlacelessSetup
 from zope.publisher.interfaces.browser import IDefaultBrowserLayer
 from zope.location.traversing \
     import LocationPhysicallyLocatable, RootPhysicallyLocatable
@@ -62,6 +63,86 @@ def contained(obj, root, name=None):
     obj.__name__ = name
     return obj
 
+
+class RecordingLocationInfo(LocationPhysicallyLocatable):
+    """ILocationInfo adapter recording its use
+
+    'created' lists the objects adapters were created for, and 'paths' the
+    objects whose path was computed.  LocationSetup resets both.
+    """
+
+    created = []
+    paths = []
+
+    def __init__(self, context):
+        self.created.append(context)
+        LocationPhysicallyLocatable.__init__(self, context)
+
+    def getPath(self):
+        self.paths.append(self.context)
+        return LocationPhysicallyLocatable.getPath(self)
+
+
+class MovedEvent(object):
+    """Stand-in for zope.lifecycleevent's ObjectMovedEvent"""
+
+    def __init__(self, object, oldParent, oldName, newParent, newName):
+        self.object = object
+        self.oldParent = oldParent
+        self.oldName = oldName
+        self.newParent = newParent
+        self.newName = newName
+
+
+def moveObject(ob, parent, name, handler, sublocations=()):
+    """Move 'ob' to 'name' in 'parent' (None to remove it) and notify
+    'handler'
+
+    'ob' is stored as an attribute of its parent.  Like zope.container,
+    the event is passed to 'handler' for 'ob' and then for each of the
+    objects below it given as 'sublocations'.
+    """
+    event = MovedEvent(ob, ob.__parent__, ob.__name__, parent, name)
+    if ob.__parent__ is not None:
+        ob.__parent__.__dict__.pop(ob.__name__, None)
+    if parent is not None:
+        setattr(parent, name, ob)
+    ob.__parent__, ob.__name__ = parent, name
+    for target in (ob,) + tuple(sublocations):
+        handler(target, event)
+    return event
+
+
+class Location(Contained):
+    """A located object, keeping its children as attributes"""
+
+
+class LocationSetup(PlacelessSetup):
+    """Test setup with location adapters and a small tree of objects
+
+    The tree consists of the root, 'a', 'b' and 'c' at '/a/b/c', and
+    'other' at '/other'.  The children are also attributes of their
+    parents.  ILocationInfo is provided by RecordingLocationInfo, whose
+    records are available as 'created' and 'paths'.
+    """
+
+    def setUp(self):
+        PlacelessSetup.setUp(self)
+        RecordingLocationInfo.created = self.created = []
+        RecordingLocationInfo.paths = self.paths = []
+        zope.component.provideAdapter(RecordingLocationInfo, (None,),
+                                      ILocationInfo)
+        zope.component.provideAdapter(RootPhysicallyLocatable,
+                                      (IRoot,), ILocationInfo)
+
+        self.root = root = Location()
+        zope.interface.directlyProvides(root, IRoot)
+        root.a = self.a = contained(Location(), root, 'a')
+        self.a.b = self.b = contained(Location(), self.a, 'b')
+        self.b.c = self.c = contained(Location(), self.b, 'c')
+        root.other = self.other = contained(Location(), root, 'other')
+
+
 # BBB: Kept for backward-compatibility, in case some package depends on it.
 def setUp(): #pragma: nocover
     zope.component.provideAdapter(Traverser, (None,), ITraverser)
@@ -0,0 +1,238 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Asynchronous traversal tests.
+"""
+import sys
+import unittest
+
+import zope.component
+from zope.component.testing import PlacelessSetup
+from zope.interface import directlyProvides, implementer
+from zope.location.traversing \
+    import LocationPhysicallyLocatable, RootPhysicallyLocatable
+from zope.location.interfaces import ILocationInfo, IRoot, LocationError
+
+from zope.traversing.adapters import DefaultTraversable
+from zope.traversing.interfaces import IAsyncTraversable, ITraversable
+from zope.traversing.interfaces import IBatchTraversable
+from zope.traversing.testing import contained, Contained
+
+
+class C(Contained):
+    def __init__(self, name):
+        self.name = name
+
+
+class Store(object):
+    """Stand-in for a remote object store, answering on the next loop
+    iteration"""
+
+    def __init__(self):
+        self.objects = {}
+        self.loads = 0
+        self.batches = []
+
+    def load(self, names):
+        import asyncio
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        loop.call_soon(future.set_result,
+                       dict((name, self.objects[name])
+                            for name in names if name in self.objects))
+        return future
+
+
+@implementer(IAsyncTraversable)
+class Lazy(Contained):
+    """A folder whose children live in the store"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def traverse(self, name, furtherPath):
+        import asyncio
+        self.store.loads += 1
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+
+        def load():
+            try:
+                future.set_result(self.store.objects[name])
+            except KeyError:
+                future.set_exception(LocationError(self, name))
+
+        loop.call_soon(load)
+        return future
+
+
+@implementer(IBatchTraversable)
+class BatchingLazy(Lazy):
+    """A lazy folder that can load several children at once"""
+
+    def traverseBatch(self, names):
+        self.store.batches.append(sorted(names))
+        return self.store.load(names)
+
+
+class AsyncTraverserTests(PlacelessSetup, unittest.TestCase):
+
+    def setUp(self):
+        PlacelessSetup.setUp(self)
+        zope.component.provideAdapter(DefaultTraversable, (None,),
+                                      ITraversable)
+        zope.component.provideAdapter(LocationPhysicallyLocatable, (None,),
+                                      ILocationInfo)
+        zope.component.provideAdapter(RootPhysicallyLocatable,
+                                      (IRoot,), ILocationInfo)
+
+        self.store = Store()
+        self.root = root = C('root')
+        directlyProvides(root, IRoot)
+        self.lazy = lazy = contained(Lazy(self.store), root, 'lazy')
+        root.lazy = lazy
+        self.item = item = contained(C('item'), lazy, 'item')
+        self.store.objects['item'] = item
+        item.child = contained(C('child'), item, 'child')
+
+    def run_(self, *coroutines):
+        import asyncio
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            if len(coroutines) == 1:
+                return loop.run_until_complete(coroutines[0])
+            return loop.run_until_complete(asyncio.gather(*coroutines))
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    def traverse(self, ob, path, *args):
+        from zope.traversing.asynchronous import AsyncTraverser
+        return self.run_(AsyncTraverser(ob).traverse(path, *args))
+
+    def testMixedPath(self):
+        self.assertTrue(self.traverse(self.root, 'lazy/item/child')
+                        is self.item.child)
+        self.assertEqual(self.store.loads, 1)
+
+    def testDotsAndRoot(self):
+        self.assertTrue(self.traverse(self.item, '/lazy/./item/../item')
+                        is self.item)
+        self.assertTrue(self.traverse(self.item, '/') is self.root)
+        self.assertTrue(self.traverse(self.item, '') is self.item)
+
+    def testNamespace(self):
+        from zope.traversing.namespace import attr
+        zope.component.provideAdapter(attr, (None,), ITraversable,
+                                      name='attribute')
+        self.assertTrue(self.traverse(self.root, 'lazy/++attribute++store')
+                        is self.store)
+
+    def testNotFound(self):
+        self.assertRaises(LocationError, self.traverse, self.root,
+                          'lazy/missing')
+        self.assertEqual(self.traverse(self.root, 'lazy/missing', 42), 42)
+        self.assertEqual(self.traverse(self.root, 'lazy/item/x', 42), 42)
+
+    def testConcurrentTraversals(self):
+        from zope.traversing.api import traverseAsync
+        results = self.run_(*[traverseAsync(self.root, 'lazy/item/child')
+                              for i in range(100)])
+        self.assertEqual(len(results), 100)
+        self.assertTrue(all(r is self.item.child for r in results))
+        self.assertEqual(self.store.loads, 100)
+
+    def testAdapterFactoryCached(self):
+        from zope.interface import providedBy
+
+        @implementer(IAsyncTraversable)
+        class LazyAdapter(object):
+            def __init__(self, context):
+                self.context = context
+
+            def traverse(self, name, furtherPath):
+                return Lazy(self.context.store).traverse(name, furtherPath)
+
+        class Remote(Contained):
+            def __init__(self, store):
+                self.store = store
+
+        remote = contained(Remote(self.store), self.root, 'remote')
+        self.root.remote = remote
+        zope.component.provideAdapter(LazyAdapter, (Remote,),
+                                      IAsyncTraversable)
+        self.assertTrue(self.traverse(self.root, 'remote/item/child')
+                        is self.item.child)
+        self.assertEqual(self.store.loads, 1)
+        registry = zope.component.getSiteManager().adapters
+        cache = registry._v_zope_traversing_async_traversables[1]
+        self.assertTrue(cache[providedBy(remote)] is LazyAdapter)
+        # Objects without an asynchronous adapter are remembered too
+        self.assertTrue(cache[providedBy(self.root)] is None)
+
+
+class BatchLoaderTests(AsyncTraverserTests):
+
+    def setUp(self):
+        AsyncTraverserTests.setUp(self)
+        self.lazy = lazy = contained(BatchingLazy(self.store), self.root,
+                                     'lazy')
+        self.root.lazy = lazy
+        self.other = contained(C('other'), lazy, 'other')
+        self.store.objects['other'] = self.other
+
+    def testConcurrentLookupsAreBatched(self):
+        from zope.traversing.api import traverseAsync
+        from zope.traversing.batch import BatchLoader
+        loader = BatchLoader()
+        results = self.run_(*[traverseAsync(self.root, path, None,
+                                            loader=loader)
+                              for path in ('lazy/item/child', 'lazy/other',
+                                           'lazy/missing', 'lazy/item')])
+        self.assertEqual(results, [self.item.child, self.other, None,
+                                   self.item])
+        self.assertEqual(self.store.batches, [['item', 'missing', 'other']])
+        self.assertEqual(self.store.loads, 0)
+
+    def testRequestLoader(self):
+        from zope.publisher.browser import TestRequest
+        from zope.traversing.api import traverseAsync
+        from zope.traversing.batch import getBatchLoader
+        request = TestRequest()
+        self.assertTrue(getBatchLoader(request) is getBatchLoader(request))
+        self.assertEqual(getBatchLoader(object()), None)
+        self.run_(traverseAsync(self.root, 'lazy/item', request=request),
+                  traverseAsync(self.root, 'lazy/other', request=request))
+        self.assertEqual(self.store.batches, [['item', 'other']])
+
+    def testFailingBatch(self):
+        from zope.traversing.batch import BatchLoader
+
+        def traverseBatch(names):
+            raise ValueError(names)
+        self.lazy.traverseBatch = traverseBatch
+        self.assertRaises(ValueError, self.traverse, self.root, 'lazy/item',
+                          None, None, BatchLoader())
+
+
+def test_suite():
+    if sys.version_info < (3, 5):
+        return unittest.TestSuite()
+    return unittest.TestSuite((
+        unittest.makeSuite(AsyncTraverserTests),
+        unittest.makeSuite(BatchLoaderTests),
+        ))
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
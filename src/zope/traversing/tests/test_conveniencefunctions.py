@@ -170,6 +170,86 @@ class Test(PlacelessSetup, TestCase):
             self.broken_chain_item
             )
 
+    def testIterParents(self):
+        from zope.traversing.api import iterParents
+        parents = iterParents(self.item)
+        self.assertTrue(next(parents) is self.folder)
+        self.assertEqual(list(parents), [self.root])
+        self.assertEqual(list(iterParents(self.root)), [])
+        parents = iterParents(self.broken_chain_item)
+        self.assertTrue(next(parents) is self.broken_chain_folder)
+        self.assertRaises(TypeError, next, parents)
+
+    def testIterParentsMemoized(self):
+        from zope.traversing import pathcache
+        from zope.traversing.api import getPath, iterParents
+        pathcache.enableCache()
+        getPath(self.item)
+        self.assertEqual(list(iterParents(self.item)),
+                         [self.folder, self.root])
+        self.assertEqual(list(iterParents(self.item)),
+                         [self.folder, self.root])
+
+    def testIsAncestor(self):
+        from zope.traversing.api import isAncestor
+        self.assertTrue(isAncestor(self.folder, self.item))
+        self.assertTrue(isAncestor(self.root, self.item))
+        self.assertFalse(isAncestor(self.item, self.item))
+        self.assertFalse(isAncestor(self.item, self.folder))
+        self.assertFalse(isAncestor(self.root, self.broken_chain_item))
+        self.assertTrue(isAncestor(_proxied(self.root)[0], self.item))
+
+    def testIsAncestorWithDepths(self):
+        from zope.traversing import pathcache
+        from zope.traversing.api import getPath, isAncestor
+        pathcache.enableCache()
+        other = contained(C('other'), self.root, name='other')
+        for ob in (self.root, self.folder, self.item, other):
+            getPath(ob)
+        self.assertTrue(isAncestor(self.folder, self.item))
+        self.assertTrue(isAncestor(self.root, self.item))
+        self.assertFalse(isAncestor(other, self.item))
+        self.assertFalse(isAncestor(self.item, self.folder))
+
+    def testCommonAncestor(self):
+        from zope.traversing.api import commonAncestor
+        other = contained(C('other'), self.folder, name='other')
+        self.assertTrue(commonAncestor(self.item, other) is self.folder)
+        self.assertTrue(commonAncestor(other, self.item) is self.folder)
+        self.assertTrue(commonAncestor(self.item, self.folder) is self.folder)
+        self.assertTrue(commonAncestor(self.root, self.item) is self.root)
+        self.assertTrue(commonAncestor(self.item, self.item) is self.item)
+        self.assertEqual(commonAncestor(self.item, C('stray')), None)
+
+        cycle = C('cycle')
+        cycle.__parent__ = cycle
+        self.assertEqual(commonAncestor(cycle, self.item), None)
+
+    def testCommonAncestorChains(self):
+        from zope.traversing.api import commonAncestorChains
+        other = contained(C('other'), self.folder, name='other')
+        self.assertEqual(commonAncestorChains(self.item, other),
+                         ([self.item, self.folder], [other]))
+        self.assertEqual(commonAncestorChains(self.root, self.item),
+                         ([self.root], [self.item, self.folder]))
+        self.assertEqual(commonAncestorChains(self.item, self.item),
+                         ([self.item], []))
+        self.assertEqual(commonAncestorChains(self.item, C('stray')), None)
+
+    def testRelativePath(self):
+        from zope.traversing.api import relativePath, traverse
+        other = contained(C('other'), self.root, name='other')
+        self.root.other = other
+        for ob, target, path in ((self.item, self.item, u'.'),
+                                 (self.folder, self.item, u'item'),
+                                 (self.item, self.folder, u'..'),
+                                 (self.item, self.root, u'../..'),
+                                 (self.item, other, u'../../other'),
+                                 (self.root, self.item, u'folder/item')):
+            self.assertEqual(relativePath(ob, target), path)
+            self.assertEqual(traverse(ob, path), target)
+        self.assertRaises(TypeError, relativePath, self.item, C('stray'))
+
     def testGetPath(self):
         from zope.traversing.api import getPath
         self.assertEqual(
@@ -184,6 +264,38 @@ class Test(PlacelessSetup, TestCase):
             u'/',
             )
 
+    def testGetPaths(self):
+        from zope.traversing.api import getPaths
+        other = contained(C('other'), self.folder, name='other')
+        objects = [self.item, other, self.folder, self.root, self.item]
+        paths = getPaths(iter(objects))
+        self.assertEqual(next(paths), u'/folder/item')
+        self.assertEqual(list(paths),
+                         [u'/folder/other', u'/folder', u'/', u'/folder/item'])
+
+    def testGetPathsWalksContainersOnce(self):
+        from zope.traversing.api import getPaths
+        seen = []
+
+        class Folder(C):
+            @property
+            def __parent__(self):
+                seen.append(self.name)
+                return root
+        root = self.root
+        folder = Folder('folder')
+        folder.__name__ = 'folder'
+        items = [contained(C(str(i)), folder, name=str(i)) for i in range(5)]
+        self.assertEqual(list(getPaths(items)),
+                         [u'/folder/%s' % i for i in range(5)])
+        self.assertEqual(seen, ['folder'])
+
+    def testGetPathsBrokenChain(self):
+        from zope.traversing.api import getPaths
+        paths = getPaths([self.item, self.broken_chain_item])
+        self.assertEqual(next(paths), u'/folder/item')
+        self.assertRaises(TypeError, next, paths)
+
     def testGetNameOfRoot(self):
         from zope.traversing.api import getName
         self.assertEqual(
@@ -344,6 +456,52 @@ class Test(PlacelessSetup, TestCase):
         args = ('foo', 'bar', '.', 'baz', 'bone')
         self.assertEqual(joinPath(path, *args), u'/foo/bar/baz/bone')
 
+    def test_joinPaths(self):
+        from zope.traversing.api import joinPath, joinPaths
+        from zope.traversing.path import Path, PathArray
+        paths = ['a', 'a/b', '../c', './d/.', '/e', 'f/', '', '..']
+        for base in ('/', '/x/y', 'x', '', 'x/..'):
+            expected = []
+            for path in paths:
+                try:
+                    expected.append(joinPath(base, path))
+                except (ValueError, IndexError) as error:
+                    expected.append(error.__class__)
+            result = joinPaths(base, paths)
+            self.assertEqual([r.__class__ if isinstance(r, Exception) else r
+                              for r in result], expected)
+        self.assertRaises(ValueError, joinPaths, '/', ['/a'],
+                          captureErrors=False)
+        self.assertRaises(ValueError, joinPaths, '/a/', ['b'])
+        self.assertEqual(joinPaths(Path('/a'), ['b', Path('c/..')]),
+                         [Path('/a/b'), Path('/a')])
+
+        result = joinPaths('/a', ['b', '/c', 'd'], compact=True)
+        self.assertTrue(isinstance(result, PathArray))
+        self.assertEqual(result[0], u'/a/b')
+        self.assertEqual(list(result.errors), [1])
+        self.assertEqual(result[2], u'/a/d')
+
+    def test_canonicalPaths(self):
+        from zope.traversing.api import canonicalPath, canonicalPaths
+        from zope.traversing.path import Path
+        paths = ['/', '/a/b', '/a/./b/..', 'a', '/a/', '', '/..', '//a',
+                 '/a.b/c..', Path('/a/../b'), self.item]
+        expected = []
+        for path in paths:
+            try:
+                expected.append(canonicalPath(path))
+            except (ValueError, IndexError) as error:
+                expected.append(error.__class__)
+        result = canonicalPaths(paths)
+        self.assertEqual([r.__class__ if isinstance(r, Exception) else r
+                          for r in result], expected)
+        result = canonicalPaths(paths, compact=True)
+        self.assertEqual(list(result)[:3], [u'/', u'/a/b', u'/a'])
+        self.assertEqual(sorted(result.errors), [3, 4, 5, 6, 7])
+        self.assertEqual(result[-1], u'/folder/item')
+        self.assertRaises(ValueError, canonicalPaths, ['a'],
+                          captureErrors=False)
 
 def test_suite():
     return makeSuite(Test)
@@ -14,11 +14,397 @@
 """Traversal Namespace Tests
 """
 import re
+import unittest
 from unittest import main
 from doctest import DocTestSuite
 from zope.component.testing import setUp, tearDown
 from zope.testing.renormalizing import RENormalizing
 
+import zope.component
+from zope.component.testing import PlacelessSetup
+from zope.interface import Interface, directlyProvides
+from zope.location.interfaces import LocationError
+from zope.publisher.browser import TestRequest
+from zope.publisher.interfaces.browser import IDefaultBrowserLayer
+
+from zope.traversing import namespace
+from zope.traversing.interfaces import ITraversable
+
+
+class NsParseTests(unittest.TestCase):
+
+    def tearDown(self):
+        namespace._parsed.clear()
+
+    def testSameAsPattern(self):
+        # nsParse agrees with the namespace pattern it used to be based on
+        for name in ['++ns++name', '++ns++', '++ns++a++b', '++n_s1++x',
+                     '++++x', '++++', '++', '+', '', '++ns+x', '++ns', 'x',
+                     '++n s++x', '+++ns++x', '++ns+++x', '++a+b++c', '@@',
+                     '@@x', '@@@x', '@x', '@++ns++x', '++@@x++y',
+                     '++\xe9++x', u'++ns++\xe9']:
+            match = namespace.namespace_pattern.match(name)
+            if name.startswith('@@'):
+                expected = ('view', name[2:])
+            elif match:
+                expected = match.group(1), name[len(match.group(0)):]
+            else:
+                expected = ('', name)
+            self.assertEqual(namespace.nsParse(name), expected)
+            self.assertEqual(namespace.nsParse(name), expected)
+
+    def testMemoBounded(self):
+        for i in range(namespace._PARSED_MAX + 10):
+            namespace.nsParse('++ns++%d' % i)
+        self.assertTrue(len(namespace._parsed) <= namespace._PARSED_MAX)
+        self.assertEqual(namespace.nsParse('++ns++1'), ('ns', '1'))
+
+
+
+class Handler(object):
+
+    def __init__(self, context, request=None):
+        self.context = context
+
+    def traverse(self, name, remaining):
+        return (self.__class__.__name__, name)
+
+
+class LayerHandler(Handler):
+    pass
+
+
+class ILayer(IDefaultBrowserLayer):
+    pass
+
+
+class HandlerCacheTests(PlacelessSetup, unittest.TestCase):
+
+    def cached(self):
+        registry = zope.component.getSiteManager().adapters
+        return registry._v_zope_traversing_namespaces[1]
+
+    def testCached(self):
+        zope.component.provideAdapter(Handler, (None,), ITraversable, 'ns')
+        ob = object()
+        self.assertEqual(namespace.namespaceLookup('ns', 'x', ob),
+                         ('Handler', 'x'))
+        self.assertRaises(LocationError, namespace.namespaceLookup,
+                          'other', 'x', ob)
+        # Namespaces without any handler are rejected before the cache
+        self.assertEqual(
+            self.cached(),
+            {(zope.interface.providedBy(ob), 'ns'): Handler})
+
+    def testRegistrationInvalidatesCache(self):
+        ob = object()
+        self.assertEqual(namespace.namespaceLookup('ns', 'x', ob, default=1),
+                         1)
+        zope.component.provideAdapter(Handler, (None,), ITraversable, 'ns')
+        self.assertEqual(namespace.namespaceLookup('ns', 'x', ob),
+                         ('Handler', 'x'))
+        zope.component.getGlobalSiteManager().unregisterAdapter(
+            Handler, (None,), ITraversable, 'ns')
+        self.assertEqual(namespace.namespaceLookup('ns', 'x', ob, default=1),
+                         1)
+
+    def testClassImplementsInvalidatesCache(self):
+        from zope.interface import classImplements
+
+        class IMarker(Interface):
+            pass
+
+        class D(object):
+            pass
+
+        zope.component.provideAdapter(Handler, (None,), ITraversable, 'ns')
+        zope.component.provideAdapter(LayerHandler, (IMarker,), ITraversable,
+                                      'ns')
+        ob = D()
+        self.assertEqual(namespace.namespaceLookup('ns', 'x', ob),
+                         ('Handler', 'x'))
+        classImplements(D, IMarker)
+        self.assertEqual(namespace.namespaceLookup('ns', 'x', ob),
+                         ('LayerHandler', 'x'))
+
+    def testLayers(self):
+        zope.component.provideAdapter(Handler, (None, IDefaultBrowserLayer),
+                                      ITraversable, 'ns')
+        zope.component.provideAdapter(LayerHandler, (None, ILayer),
+                                      ITraversable, 'ns')
+        ob = object()
+        request = TestRequest()
+        self.assertEqual(namespace.namespaceLookup('ns', 'x', ob, request),
+                         ('Handler', 'x'))
+        directlyProvides(request, ILayer)
+        self.assertEqual(namespace.namespaceLookup('ns', 'x', ob, request),
+                         ('LayerHandler', 'x'))
+
+
+class RegisteredNamespacesTests(PlacelessSetup, unittest.TestCase):
+
+    def testNames(self):
+        zope.component.provideAdapter(Handler, (None,), ITraversable, 'ns')
+        zope.component.provideAdapter(Handler, (None, IDefaultBrowserLayer),
+                                      ITraversable, 'view')
+        zope.component.provideAdapter(Handler, (None,), Interface, 'other')
+        self.assertEqual(namespace.registeredNamespaces(),
+                         frozenset(['ns', 'view']))
+
+        zope.component.provideAdapter(Handler, (None,), ITraversable, 'new')
+        self.assertTrue('new' in namespace.registeredNamespaces())
+
+    def testBases(self):
+        from zope.component.globalregistry import base
+        from zope.interface.registry import Components
+        zope.component.provideAdapter(Handler, (None,), ITraversable, 'ns')
+        local = Components('local', bases=(base,))
+        local.registerAdapter(LayerHandler, (None,), ITraversable, 'local')
+        self.assertEqual(namespace.registeredNamespaces(local.adapters),
+                         frozenset(['ns', 'local']))
+
+    def testUnknownRejected(self):
+        from zope.publisher.interfaces import NotFound
+        from zope.traversing.publicationtraverse import PublicationTraverser
+        zope.component.provideAdapter(Handler, (None, IDefaultBrowserLayer),
+                                      ITraversable, 'ns')
+        ob = object()
+        request = TestRequest()
+        self.assertRaises(LocationError, namespace.namespaceLookup,
+                          'bogus', 'x', ob, request)
+        self.assertEqual(
+            namespace.namespaceLookup('bogus', 'x', ob, request, default=1),
+            1)
+        traverser = PublicationTraverser()
+        self.assertRaises(NotFound, traverser.traverseName, request, ob,
+                          '++bogus++x')
+        self.assertEqual(traverser.traverseName(request, ob, '++ns++x'),
+                         ('Handler', 'x'))
+
+    def testWithoutAllRegistrations(self):
+        # zope.interface before 5.3 cannot list registrations, so no
+        # namespace is rejected early
+        from zope.component.hooks import setSite, setHooks, resetHooks
+        from zope.interface.adapter import AdapterRegistry
+        from zope.interface.registry import Components
+
+        class OldRegistry(AdapterRegistry):
+            allRegistrations = None
+
+        class OldComponents(Components):
+            def _init_registries(self):
+                Components._init_registries(self)
+                self.adapters = OldRegistry()
+
+        class Site(object):
+            def getSiteManager(self):
+                return components
+
+        components = OldComponents('old')
+        components.registerAdapter(Handler, (None,), ITraversable, 'ns')
+        self.assertEqual(
+            namespace.registeredNamespaces(components.adapters), None)
+        self.assertFalse(
+            namespace._unknownNamespace('bogus', components.adapters))
+
+        setHooks()
+        try:
+            setSite(Site())
+            ob = object()
+            self.assertEqual(namespace.namespaceLookup('ns', 'x', ob),
+                             ('Handler', 'x'))
+            self.assertRaises(LocationError, namespace.namespaceLookup,
+                              'bogus', 'x', ob)
+        finally:
+            setSite(None)
+            resetHooks()
+
+
+class Node(object):
+
+    def __init__(self, parent=None, **kw):
+        self.__parent__ = parent
+        self.__dict__.update(kw)
+
+
+class CountingTraversable(object):
+
+    looked = []
+
+    def __init__(self, context):
+        self.context = context
+
+    def traverse(self, name, remaining):
+        self.looked.append((self.context, name))
+        value = getattr(self.context, name, None)
+        if value is None:
+            raise LocationError(self.context, name)
+        return value
+
+
+class AcquireTests(PlacelessSetup, unittest.TestCase):
+
+    def setUp(self):
+        PlacelessSetup.setUp(self)
+        CountingTraversable.looked = self.looked = []
+        zope.component.provideAdapter(CountingTraversable, (Node,),
+                                      ITraversable)
+        self.root = Node(logo='logo')
+        self.folder = Node(self.root)
+        self.a = Node(self.folder)
+        self.b = Node(self.folder)
+
+    def testMemoizedPerRequest(self):
+        request = TestRequest()
+        self.assertEqual(namespace.acquire(self.a, request).traverse(
+            'logo', ()), 'logo')
+        self.assertEqual(len(self.looked), 3)
+        self.assertEqual(namespace.acquire(self.a, request).traverse(
+            'logo', ()), 'logo')
+        self.assertEqual(namespace.acquire(self.b, request).traverse(
+            'logo', ()), 'logo')
+        self.assertEqual(self.looked[3:], [(self.b, 'logo')])
+
+        # Another request starts afresh
+        namespace.acquire(self.a, TestRequest()).traverse('logo', ())
+        self.assertEqual(len(self.looked), 7)
+
+    def testNegativeResultsMemoized(self):
+        request = TestRequest()
+        self.assertRaises(LocationError,
+                          namespace.acquire(self.a, request).traverse,
+                          'missing', ())
+        self.assertEqual(
+            namespace.acquire(self.folder, request).queryTraverse(
+                'missing', (), 42), 42)
+        self.assertEqual(len(self.looked), 3)
+
+    def testNoMemoWithoutRequest(self):
+        namespace.acquire(self.a).traverse('logo', ())
+        namespace.acquire(self.a).traverse('logo', ())
+        self.assertEqual(len(self.looked), 6)
+
+    def testProxiedObjectsNotShared(self):
+        from zope.security.checker import ProxyFactory, NamesChecker
+        from zope.security.checker import defineChecker, undefineChecker
+        defineChecker(Node, NamesChecker(['__parent__', 'logo']))
+        try:
+            request = TestRequest()
+            namespace.acquire(self.a, request).traverse('logo', ())
+            namespace.acquire(ProxyFactory(self.a), request).traverse(
+                'logo', ())
+        finally:
+            undefineChecker(Node)
+        self.assertEqual(len(self.looked), 6)
+
+    def testTraversableExtendingPath(self):
+        # The same object is asked again until the depth is exceeded
+
+        class Extending(CountingTraversable):
+            def traverse(self, name, remaining):
+                self.looked.append((self.context, name))
+                remaining.append('more')
+                return self.context
+
+        zope.component.provideAdapter(Extending, (Node,), ITraversable)
+        self.assertRaises(namespace.ExcessiveDepth,
+                          namespace.acquire(self.a).traverse, 'a', ())
+        self.assertEqual(self.looked, [(self.a, 'a')] * 200)
+
+    def testMaxDepth(self):
+
+        class shallow(namespace.acquire):
+            maxDepth = 2
+
+        self.assertRaises(namespace.ExcessiveDepth,
+                          shallow(self.a, TestRequest()).traverse, 'logo', ())
+        self.assertEqual(shallow(self.folder, TestRequest()).traverse(
+            'logo', ()), 'logo')
+
+    def testMemoizedDepthCounted(self):
+        # Results memoized by a deeper search do not bypass the limit
+
+        class shallow(namespace.acquire):
+            maxDepth = 2
+
+        request = TestRequest()
+        self.assertEqual(namespace.acquire(self.a, request).traverse(
+            'logo', ()), 'logo')
+        self.assertRaises(namespace.ExcessiveDepth,
+                          shallow(self.a, request).traverse, 'logo', ())
+        self.assertEqual(shallow(self.folder, request).traverse(
+            'logo', ()), 'logo')
+        self.assertEqual(len(self.looked), 3)
+
+        # Memoized failures count as well
+        self.assertEqual(namespace.acquire(self.a, request).queryTraverse(
+            'missing', (), 42), 42)
+        self.assertRaises(namespace.ExcessiveDepth,
+                          shallow(self.a, request).traverse, 'missing', ())
+        self.assertEqual(shallow(self.folder, request).queryTraverse(
+            'missing', (), 42), 42)
+
+    def testSetAcquireDepth(self):
+        self.assertEqual(namespace.setAcquireDepth(2), 200)
+        try:
+            self.assertRaises(namespace.ExcessiveDepth,
+                              namespace.acquire(self.a).traverse, 'logo', ())
+            self.assertEqual(
+                namespace.acquire(self.folder).traverse('logo', ()), 'logo')
+        finally:
+            self.assertEqual(namespace.setAcquireDepth(200), 2)
+        self.assertEqual(namespace.acquire(self.a).traverse('logo', ()),
+                         'logo')
+
+
+class EtcTests(PlacelessSetup, unittest.TestCase):
+
+    def testUtilities(self):
+        from zope.traversing.interfaces import IEtcNamespace
+        ob = Node()
+        self.assertEqual(namespace.etc(ob).queryTraverse('tools', (), 1), 1)
+
+        tools = Node()
+        zope.component.provideUtility(tools, IEtcNamespace, 'tools')
+        self.assertTrue(namespace.etc(ob).traverse('tools', ()) is tools)
+        self.assertTrue(namespace.etc(ob).traverse('tools', ()) is tools)
+
+        zope.component.getGlobalSiteManager().unregisterUtility(
+            tools, IEtcNamespace, 'tools')
+        self.assertRaises(LocationError, namespace.etc(ob).traverse,
+                          'tools', ())
+
+    def testSite(self):
+        sm = object()
+        site = Node(getSiteManager=lambda: sm)
+        self.assertTrue(namespace.etc(site).traverse('site', ()) is sm)
+        site.getSiteManager = lambda: site
+        self.assertTrue(namespace.etc(site).traverse('site', ()) is site)
+        self.assertRaises(LocationError, namespace.etc(Node()).traverse,
+                          'site', ())
+
+    def testPerSiteManager(self):
+        from zope.component.globalregistry import base
+        from zope.component.hooks import setSite, setHooks, resetHooks
+        from zope.interface.registry import Components
+        from zope.traversing.interfaces import IEtcNamespace
+
+        glob, loc = Node(), Node()
+        zope.component.provideUtility(glob, IEtcNamespace, 'tools')
+        local = Components('local', bases=(base,))
+        site = Node(getSiteManager=lambda: local)
+        ob = Node()
+        setHooks()
+        try:
+            setSite(site)
+            self.assertTrue(namespace.etc(ob).traverse('tools', ()) is glob)
+            local.registerUtility(loc, IEtcNamespace, 'tools')
+            self.assertTrue(namespace.etc(ob).traverse('tools', ()) is loc)
+            setSite(None)
+            self.assertTrue(namespace.etc(ob).traverse('tools', ()) is glob)
+        finally:
+            setSite(None)
+            resetHooks()
 
 
 def test_suite():
@@ -28,9 +414,16 @@ def test_suite():
          "LocationError"),
     ])
 
-    return DocTestSuite('zope.traversing.namespace',
-                        setUp=setUp, tearDown=tearDown,
-                        checker=checker)
+    return unittest.TestSuite((
+        DocTestSuite('zope.traversing.namespace',
+                     setUp=setUp, tearDown=tearDown,
+                     checker=checker),
+        unittest.makeSuite(NsParseTests),
+        unittest.makeSuite(HandlerCacheTests),
+        unittest.makeSuite(RegisteredNamespacesTests),
+        unittest.makeSuite(AcquireTests),
+        unittest.makeSuite(EtcTests),
+        ))
 
 if __name__ == '__main__':
     main(defaultTest='test_suite')
@@ -0,0 +1,133 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Path value tests.
+"""
+import doctest
+import pickle
+import unittest
+
+import zope.component
+from zope.component.testing import PlacelessSetup
+from zope.interface import directlyProvides
+from zope.location.traversing import RootPhysicallyLocatable
+from zope.location.interfaces import ILocationInfo, IRoot
+
+from zope.traversing.adapters import DefaultTraversable, Traverser
+from zope.traversing.interfaces import ITraversable, ITraverser
+from zope.traversing.path import Path
+from zope.traversing.testing import contained, Contained
+
+
+class C(Contained):
+    pass
+
+
+class PathTests(unittest.TestCase):
+
+    def testConstruction(self):
+        self.assertEqual(Path(), ())
+        self.assertEqual(Path(''), ())
+        self.assertEqual(Path('/'), ('',))
+        self.assertEqual(Path('a/b/'), ('a', 'b'))
+        self.assertTrue(Path(['', 'a']) is Path('/a'))
+        p = Path('a')
+        self.assertTrue(Path(p) is p)
+        self.assertEqual(hash(Path('/a/b')), hash(('', 'a', 'b')))
+
+    def testString(self):
+        for path in ('', '/', '/a', '/a/b', 'a', 'a/b'):
+            self.assertEqual(str(Path(path)), path)
+        self.assertEqual(repr(Path('a')), "Path('a')")
+        self.assertEqual(str(Path('/a').join(u'\xe9')), u'/a/\xe9')
+
+    def testAbsolute(self):
+        self.assertFalse(Path().absolute)
+        self.assertFalse(Path('a').absolute)
+        self.assertTrue(Path('/').absolute)
+
+    def testJoin(self):
+        self.assertEqual(str(Path('/').join('a', Path('b/c'))), '/a/b/c')
+        self.assertEqual(str(Path('a').join('..', '..', 'b')), '../b')
+        self.assertEqual(Path('/a').join(), Path('/a'))
+        self.assertRaises(ValueError, Path('/a').join, '/b')
+        self.assertRaises(ValueError, Path('/').join, '..')
+
+    def testParent(self):
+        self.assertEqual(Path('/a/b').parent(), Path('/a'))
+        self.assertEqual(Path('/a').parent(), Path('/'))
+        self.assertEqual(Path('a').parent(), Path())
+        self.assertRaises(ValueError, Path('/').parent)
+        self.assertRaises(ValueError, Path().parent)
+
+    def testNormalize(self):
+        p = Path('/a/b')
+        self.assertTrue(p.normalize() is p)
+        self.assertEqual(str(Path('./a/../../b/.').normalize()), '../b')
+        self.assertRaises(ValueError, Path('/a/../..').normalize)
+        self.assertRaises(ValueError, Path('/a//b').normalize)
+
+    def testStartswithAndRelativeTo(self):
+        p = Path('/a/b/c')
+        self.assertTrue(p.startswith('/'))
+        self.assertTrue(p.startswith(p))
+        self.assertFalse(p.startswith('a'))
+        self.assertFalse(p.startswith('/a/bc'))
+        self.assertEqual(p.relativeTo('/a'), Path('b/c'))
+        self.assertEqual(p.relativeTo(p), Path())
+        self.assertRaises(ValueError, p.relativeTo, '/b')
+
+    def testPickle(self):
+        p = Path('/a/b')
+        self.assertEqual(pickle.loads(pickle.dumps(p)), p)
+        self.assertTrue(isinstance(pickle.loads(pickle.dumps(p)), Path))
+
+
+class PathTraversalTests(PlacelessSetup, unittest.TestCase):
+
+    def setUp(self):
+        PlacelessSetup.setUp(self)
+        zope.component.provideAdapter(Traverser, (None,), ITraverser)
+        zope.component.provideAdapter(DefaultTraversable, (None,),
+                                      ITraversable)
+        zope.component.provideAdapter(RootPhysicallyLocatable,
+                                      (IRoot,), ILocationInfo)
+        self.root = root = C()
+        directlyProvides(root, IRoot)
+        root.a = contained(C(), root, 'a')
+        root.a.b = contained(C(), root.a, 'b')
+
+    def testTraverse(self):
+        from zope.traversing.api import traverse
+        self.assertTrue(traverse(self.root, Path('a/b')) is self.root.a.b)
+        self.assertTrue(Traverser(self.root).traverse(Path('/a'))
+                        is self.root.a)
+        self.assertTrue(traverse(self.root, Path()) is self.root)
+
+    def testApi(self):
+        from zope.traversing.api import canonicalPath, joinPath
+        self.assertEqual(joinPath(Path('/a'), 'b', '../c'), Path('/a/c'))
+        self.assertEqual(joinPath(u'/a', Path('b')), u'/a/b')
+        self.assertEqual(canonicalPath(Path('/a/./b/..')), Path('/a'))
+        self.assertRaises(ValueError, canonicalPath, Path('a'))
+
+
+def test_suite():
+    return unittest.TestSuite((
+        unittest.makeSuite(PathTests),
+        unittest.makeSuite(PathTraversalTests),
+        doctest.DocTestSuite('zope.traversing.path'),
+        ))
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
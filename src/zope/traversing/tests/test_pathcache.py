@@ -0,0 +1,153 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Path cache tests.
+"""
+import unittest
+
+from zope.security.checker import ProxyFactory, NamesChecker
+from zope.security.proxy import removeSecurityProxy
+
+from zope.traversing import pathcache
+from zope.traversing.api import canonicalPath, getParents, getPath
+from zope.traversing.testing import LocationSetup, MovedEvent, moveObject
+
+
+class PathCacheTests(LocationSetup, unittest.TestCase):
+
+    def setUp(self):
+        LocationSetup.setUp(self)
+        pathcache.enableCache(100)
+
+    def move(self, ob, parent, name):
+        moveObject(ob, parent, name, pathcache.objectMoved)
+
+    def testMemoized(self):
+        self.assertEqual(getPath(self.c), '/a/b/c')
+        self.assertEqual(getPath(self.c), '/a/b/c')
+        self.assertEqual(canonicalPath(self.c), '/a/b/c')
+        self.assertEqual(len(self.paths), 1)
+        self.assertEqual(getParents(self.c), [self.b, self.a, self.root])
+        self.assertEqual(getParents(self.c), [self.b, self.a, self.root])
+        self.assertEqual(len(self.paths), 1)
+
+    def testDisabled(self):
+        pathcache.disableCache()
+        self.assertEqual(getPath(self.c), '/a/b/c')
+        self.assertEqual(getPath(self.c), '/a/b/c')
+        self.assertEqual(len(self.paths), 2)
+        pathcache.invalidate(self.c)
+
+    def testMoveInvalidatesSubtree(self):
+        for ob in (self.a, self.b, self.c, self.other):
+            getPath(ob)
+        self.move(self.b, self.other, 'b2')
+        self.assertEqual(getPath(self.c), '/other/b2/c')
+        self.assertEqual(getParents(self.c),
+                         [self.b, self.other, self.root])
+        self.assertEqual(getPath(self.b), '/other/b2')
+        self.assertEqual(getPath(self.a), '/a')
+        self.assertEqual(sorted(pathcache.cache.keys()),
+                         sorted(map(id, (self.a, self.b, self.c,
+                                         self.other))))
+
+    def testMoveOfUncachedAncestor(self):
+        getPath(self.c)
+        pathcache.cache.pop(id(self.a))
+        self.move(self.a, self.other, 'a')
+        self.assertEqual(getPath(self.c), '/other/a/b/c')
+
+    def testRemoveAndAdd(self):
+        getPath(self.c)
+        self.move(self.b, None, None)
+        self.assertTrue(id(self.c) not in pathcache.cache)
+        self.assertRaises(TypeError, getPath, self.c)
+        getPath(self.a)
+        self.b.__parent__, self.b.__name__ = self.root, 'b'
+        pathcache.objectMoved(self.b, MovedEvent(self.b, None, None,
+                                                 self.root, 'b'))
+        self.assertEqual(getPath(self.c), '/b/c')
+
+    def treeEntries(self):
+        # The paths in the tree of memoized paths, with their entry counts
+        result = {}
+        nodes = [('', pathcache._tree)]
+        while nodes:
+            path, node = nodes.pop()
+            if node[0] or not node[1]:
+                result[path or '/'] = len(node[0])
+            for name, child in node[1].items():
+                nodes.append((path + '/' + name, child))
+        return result
+
+    def testMoveVisitsSubtreeOnly(self):
+        for ob in (self.a, self.b, self.c, self.other):
+            getPath(ob)
+
+        def items():
+            raise AssertionError('whole cache scanned')
+        pathcache.cache.items = items
+        self.move(self.b, self.other, 'b2')
+        self.assertEqual(self.treeEntries(), {'/a': 1, '/other': 1})
+        self.assertEqual(getPath(self.c), '/other/b2/c')
+        self.assertEqual(self.treeEntries(),
+                         {'/a': 1, '/other': 1, '/other/b2/c': 1})
+
+    def testEvictionPrunesTree(self):
+        pathcache.enableCache(2)
+        for ob in (self.c, self.b, self.other):
+            getPath(ob)
+        self.assertEqual(self.treeEntries(), {'/a/b': 1, '/other': 1})
+        getPath(self.root)
+        self.assertEqual(self.treeEntries(), {'/': 1, '/other': 1})
+        self.move(self.other, None, None)
+        self.assertEqual(self.treeEntries(), {'/': 1})
+
+    def testIdReused(self):
+        getPath(self.c)
+        entry = pathcache.cache.get(id(self.c))
+        entry[0] = lambda: None
+        self.assertEqual(getPath(self.c), '/a/b/c')
+        self.assertEqual(self.treeEntries(), {'/a/b/c': 1})
+
+    def testProxies(self):
+        checker = NamesChecker(['__parent__', '__name__'])
+        proxy = ProxyFactory(self.c, checker)
+        self.assertEqual(getPath(proxy), '/a/b/c')
+        self.assertEqual(getPath(self.c), '/a/b/c')
+        self.assertEqual(len(self.paths), 1)
+        parents = getParents(proxy)
+        self.assertTrue(parents[0] is not self.b)
+        self.assertTrue(removeSecurityProxy(parents[0]) is self.b)
+        self.assertTrue(getParents(self.c)[0] is self.b)
+
+    def testNotWeaklyReferenceable(self):
+        import weakref
+
+        class Slotted(object):
+            __slots__ = ('__parent__', '__name__')
+        ob = Slotted()
+        ob.__parent__, ob.__name__ = self.a, 'slotted'
+        self.assertRaises(TypeError, weakref.ref, ob)
+        self.assertEqual(getPath(ob), '/a/slotted')
+        self.assertEqual(getPath(ob), '/a/slotted')
+        self.assertEqual(len(self.paths), 1)
+
+
+def test_suite():
+    return unittest.TestSuite((
+        unittest.makeSuite(PathCacheTests),
+        ))
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,218 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Path index tests.
+"""
+import gc
+import unittest
+
+import zope.component
+from zope.interface import directlyProvides
+from zope.interface.verify import verifyObject
+from zope.location.interfaces import IRoot, LocationError
+from zope.security.checker import defineChecker, NamesChecker, ProxyFactory
+
+from zope.traversing import pathindex
+from zope.traversing.adapters import DefaultTraversable, Traverser
+from zope.traversing.interfaces import IPathIndex, ITraversable
+from zope.traversing.testing import contained, Location, LocationSetup
+from zope.traversing.testing import MovedEvent, moveObject
+
+
+class CountingTraversable(DefaultTraversable):
+
+    traversed = []
+
+    def traverse(self, name, furtherPath):
+        self.traversed.append(name)
+        return DefaultTraversable.traverse(self, name, furtherPath)
+
+
+class PathIndexTests(LocationSetup, unittest.TestCase):
+
+    def setUp(self):
+        LocationSetup.setUp(self)
+        CountingTraversable.traversed = self.traversed = []
+        zope.component.provideAdapter(CountingTraversable, (None,),
+                                      ITraversable)
+        self.index = pathindex.PathIndex()
+        pathindex.setPathIndex(self.index)
+
+    def move(self, ob, parent, name):
+        moveObject(ob, parent, name, pathindex.objectMoved)
+
+    def testInterface(self):
+        self.assertTrue(verifyObject(IPathIndex, self.index))
+        self.assertTrue(pathindex.getPathIndex() is self.index)
+
+    def testRememberedAfterTraversal(self):
+        tr = Traverser(self.root.other)
+        c = self.root.a.b.c
+        self.assertTrue(tr.traverse('/a/b/c') is c)
+        self.assertEqual(self.traversed, ['a', 'b', 'c'])
+        self.assertTrue(tr.traverse('/a/b/c') is c)
+        self.assertTrue(tr.traverse(('', 'a', 'b', 'c')) is c)
+        self.assertEqual(self.traversed, ['a', 'b', 'c'])
+
+        # Relative paths and paths with namespaces or dots are traversed
+        self.assertTrue(tr.traverse('../a/b/c') is c)
+        self.assertTrue(tr.traverse('/a/./b/c') is c)
+        self.assertEqual(len(self.traversed), 9)
+
+    def testNotLocated(self):
+        tr = Traverser(self.root)
+        self.root.a.b.c.__name__ = 'x'
+        tr.traverse('/a/b/c')
+        tr.traverse('/a/b/c')
+        self.assertEqual(self.traversed, ['a', 'b', 'c'] * 2)
+
+    def testVerifiedOnHit(self):
+        tr = Traverser(self.root)
+        c = self.root.a.b.c
+        tr.traverse('/a/b/c')
+        # Moved without an event
+        c.__parent__ = self.root.other
+        self.root.other.c = c
+        del self.root.a.b.c
+        del self.traversed[:]
+        self.assertRaises(LocationError, tr.traverse, '/a/b/c')
+        self.assertEqual(tr.traverse('/a/b/c', 42), 42)
+
+    def testMoveEvents(self):
+        tr = Traverser(self.root)
+        c = self.root.a.b.c
+        tr.traverse('/a/b/c')
+        self.move(self.root.a.b, self.root.other, 'b2')
+        del self.traversed[:]
+        self.assertTrue(tr.traverse('/other/b2/c') is c)
+        self.assertTrue(tr.traverse('/other/b2') is self.root.other.b2)
+        self.assertEqual(self.traversed, [])
+        self.assertEqual(tr.traverse('/a/b/c', None), None)
+
+        self.move(c, None, None)
+        self.assertEqual(self.index.lookup(self.root, ('other', 'b2', 'c')),
+                         None)
+
+        new = Location()
+        new.__parent__, new.__name__ = self.root.a, 'new'
+        self.root.a.new = new
+        pathindex.objectMoved(new, MovedEvent(new, None, None,
+                                                   self.root.a, 'new'))
+        del self.traversed[:]
+        self.assertTrue(tr.traverse('/a/new') is new)
+        self.assertEqual(self.traversed, [])
+
+    def testEventForSublocations(self):
+        tr = Traverser(self.root)
+        tr.traverse('/a/b/c')
+        moveObject(self.b, self.other, 'b', pathindex.objectMoved,
+                   sublocations=(self.c,))
+        del self.traversed[:]
+        self.assertTrue(tr.traverse('/other/b/c') is self.c)
+        self.assertEqual(self.traversed, [])
+        self.assertEqual(self.index.lookup(self.root, ('a', 'b', 'c')), None)
+        self.assertEqual(self.index.lookup(self.root, ('other', 'c')), None)
+
+    def testOtherRoot(self):
+        tr = Traverser(self.root)
+        tr.traverse('/a/b')
+        root2 = Location()
+        directlyProvides(root2, IRoot)
+        root2.a = contained(Location(), root2, 'a')
+        root2.a.b = contained(Location(), root2.a, 'b')
+        self.assertTrue(Traverser(root2).traverse('/a/b') is root2.a.b)
+
+    def testRootsKeptApart(self):
+        root2 = Location()
+        directlyProvides(root2, IRoot)
+        root2.a = contained(Location(), root2, 'a')
+        Traverser(self.root).traverse('/a')
+        Traverser(root2).traverse('/a')
+        self.assertTrue(self.index.lookup(self.root, ('a',)) is self.root.a)
+        self.assertTrue(self.index.lookup(root2, ('a',)) is root2.a)
+        self.assertEqual(len(self.index._trees), 2)
+
+        # Moving to another root
+        self.move(self.root.a, root2, 'moved')
+        self.assertTrue(self.index.lookup(root2, ('moved',)) is root2.moved)
+        self.assertEqual(self.index.lookup(self.root, ('a',)), None)
+
+    def testDeadObjectsRemoved(self):
+        tr = Traverser(self.root)
+        tr.traverse('/a/b/c')
+        tr.traverse('/other')
+        b = self.root.a.b
+        del self.root.a.b, b.c, self.b, self.c
+        del b
+        gc.collect()
+        # The next change of the index removes the nodes
+        self.assertTrue(self.index._node(self.root, ('a', 'b', 'c'))
+                        is not None)
+        tr.traverse('/a')
+        self.assertEqual(self.index._node(self.root, ('a', 'b')), None)
+        self.assertEqual(sorted(self.index._top(self.root)[1]),
+                         ['a', 'other'])
+
+    def testDeadRootRemoved(self):
+        root2 = Location()
+        directlyProvides(root2, IRoot)
+        root2.a = contained(Location(), root2, 'a')
+        Traverser(root2).traverse('/a')
+        self.assertEqual(len(self.index._trees), 1)
+        del root2
+        gc.collect()
+        Traverser(self.root).traverse('/a')
+        self.assertEqual(list(self.index._trees), [id(self.root)])
+
+    def testMovePrunesEmptyNodes(self):
+        Traverser(self.root).traverse('/a/b/c')
+        a = self.root.a
+        self.index._node(self.root, ('a',))[0] = None
+        self.move(a.b, self.root.other, 'b')
+        # Nothing is known at or below /a anymore
+        self.assertEqual(self.index._node(self.root, ('a',)), None)
+        self.move(self.root.other.b, None, None)
+        self.assertEqual(self.index._node(self.root, ('other',)), None)
+
+    def testSecurityProxies(self):
+        tr = Traverser(self.root)
+        tr.traverse('/a/b')
+        del self.traversed[:]
+        defineChecker(Location, NamesChecker(['__parent__', '__name__', 'a', 'b']))
+        proxy = ProxyFactory(self.root)
+        found = Traverser(proxy).traverse('/a/b')
+        self.assertTrue(found is not self.root.a.b)
+        self.assertEqual(self.traversed, ['a', 'b'])
+
+    def testDisabled(self):
+        pathindex.setPathIndex(None)
+        tr = Traverser(self.root)
+        tr.traverse('/a')
+        tr.traverse('/a')
+        self.assertEqual(self.traversed, ['a', 'a'])
+        a = self.root.a
+        pathindex.objectMoved(a, MovedEvent(a, None, None, None, None))
+
+    def testClear(self):
+        Traverser(self.root).traverse('/a')
+        self.index.clear()
+        self.assertEqual(self.index.lookup(self.root, ('a',)), None)
+
+
+def test_suite():
+    return unittest.TestSuite((
+        unittest.makeSuite(PathIndexTests),
+        ))
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,181 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Compiled path plan tests.
+"""
+import doctest
+import unittest
+
+import zope.component
+from zope.component.testing import PlacelessSetup
+from zope.interface import directlyProvides
+from zope.location.traversing \
+    import LocationPhysicallyLocatable, RootPhysicallyLocatable
+from zope.location.interfaces import ILocationInfo, IRoot, LocationError
+
+from zope.traversing.adapters import Traverser, DefaultTraversable
+from zope.traversing.interfaces import ITraversable, ITraverser
+from zope.traversing.plan import compilePath, PathPlan
+from zope.traversing.testing import contained, Contained
+
+
+class C(Contained):
+    def __init__(self, name):
+        self.name = name
+
+
+class Redirect(object):
+    """Traversable that prepends segments to the remaining path"""
+
+    def __init__(self, context):
+        self.context = context
+
+    def traverse(self, name, furtherPath):
+        if name == 'redirect':
+            furtherPath.append('item')
+            furtherPath.append('folder')
+            return self.context
+        return DefaultTraversable(self.context).traverse(name, furtherPath)
+
+
+class PlanTraversalTests(PlacelessSetup, unittest.TestCase):
+
+    def setUp(self):
+        PlacelessSetup.setUp(self)
+        zope.component.provideAdapter(Traverser, (None,), ITraverser)
+        zope.component.provideAdapter(DefaultTraversable, (None,),
+                                      ITraversable)
+        zope.component.provideAdapter(LocationPhysicallyLocatable, (None,),
+                                      ILocationInfo)
+        zope.component.provideAdapter(RootPhysicallyLocatable,
+                                      (IRoot,), ILocationInfo)
+
+        self.root = root = C('root')
+        directlyProvides(root, IRoot)
+        self.folder = folder = contained(C('folder'), root, 'folder')
+        self.item = item = contained(C('item'), folder, 'item')
+        root.folder = folder
+        folder.item = item
+
+    def testPlanIsSequenceOfSegments(self):
+        plan = compilePath(u'/folder/item')
+        self.assertTrue(isinstance(plan, PathPlan))
+        self.assertEqual(len(plan), 3)
+        self.assertEqual(list(plan), [u'', u'folder', u'item'])
+
+    def testListsAreNotCached(self):
+        path = ['folder', 'item']
+        self.assertTrue(compilePath(path) is not compilePath(path))
+
+    def testTraversePlan(self):
+        from zope.traversing.api import compilePath, traverse
+        plan = compilePath('/folder/../folder/./item')
+        self.assertTrue(traverse(self.item, plan) is self.item)
+        self.assertTrue(traverse(self.folder, compilePath('item'))
+                        is self.item)
+        self.assertTrue(Traverser(self.item).traverse(plan) is self.item)
+
+    def testTraversePlanDefault(self):
+        from zope.traversing.api import compilePath, traverse
+        plan = compilePath('folder/missing')
+        self.assertEqual(traverse(self.root, plan, None), None)
+        self.assertRaises(LocationError, traverse, self.root, plan)
+
+    def testRootPlan(self):
+        from zope.traversing.api import traverse
+        self.assertTrue(traverse(self.item, '/') is self.root)
+
+    def testFurtherPathChangedByTraversable(self):
+        zope.component.provideAdapter(Redirect, (IRoot,), ITraversable)
+        # The plan must not get out of step with the remaining path.
+        tr = Traverser(self.root)
+        self.assertTrue(tr.traverse('redirect/..') is self.folder)
+
+    def testPlanOfCustomTraverser(self):
+        # PathPlans can be handed to any ITraverser accepting sequences
+        seen = []
+
+        class Custom(object):
+            def __init__(self, context):
+                pass
+
+            def traverse(self, path, default=None, request=None):
+                seen.append(list(path))
+                return 42
+
+        zope.component.provideAdapter(Custom, (C,), ITraverser)
+        from zope.traversing.api import compilePath, traverse
+        self.assertEqual(traverse(self.root, compilePath('/a/b')), 42)
+        self.assertEqual(seen, [['', 'a', 'b']])
+
+
+class LRUCacheTests(unittest.TestCase):
+
+    def testOrder(self):
+        from zope.traversing._cache import LRUCache
+        cache = LRUCache(3)
+        for key in 'abc':
+            cache[key] = key.upper()
+        self.assertEqual(cache.get('a'), 'A')
+        cache['b'] = 'BB'
+        cache['d'] = 'D'
+        self.assertEqual(cache.items(), [('a', 'A'), ('b', 'BB'), ('d', 'D')])
+        self.assertEqual(cache.pop('a'), 'A')
+        self.assertEqual(cache.pop('a', 42), 42)
+        self.assertEqual(cache.keys(), ['b', 'd'])
+        self.assertFalse('a' in cache)
+        cache.clear()
+        self.assertEqual((len(cache), cache.items()), (0, []))
+
+    def testDiscarded(self):
+        from zope.traversing._cache import LRUCache
+        discarded = []
+        cache = LRUCache(2, lambda key, value: discarded.append((key, value)))
+        for key in 'abc':
+            cache[key] = key.upper()
+        cache.pop('b')
+        cache['d'] = 'D'
+        self.assertEqual(discarded, [('a', 'A')])
+        cache['e'] = 'E'
+        self.assertEqual(discarded, [('a', 'A'), ('c', 'C')])
+
+    def testThreads(self):
+        import threading
+        from zope.traversing._cache import LRUCache
+        cache = LRUCache(10)
+
+        def use(offset):
+            for i in range(2000):
+                cache[(i + offset) % 15] = i
+                cache.get((i + offset + 7) % 15)
+                cache.pop((i + offset + 3) % 15)
+
+        threads = [threading.Thread(target=use, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(len(cache) <= 10)
+        self.assertEqual(len(cache.items()), len(cache))
+
+
+def test_suite():
+    return unittest.TestSuite((
+        unittest.makeSuite(PlanTraversalTests),
+        unittest.makeSuite(LRUCacheTests),
+        doctest.DocTestSuite('zope.traversing.plan'),
+        doctest.DocTestSuite('zope.traversing._cache'),
+        ))
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,143 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Location scope tests.
+"""
+import doctest
+import unittest
+
+import transaction
+from zope.publisher.browser import TestRequest
+from zope.publisher.interfaces import EndRequestEvent
+
+from zope.traversing import scope
+from zope.traversing.api import getName, getParent, getPath, getRoot
+from zope.traversing.testing import LocationSetup, moveObject
+
+
+class LocationScopeTests(LocationSetup, unittest.TestCase):
+
+    def tearDown(self):
+        transaction.abort()
+        LocationSetup.tearDown(self)
+
+    def lookups(self):
+        return (getRoot(self.b), getPath(self.b), getName(self.b),
+                getParent(self.b))
+
+    def testMemoized(self):
+        expected = (self.root, '/a/b', 'b', self.a)
+        self.assertEqual(self.lookups(), expected)
+        self.assertEqual(len(self.created), 4)
+        del self.created[:]
+
+        with scope.LocationScope():
+            self.assertEqual(self.lookups(), expected)
+            self.assertEqual(self.lookups(), expected)
+        self.assertEqual(self.created, [self.b])
+
+    def testClosedOnExit(self):
+        with scope.LocationScope() as s:
+            getPath(self.b)
+        self.assertEqual(s._entries, {})
+        with s:
+            getPath(self.b)
+            with s:
+                getPath(self.b)
+            self.assertNotEqual(s._entries, {})
+        self.assertEqual(self.created, [self.b, self.b])
+
+    def testNesting(self):
+        with scope.LocationScope() as outer:
+            with scope.LocationScope() as inner:
+                self.assertTrue(scope.current() is inner)
+                getPath(self.b)
+            self.assertTrue(scope.current() is outer)
+            getPath(self.b)
+        self.assertTrue(scope.current() is None)
+        self.assertEqual(self.created, [self.b, self.b])
+
+    def testRoot(self):
+        with scope.LocationScope():
+            self.assertTrue(getParent(self.root) is None)
+            self.assertEqual(getPath(self.root), '/')
+
+    def move(self, ob, parent, name):
+        moveObject(ob, parent, name, scope.objectMoved)
+
+    def testMoveInvalidates(self):
+        other = self.other
+        with scope.LocationScope() as outer:
+            self.assertEqual(getPath(self.b), '/a/b')
+            self.assertEqual(getPath(other), '/other')
+            with scope.LocationScope():
+                self.assertEqual(getPath(self.b), '/a/b')
+                self.move(self.a, other, 'a')
+                self.assertEqual(getPath(self.b), '/other/a/b')
+            self.assertEqual(getPath(self.b), '/other/a/b')
+            self.assertEqual(getPath(self.a), '/other/a')
+            # Objects elsewhere stay memoized
+            self.assertTrue(outer._entries[id(other)][3] == '/other')
+
+    def testRemoveInvalidatesRoot(self):
+        with scope.LocationScope():
+            self.assertTrue(getRoot(self.b) is self.root)
+            self.move(self.a, None, None)
+            self.assertRaises(TypeError, getRoot, self.b)
+
+    def testMoveWithoutScope(self):
+        self.move(self.a, None, None)
+
+    def testRequestScope(self):
+        request = TestRequest()
+        s = scope.requestScope(request)
+        self.assertTrue(scope.requestScope(request) is s)
+        with s:
+            getPath(self.b)
+        with s:
+            getPath(self.b)
+        self.assertEqual(self.created, [self.b])
+
+        scope.endRequest(EndRequestEvent(None, request))
+        self.assertEqual(s._entries, {})
+        self.assertFalse(scope.requestScope(request) is s)
+
+    def testTransactionScope(self):
+        s = scope.transactionScope()
+        self.assertTrue(scope.transactionScope(transaction.get()) is s)
+        with s:
+            getPath(self.b)
+        with s:
+            getPath(self.b)
+        self.assertEqual(self.created, [self.b])
+
+        transaction.commit()
+        self.assertEqual(s._entries, {})
+        self.assertFalse(scope.transactionScope() is s)
+
+    def testTransactionScopeAbort(self):
+        s = scope.transactionScope()
+        with s:
+            getPath(self.b)
+        transaction.abort()
+        self.assertEqual(s._entries, {})
+
+
+def test_suite():
+    return unittest.TestSuite((
+        unittest.makeSuite(LocationScopeTests),
+        doctest.DocTestSuite('zope.traversing.scope'),
+        ))
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,134 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Traversal tracing tests.
+"""
+import doctest
+import unittest
+
+import zope.component
+from zope.component.testing import PlacelessSetup
+from zope.interface import directlyProvides, Interface
+from zope.location.traversing \
+    import LocationPhysicallyLocatable, RootPhysicallyLocatable
+from zope.location.interfaces import ILocationInfo, IRoot, LocationError
+from zope.publisher.browser import TestRequest
+from zope.publisher.interfaces import IPublishTraverse
+
+from zope.traversing.adapters import DefaultTraversable, Traverser
+from zope.traversing.interfaces import ITraversable
+from zope.traversing.namespace import attr
+from zope.traversing.testing import contained, Contained
+from zope.traversing.tracing import getTrace, setTracer, TraceCollector
+
+
+class C(Contained):
+    def __init__(self, name):
+        self.name = name
+
+
+class PublishTraverse(object):
+
+    def __init__(self, context, request):
+        self.context = context
+
+    def publishTraverse(self, request, name):
+        return getattr(self.context, name)
+
+
+class TracingTests(PlacelessSetup, unittest.TestCase):
+
+    def setUp(self):
+        PlacelessSetup.setUp(self)
+        zope.component.provideAdapter(DefaultTraversable, (None,),
+                                      ITraversable)
+        zope.component.provideAdapter(LocationPhysicallyLocatable, (None,),
+                                      ILocationInfo)
+        zope.component.provideAdapter(RootPhysicallyLocatable,
+                                      (IRoot,), ILocationInfo)
+        zope.component.provideAdapter(attr, (None,), ITraversable,
+                                      name='attribute')
+        zope.component.provideAdapter(attr, (None, None), ITraversable,
+                                      name='attribute')
+
+        self.root = root = C('root')
+        directlyProvides(root, IRoot)
+        root.folder = contained(C('folder'), root, 'folder')
+        root.folder.item = contained(C('item'), root.folder, 'item')
+
+        self.collector = TraceCollector()
+        setTracer(self.collector)
+
+    def tearDown(self):
+        setTracer(None)
+        PlacelessSetup.tearDown(self)
+
+    def testTraverser(self):
+        request = TestRequest()
+        ob = Traverser(self.root).traverse(
+            'folder/++attribute++item/name', request=request)
+        self.assertEqual(ob, 'item')
+
+        steps = getTrace(request)
+        self.assertEqual([(s.segment, s.namespace, s.adapter) for s in steps],
+                         [('folder', '', DefaultTraversable),
+                          ('item', 'attribute', attr),
+                          ('name', '', DefaultTraversable)])
+        for step in steps:
+            self.assertTrue(step.wall >= 0)
+
+        totals = self.collector.totals
+        self.assertEqual(sorted((k, v[0]) for k, v in totals.items()),
+                         [(('', DefaultTraversable), 2),
+                          (('attribute', attr), 1)])
+
+    def testFailedStepsAreTraced(self):
+        self.assertRaises(LocationError, Traverser(self.root).traverse,
+                          'folder/missing')
+        self.assertEqual(Traverser(self.root).traverse('missing', 42), 42)
+        self.assertEqual(self.collector.totals[('', DefaultTraversable)][0],
+                         3)
+
+    def testNoRequest(self):
+        self.assertEqual(getTrace(None), [])
+        self.assertEqual(getTrace(TestRequest()), [])
+
+    def testPublicationTraverser(self):
+        from zope.traversing.publicationtraverse import PublicationTraverser
+        zope.component.provideAdapter(PublishTraverse, (Interface, Interface),
+                                      IPublishTraverse)
+        request = TestRequest()
+        t = PublicationTraverser()
+        t.traverseName(request, self.root, 'folder')
+        t.traverseName(request, self.root, '++attribute++folder')
+        self.assertEqual([(s.segment, s.namespace, s.adapter)
+                          for s in getTrace(request)],
+                         [('folder', '', PublishTraverse),
+                          ('folder', 'attribute', attr)])
+
+    def testDisabled(self):
+        setTracer(None)
+        request = TestRequest()
+        Traverser(self.root).traverse('folder/item', request=request)
+        self.assertEqual(getTrace(request), [])
+        self.assertEqual(self.collector.totals, {})
+
+
+def test_suite():
+    return unittest.TestSuite((
+        unittest.makeSuite(TracingTests),
+        doctest.DocTestSuite('zope.traversing.tracing'),
+        ))
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
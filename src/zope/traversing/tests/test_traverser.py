@@ -13,11 +13,13 @@
 ##############################################################################
 """Traverser Adapter tests.
 """
+import sys
 import unittest
 
 import zope.component
+import zope.interface
 from zope.component.testing import PlacelessSetup
-from zope.interface import directlyProvides, implementedBy
+from zope.interface import directlyProvides, implementedBy, implementer
 from zope.interface.verify import verifyClass
 from zope.location.traversing \
     import LocationPhysicallyLocatable, RootPhysicallyLocatable
@@ -29,6 +31,8 @@ from zope.security.checker \
 from zope.security.management import newInteraction, endInteraction
 
 from zope.traversing.adapters import Traverser, DefaultTraversable
+from zope.traversing.interfaces import IQueryTraversable
+from zope.traversing.interfaces import ISideEffectFreeTraversable
 from zope.traversing.interfaces import ITraversable, ITraverser
 from zope.traversing.testing import contained, Contained
 
@@ -162,6 +166,11 @@ class UnrestrictedTraverseTests(PlacelessSetup, unittest.TestCase):
         self.assertRaises(LocationError, tr.traverse, 'foo/baz')
 
 
+class Folder(dict):
+    def __init__(self, name):
+        self.name = name
+
+
 class ExceptionRaiser(C):
     @property
     def valueerror(self):
@@ -274,6 +283,788 @@ class DefaultTraversableTests(unittest.TestCase):
 
         self.assertRaises(LocationError, df.traverse, 'bar', [])
 
+    def testItemsFirst(self):
+        from zope.traversing.interfaces import ITraverseItemsFirst
+        folder = Folder('folder')
+        folder['name'] = item = C('item')
+        folder['child'] = child = C('child')
+        df = DefaultTraversable(folder)
+        self.assertEqual(df.traverse('name', []), 'folder')
+        self.assertTrue(df.traverse('child', []) is child)
+        directlyProvides(folder, ITraverseItemsFirst)
+        self.assertTrue(df.traverse('name', []) is item)
+        self.assertTrue(df.traverse('child', []) is child)
+        self.assertEqual(df.traverse('keys', []), folder.keys)
+        self.assertRaises(LocationError, df.traverse, 'missing', [])
+
+    def testItemsFirstErrorsInGetitemPropagate(self):
+        from zope.traversing.interfaces import ITraverseItemsFirst
+
+        class Broken(C):
+            def __getitem__(self, name):
+                raise TypeError('broken')
+
+        ob = Broken('broken')
+        directlyProvides(ob, ITraverseItemsFirst)
+        self.assertRaises(TypeError, DefaultTraversable(ob).traverse,
+                          'name', [])
+        # Objects without items are searched for attributes
+        plain = C('plain')
+        directlyProvides(plain, ITraverseItemsFirst)
+        self.assertEqual(DefaultTraversable(plain).traverse('name', []),
+                         'plain')
+
+    def testModeFromFactoryCache(self):
+        from zope.traversing.adapters import _queryTraversable
+        from zope.traversing.interfaces import ITraverseItemsOnly
+        from zope.component.testing import setUp, tearDown
+        setUp()
+        try:
+            zope.component.provideAdapter(DefaultTraversable, (None,),
+                                          ITraversable)
+            folder = Folder('folder')
+            folder['child'] = child = C('child')
+            directlyProvides(folder, ITraverseItemsOnly)
+            traversable = _queryTraversable(folder)
+            self.assertEqual(traversable._mode, 'items only')
+            self.assertTrue(traversable.traverse('child', []) is child)
+            self.assertRaises(LocationError, traversable.traverse,
+                              'keys', [])
+            self.assertEqual(_queryTraversable(C('c'))._mode,
+                             'attributes first')
+        finally:
+            tearDown()
+
+    def testModeFollowsClassDeclarations(self):
+        from zope.traversing.api import traverseName
+        from zope.traversing.interfaces import ITraverseItemsFirst
+        from zope.component.testing import setUp, tearDown
+
+        class Mixed(Folder):
+            pass
+
+        setUp()
+        try:
+            zope.component.provideAdapter(DefaultTraversable, (None,),
+                                          ITraversable)
+            ob = Mixed('ob')
+            ob.x = 'attribute'
+            ob['x'] = 'item'
+            self.assertEqual(traverseName(ob, 'x'), 'attribute')
+            zope.interface.classImplements(Mixed, ITraverseItemsFirst)
+            self.assertEqual(traverseName(ob, 'x'), 'item')
+        finally:
+            tearDown()
+
+    def testItemsOnly(self):
+        from zope.traversing.interfaces import ITraverseItemsOnly
+        folder = Folder('folder')
+        folder['child'] = child = C('child')
+        directlyProvides(folder, ITraverseItemsOnly)
+        df = DefaultTraversable(folder)
+        self.assertTrue(df.traverse('child', []) is child)
+        self.assertRaises(LocationError, df.traverse, 'name', [])
+        self.assertRaises(LocationError, df.traverse, 'keys', [])
+        self.assertEqual(df.queryTraverse('keys', [], 42), 42)
+
+class CountingTraversable(DefaultTraversable):
+
+    traversed = []
+
+    def traverse(self, name, furtherPath):
+        self.traversed.append(name)
+        return DefaultTraversable.traverse(self, name, furtherPath)
+
+# Counting does not matter to traversal, so lookups may still be shared
+zope.interface.classImplementsOnly(CountingTraversable, IQueryTraversable,
+                                   ISideEffectFreeTraversable)
+
+
+class CountingSetup(PlacelessSetup):
+
+    def setUp(self):
+        PlacelessSetup.setUp(self)
+        CountingTraversable.traversed = traversed = []
+        self.traversed = traversed
+        zope.component.provideAdapter(CountingTraversable, (None,),
+                                      ITraversable)
+        zope.component.provideAdapter(LocationPhysicallyLocatable, (None,),
+                                      ILocationInfo)
+        zope.component.provideAdapter(RootPhysicallyLocatable,
+                                      (IRoot,), ILocationInfo)
+
+        self.root = root = C('root')
+        directlyProvides(root, IRoot)
+        self.folder = folder = contained(C('folder'), root, 'folder')
+        self.item = item = contained(C('item'), folder, 'item')
+        self.other = other = contained(C('other'), folder, 'other')
+        root.folder = folder
+        folder.item = item
+        folder.other = other
+
+
+class TraverseManyTests(CountingSetup, unittest.TestCase):
+
+    def testSharedPrefixTraversedOnce(self):
+        tr = Traverser(self.item)
+        result = tr.traverseMany(['/folder/item', '/folder/other',
+                                  '/folder', 'name', '/', '',
+                                  '/folder/./item/'])
+        self.assertEqual(result, [self.item, self.other, self.folder,
+                                  'item', self.root, self.item, self.item])
+        self.assertEqual(sorted(self.traversed),
+                         ['folder', 'item', 'name', 'other'])
+
+    def testMatchesTraverse(self):
+        tr = Traverser(self.folder)
+        paths = ['item/../other', ('', 'folder', 'item'), '../folder/item']
+        self.assertEqual(tr.traverseMany(paths),
+                         [tr.traverse(path) for path in paths])
+
+    def testMissing(self):
+        tr = Traverser(self.root)
+        paths = ['folder/item', 'folder/missing/deeper', 'missing']
+        self.assertRaises(LocationError, tr.traverseMany, paths)
+        self.assertEqual(tr.traverseMany(paths, default=None),
+                         [self.item, None, None])
+        self.assertEqual(tr.traverseMany(paths, defaults=[1, 2, 3]),
+                         [self.item, 2, 3])
+        result = tr.traverseMany(paths, captureErrors=True)
+        self.assertTrue(result[0] is self.item)
+        self.assertTrue(isinstance(result[1], LocationError))
+        self.assertTrue(isinstance(result[2], LocationError))
+
+    def testFirstErrorRaised(self):
+        tr = Traverser(self.root)
+        try:
+            tr.traverseMany(['folder/item', 'nope', 'folder/missing'])
+        except LocationError as error:
+            self.assertEqual(error.args, (self.root, 'nope'))
+        else:
+            self.fail('LocationError not raised')
+
+    def testNamespaces(self):
+        from zope.traversing.namespace import attr
+        zope.component.provideAdapter(attr, (None,), ITraversable,
+                                      name='attribute')
+        tr = Traverser(self.root)
+        self.assertEqual(
+            tr.traverseMany(['folder/++attribute++item', 'folder/other']),
+            [self.item, self.other])
+
+    def testTraversableChangingFurtherPath(self):
+        class Consuming(object):
+            def __init__(self, context):
+                self.context = context
+
+            def traverse(self, name, furtherPath):
+                del furtherPath[:]
+                return name
+
+        zope.component.provideAdapter(Consuming, (IRoot,), ITraversable)
+        tr = Traverser(self.root)
+        self.assertEqual(tr.traverseMany(['eat/a/b', 'eat/c', 'eat']),
+                         ['eat', 'eat', 'eat'])
+
+    def testFurtherPathOfEachPath(self):
+        seen = []
+
+        class Peeking(DefaultTraversable):
+            def traverse(self, name, furtherPath):
+                seen.append((name, list(furtherPath)))
+                return DefaultTraversable.traverse(self, name, furtherPath)
+
+        zope.component.provideAdapter(Peeking, (C,), ITraversable)
+        tr = Traverser(self.root)
+        paths = ['folder/item/name', 'folder/other/name', 'folder/./item']
+        self.assertEqual(tr.traverseMany(paths),
+                         ['item', 'other', self.item])
+        expected = []
+        for path in paths:
+            del seen[:]
+            tr.traverse(path)
+            expected.extend(seen)
+        del seen[:]
+        tr.traverseMany(paths)
+        self.assertEqual(sorted(seen), sorted(expected))
+        self.assertTrue(('folder', ['item', '.']) in seen)
+        self.assertTrue(('folder', ['name', 'other']) in seen)
+
+    def testSharedWithSideEffectFreeTraversable(self):
+        tr = Traverser(self.root)
+        self.assertEqual(tr.traverseMany(['folder/item', 'folder/other']),
+                         [self.item, self.other])
+        self.assertEqual(sorted(self.traversed), ['folder', 'item', 'other'])
+
+    def testBatchTraversable(self):
+        from zope.traversing.interfaces import IBatchTraversable
+        batches = []
+
+        @implementer(IBatchTraversable)
+        class Batching(CountingTraversable):
+            def traverseBatch(self, names):
+                batches.append(sorted(names))
+                return dict((name, getattr(self._subject, name))
+                            for name in names
+                            if hasattr(self._subject, name))
+
+        zope.component.provideAdapter(Batching, (C,), ITraversable)
+        tr = Traverser(self.folder)
+        result = tr.traverseMany(['item', 'other', 'missing', '../folder'],
+                                 captureErrors=True)
+        self.assertEqual(result[:2], [self.item, self.other])
+        self.assertTrue(isinstance(result[2], LocationError))
+        self.assertTrue(result[3] is self.folder)
+        self.assertEqual(batches, [['item', 'missing', 'other']])
+        self.assertEqual(self.traversed, ['folder'])
+
+    def testFailingBatch(self):
+        from zope.traversing.interfaces import IBatchTraversable
+
+        @implementer(IBatchTraversable)
+        class Failing(CountingTraversable):
+            def traverseBatch(self, names):
+                raise LocationError(self._subject, names)
+
+        zope.component.provideAdapter(Failing, (C,), ITraversable)
+        tr = Traverser(self.folder)
+        paths = ['..', 'item', 'other/name', 'missing']
+        self.assertRaises(LocationError, tr.traverseMany, paths)
+        self.assertEqual(tr.traverseMany(paths, default=None),
+                         [self.root, None, None, None])
+        self.assertEqual(tr.traverseMany(paths, defaults=[1, 2, 3, 4]),
+                         [self.root, 2, 3, 4])
+        result = tr.traverseMany(paths, captureErrors=True)
+        self.assertTrue(result[0] is self.root)
+        for error in result[1:]:
+            self.assertTrue(isinstance(error, LocationError))
+        self.assertTrue(result[1] is result[2])
+
+    def testAPI(self):
+        from zope.traversing.api import traverseMany
+        zope.component.provideAdapter(Traverser, (None,), ITraverser)
+        self.assertEqual(traverseMany(self.item, ['..', '../other']),
+                         [self.folder, self.other])
+
+
+class ParallelTraverseManyTests(CountingSetup, unittest.TestCase):
+
+    def setUp(self):
+        from concurrent.futures import ThreadPoolExecutor
+        CountingSetup.setUp(self)
+        self.executor = ThreadPoolExecutor(3)
+
+    def tearDown(self):
+        self.executor.shutdown()
+        CountingSetup.tearDown(self)
+
+    def traverseMany(self, *args, **kw):
+        from zope.traversing.api import traverseMany
+        zope.component.provideAdapter(Traverser, (None,), ITraverser)
+        return traverseMany(*args, executor=self.executor, **kw)
+
+    def testConcurrent(self):
+        import threading
+        barrier = threading.Barrier(3, timeout=10)
+
+        class Waiting(DefaultTraversable):
+            def traverse(self, name, furtherPath):
+                barrier.wait()
+                return DefaultTraversable.traverse(self, name, furtherPath)
+
+        zope.component.provideAdapter(Waiting, (IRoot,), ITraversable)
+        self.root.other = self.other
+        self.assertEqual(
+            self.traverseMany(self.root, ['folder/item', 'folder', 'other']),
+            [self.item, self.folder, self.other])
+
+    def testOrderAndErrors(self):
+        paths = ['folder/item', 'nope', 'folder/missing', '/folder/other']
+        try:
+            self.traverseMany(self.root, paths)
+        except LocationError as error:
+            self.assertEqual(error.args, (self.root, 'nope'))
+        else:
+            self.fail('LocationError not raised')
+        self.assertEqual(self.traverseMany(self.root, paths, default=None),
+                         [self.item, None, None, self.other])
+        self.assertEqual(
+            self.traverseMany(self.root, paths, defaults=[1, 2, 3, 4]),
+            [self.item, 2, 3, self.other])
+        result = self.traverseMany(self.root, paths, captureErrors=True)
+        self.assertEqual(result[0], self.item)
+        self.assertEqual(result[1].args, (self.root, 'nope'))
+        self.assertEqual(result[2].args, (self.folder, 'missing'))
+
+    def testCallersContext(self):
+        from zope.component.hooks import getSite, setSite
+        from zope.security.management import queryInteraction
+        seen = []
+
+        from zope.traversing.scope import current, LocationScope
+
+        class Recording(DefaultTraversable):
+            def traverse(self, name, furtherPath):
+                seen.append((getSite(), queryInteraction(), current()))
+                return DefaultTraversable.traverse(self, name, furtherPath)
+
+        class Site(object):
+            def getSiteManager(self):
+                return zope.component.getGlobalSiteManager()
+
+        zope.component.provideAdapter(Recording, (C,), ITraversable)
+        site = Site()
+        setSite(site)
+        participation = ParticipationStub('bob')
+        newInteraction(participation)
+        interaction = queryInteraction()
+        try:
+            with LocationScope() as scope:
+                self.traverseMany(self.root, ['folder', 'folder/item'])
+                self.assertTrue(current() is scope)
+            self.assertEqual(scope._entries, {})
+        finally:
+            endInteraction()
+            setSite()
+        self.assertEqual([(entry[0], entry[2]) for entry in seen],
+                         [(site, scope)] * 3)
+        # Each task has an interaction of its own, for the same principal
+        interactions = [entry[1] for entry in seen]
+        self.assertTrue(interaction not in interactions)
+        self.assertEqual(len(set(map(id, interactions))), 2)
+        for other in interactions:
+            self.assertEqual([p.principal for p in other.participations],
+                             ['bob'])
+        self.assertEqual(interaction.participations, [participation])
+        self.assertTrue(participation.interaction is interaction)
+
+        # The workers are left as they were
+        seen = []
+        self.traverseMany(self.root, ['folder'])
+        self.assertEqual(seen, [(None, None, None)])
+
+    def testDatabaseConnections(self):
+        from zope.security.proxy import removeSecurityProxy
+        db = Database()
+        connection = db.open()
+        root = connection.get(0)
+        paths = ['folder/item', 'folder', 'folder/other', 'nope']
+        result = self.traverseMany(root, paths, captureErrors=True)
+        self.assertTrue(result[0] is root.folder.item)
+        self.assertTrue(result[1] is root.folder)
+        self.assertTrue(result[2] is root.folder.other)
+        self.assertEqual(result[3].args, (root, 'nope'))
+        self.assertEqual(len(db.opened), 5)
+        self.assertEqual([c.closed for c in db.opened], [False] + [True] * 4)
+        # Only the paths without a persistent object were traversed again
+        self.assertEqual(sorted(self.traversed),
+                         ['folder'] * 4 + ['item'] + ['nope'] * 2
+                         + ['other'] * 2)
+
+        defineChecker(Persistent, Checker({'folder': CheckerPublic,
+                                           'item': CheckerPublic}))
+        result = self.traverseMany(ProxyFactory(root), ['folder/item'])
+        self.assertTrue(removeSecurityProxy(result[0]) is root.folder.item)
+        self.assertTrue(result[0] is not root.folder.item)
+
+
+class Persistent(C):
+
+    def __init__(self, name, jar, oid):
+        C.__init__(self, name)
+        self._p_jar = jar
+        self._p_oid = oid
+
+
+class Connection(object):
+    """Connection to a Database, with a tree of objects of its own"""
+
+    def __init__(self, db):
+        self._db = db
+        self.closed = False
+        root = Persistent('root', self, 0)
+        directlyProvides(root, IRoot)
+        root.folder = contained(Persistent('folder', self, 1), root,
+                                'folder')
+        root.folder.item = contained(Persistent('item', self, 2),
+                                     root.folder, 'item')
+        root.folder.other = contained(C('other'), root.folder, 'other')
+        self.objects = [root, root.folder, root.folder.item]
+
+    def db(self):
+        return self._db
+
+    def get(self, oid):
+        return self.objects[oid]
+
+    def close(self):
+        self.closed = True
+
+
+class Database(object):
+
+    def __init__(self):
+        self.opened = []
+
+    def open(self, transaction_manager=None):
+        connection = Connection(self)
+        self.opened.append(connection)
+        return connection
+
+
+class IterTraverseTests(CountingSetup, unittest.TestCase):
+
+    def testYieldsEachStep(self):
+        tr = Traverser(self.item)
+        self.assertEqual(list(tr.iterTraverse('/folder/./item/../other')),
+                         [('', self.root),
+                          ('folder', self.folder),
+                          ('.', self.folder),
+                          ('item', self.item),
+                          ('..', self.folder),
+                          ('other', self.other)])
+        self.assertEqual(list(tr.iterTraverse('')), [])
+
+    def testLazy(self):
+        steps = Traverser(self.root).iterTraverse('folder/item/missing')
+        self.assertEqual(next(steps), ('folder', self.folder))
+        self.assertEqual(self.traversed, ['folder'])
+        self.assertEqual(next(steps), ('item', self.item))
+        self.assertRaises(LocationError, next, steps)
+
+    def testAPI(self):
+        from zope.traversing.api import iterTraverse
+        zope.component.provideAdapter(Traverser, (None,), ITraverser)
+        self.assertEqual(list(iterTraverse(self.folder, 'other')),
+                         [('other', self.other)])
+
+    def testAPICustomTraverser(self):
+        from zope.traversing.api import iterTraverse
+        seen = []
+
+        @implementer(ITraverser)
+        class Custom(object):
+            def __init__(self, context):
+                pass
+
+            def traverse(self, path, default=None, request=None):
+                seen.append(path)
+                return len(path)
+
+        zope.component.provideAdapter(Custom, (None,), ITraverser)
+        self.assertEqual(list(iterTraverse(self.folder, '/a/./b')),
+                         [('', 1), ('a', 2), ('.', 3), ('b', 4)])
+        self.assertEqual(seen, [('',), ('', 'a'), ('', 'a', '.'),
+                                ('', 'a', '.', 'b')])
+        self.assertEqual(list(iterTraverse(self.folder, '')), [])
+
+
+@implementer(IQueryTraversable)
+class QueryOnly(object):
+    """Traversable that must only be queried"""
+
+    def __init__(self, context):
+        self.context = context
+
+    def traverse(self, name, furtherPath):
+        raise AssertionError('traverse() called')
+
+    def queryTraverse(self, name, furtherPath, default=None):
+        return getattr(self.context, name, default)
+
+
+class QueryTraversableTests(CountingSetup, unittest.TestCase):
+
+    def testDefaultTraversable(self):
+        df = DefaultTraversable(self.folder)
+        self.assertTrue(df.queryTraverse('item', []) is self.item)
+        self.assertEqual(df.queryTraverse('missing', []), None)
+        self.assertEqual(df.queryTraverse('missing', [], 42), 42)
+        self.assertEqual(DefaultTraversable({'a': 1}).queryTraverse('a', []),
+                         1)
+
+    def testOverriddenTraverseIsHonoured(self):
+        df = CountingTraversable(self.folder)
+        self.assertTrue(df.queryTraverse('item', []) is self.item)
+        self.assertEqual(df.queryTraverse('missing', [], 42), 42)
+        self.assertEqual(self.traversed, ['item', 'missing'])
+
+    def testTraverseWithDefaultQueries(self):
+        zope.component.provideAdapter(QueryOnly, (C,), ITraversable)
+        tr = Traverser(self.root)
+        self.assertTrue(tr.traverse('folder/item', None) is self.item)
+        self.assertEqual(tr.traverse('folder/missing/item', 42), 42)
+        self.assertEqual(tr.traverseMany(['folder/x', 'folder'], None),
+                         [None, self.folder])
+        self.assertRaises(AssertionError, tr.traverse, 'folder')
+
+    def testTraversePathElementWithDefault(self):
+        from zope.traversing.adapters import traversePathElement
+        zope.component.provideAdapter(QueryOnly, (C,), ITraversable)
+        self.assertEqual(traversePathElement(self.root, 'missing', [], 42),
+                         42)
+
+    def testNamespaceHandlers(self):
+        from zope.publisher.browser import TestRequest
+        from zope.traversing.namespace import adapter, etc, view, resource
+        request = TestRequest()
+        self.assertEqual(adapter(self.root).queryTraverse('x', ()), None)
+        self.assertEqual(etc(self.root).queryTraverse('site', (), 1), 1)
+        self.assertEqual(etc(self.root).queryTraverse('x', (), 1), 1)
+        self.assertEqual(view(self.root, request).queryTraverse('x', ()),
+                         None)
+        self.assertEqual(resource(self.root, request).queryTraverse('x', ()),
+                         None)
+
+    def testNamespaceLookupWithDefault(self):
+        from zope.traversing.namespace import adapter
+        zope.component.provideAdapter(adapter, (None,), ITraversable,
+                                      name='adapter')
+        tr = Traverser(self.root)
+        self.assertEqual(tr.traverse('++adapter++x', 42), 42)
+        self.assertEqual(tr.traverse('++nonesuch++x', 42), 42)
+        self.assertRaises(LocationError, tr.traverse, '++adapter++x')
+
+
+class TraversableCacheTests(PlacelessSetup, unittest.TestCase):
+
+    def setUp(self):
+        PlacelessSetup.setUp(self)
+        zope.component.provideAdapter(DefaultTraversable, (None,), ITraversable)
+        self.root = root = C('root')
+        root.folder = C('folder')
+
+    def testRegistrationInvalidatesCache(self):
+        from zope.traversing.adapters import _queryTraversable
+        self.assertTrue(isinstance(_queryTraversable(self.root),
+                                   DefaultTraversable))
+
+        class Special(DefaultTraversable):
+            pass
+
+        zope.component.provideAdapter(Special, (C,), ITraversable)
+        self.assertTrue(isinstance(_queryTraversable(self.root), Special))
+
+        gsm = zope.component.getGlobalSiteManager()
+        gsm.unregisterAdapter(Special, (C,), ITraversable)
+        self.assertEqual(_queryTraversable(self.root).__class__,
+                         DefaultTraversable)
+
+    def testLocalSiteManager(self):
+        from zope.component.globalregistry import base
+        from zope.interface.registry import Components
+        from zope.component.hooks import setSite, setHooks, resetHooks
+        from zope.traversing.adapters import _queryTraversable
+
+        class Special(DefaultTraversable):
+            pass
+
+        local = Components('local', bases=(base,))
+
+        class Site(object):
+            def getSiteManager(self):
+                return local
+
+        setHooks()
+        try:
+            setSite(Site())
+            self.assertEqual(_queryTraversable(self.root).__class__,
+                             DefaultTraversable)
+            local.registerAdapter(Special, (C,), ITraversable)
+            self.assertEqual(_queryTraversable(self.root).__class__, Special)
+            self.assertTrue(Traverser(self.root).traverse('folder')
+                            is self.root.folder)
+            setSite(None)
+            self.assertEqual(_queryTraversable(self.root).__class__,
+                             DefaultTraversable)
+        finally:
+            setSite(None)
+            resetHooks()
+
+    def testSpecChangeInvalidatesCache(self):
+        from zope.traversing.api import traverseName
+
+        class IMarked(zope.interface.Interface):
+            pass
+
+        class Marked(DefaultTraversable):
+            def traverse(self, name, furtherPath):
+                return 'marked'
+
+        class D(C):
+            pass
+
+        zope.component.provideAdapter(Marked, (IMarked,), ITraversable)
+        ob = D('ob')
+        ob.x = 'x'
+        self.assertEqual(traverseName(ob, 'x'), 'x')
+        zope.interface.classImplements(D, IMarked)
+        self.assertEqual(traverseName(ob, 'x'), 'marked')
+
+    def testTraversableProvidedDirectly(self):
+        from zope.traversing.adapters import _queryTraversable
+        traversable = DefaultTraversable(self.root)
+        self.assertTrue(_queryTraversable(traversable) is traversable)
+
+
+class SimplifyTests(CountingSetup, unittest.TestCase):
+
+    def testNameParentPairsSkipped(self):
+        tr = Traverser(self.folder)
+        self.assertTrue(tr.traverse('item/../other', simplify=True)
+                        is self.other)
+        self.assertTrue(tr.traverse('./item/./../other/.', simplify=True)
+                        is self.other)
+        self.assertEqual(self.traversed, ['other', 'other'])
+        self.assertTrue(tr.traverse('item/../other') is self.other)
+        self.assertEqual(self.traversed, ['other', 'other', 'item', 'other'])
+
+    def testSkippedNameIsNotLookedUp(self):
+        tr = Traverser(self.folder)
+        self.assertTrue(tr.traverse('missing/../item', simplify=True)
+                        is self.item)
+        self.assertRaises(LocationError, tr.traverse, 'missing/../item')
+
+    def testNestedPairs(self):
+        tr = Traverser(self.root)
+        self.assertTrue(tr.traverse('/folder/item/../../folder/other',
+                                    simplify=True) is self.other)
+        self.assertEqual(self.traversed, ['folder', 'folder', 'other'])
+
+    def testNamespaces(self):
+        from zope.traversing.namespace import attr, view
+        zope.component.provideAdapter(attr, (None,), ITraversable,
+                                      name='attribute')
+        tr = Traverser(self.folder)
+        self.assertTrue(tr.traverse('++attribute++missing/../item',
+                                    simplify=True) is self.item)
+
+        # Views are not side-effect-free
+        zope.component.provideAdapter(view, (None, None), ITraversable,
+                                      name='view')
+        from zope.publisher.browser import TestRequest
+        self.assertRaises(LocationError, tr.traverse, '@@missing/../item',
+                          request=TestRequest(), simplify=True)
+
+    def testWithSideEffects(self):
+
+        class Loading(DefaultTraversable):
+            def traverse(self, name, furtherPath):
+                CountingTraversable.traversed.append(name)
+                return DefaultTraversable.traverse(self, name, furtherPath)
+        zope.interface.classImplementsOnly(Loading, ITraversable)
+
+        zope.component.provideAdapter(Loading, (C,), ITraversable)
+        tr = Traverser(self.folder)
+        self.assertTrue(tr.traverse('item/../other', simplify=True)
+                        is self.other)
+        self.assertEqual(self.traversed, ['item', 'other'])
+
+    def testInheritedMarker(self):
+        # Overriding traverse() drops the marker of the base class
+
+        class Loading(DefaultTraversable):
+            def traverse(self, name, furtherPath):
+                CountingTraversable.traversed.append(name)
+                return DefaultTraversable.traverse(self, name, furtherPath)
+
+        class Subclass(Loading):
+            pass
+
+        zope.component.provideAdapter(Subclass, (C,), ITraversable)
+        tr = Traverser(self.folder)
+        self.assertTrue(tr.traverse('item/../other', simplify=True)
+                        is self.other)
+        self.assertEqual(self.traversed, ['item', 'other'])
+
+    def testApi(self):
+        from zope.traversing.api import traverse
+        zope.component.provideAdapter(Traverser, (None,), ITraverser)
+        self.assertTrue(traverse(self.folder, 'missing/../item', None,
+                                 simplify=True) is self.item)
+        self.assertEqual(traverse(self.folder, 'missing/../item', None),
+                         None)
+
+
+class TraverseSingleNameTests(CountingSetup, unittest.TestCase):
+
+    def testPlainName(self):
+        from zope.traversing.adapters import traverseSingleName
+        self.assertTrue(traverseSingleName(self.folder, 'item') is self.item)
+        self.assertEqual(self.traversed, ['item'])
+        self.assertEqual(traverseSingleName(self.folder, 'missing', 42), 42)
+        self.assertRaises(LocationError, traverseSingleName, self.folder,
+                          'missing')
+
+    def testSpecialNames(self):
+        from zope.traversing.adapters import traverseSingleName
+        from zope.traversing.namespace import attr
+        zope.component.provideAdapter(attr, (None,), ITraversable,
+                                      name='attribute')
+        self.assertTrue(traverseSingleName(self.item, '.') is self.item)
+        self.assertTrue(traverseSingleName(self.item, '..') is self.folder)
+        self.assertTrue(traverseSingleName(self.folder, '++attribute++item')
+                        is self.item)
+        self.folder.__dict__['.hidden'] = self.other
+        self.assertTrue(traverseSingleName(self.folder, '.hidden')
+                        is self.other)
+        self.assertEqual(self.traversed, ['.hidden'])
+
+    def testFurtherPathCannotBeChanged(self):
+        from zope.traversing.adapters import traverseSingleName
+        from zope.traversing.api import traverseName
+
+        class Extending(object):
+            def __init__(self, context):
+                self.context = context
+
+            def traverse(self, name, furtherPath):
+                furtherPath.append('more')
+                return self.context
+
+        zope.component.provideAdapter(Extending, (C,), ITraversable)
+        self.assertRaises(NotImplementedError, traverseSingleName,
+                          self.folder, 'item')
+        self.assertRaises(NotImplementedError, traverseName,
+                          self.folder, 'item')
+
+        # The shared further path is still empty
+        from zope.traversing.adapters import _noFurtherPath
+        self.assertEqual(_noFurtherPath, [])
+        self.assertRaises(NotImplementedError, _noFurtherPath.insert, 0, 'x')
+        for method in ('extend', '__iadd__'):
+            self.assertRaises(NotImplementedError,
+                              getattr(_noFurtherPath, method), ['x'])
+        self.assertRaises(NotImplementedError, _noFurtherPath.__setitem__,
+                          slice(0, 0), ['x'])
+        self.assertRaises(IndexError, _noFurtherPath.__setitem__, 0, 'x')
+        self.assertEqual(_noFurtherPath, [])
+
+    def testFurtherPathCanBeEmptied(self):
+        from zope.traversing.adapters import _noFurtherPath
+        from zope.traversing.api import traverseName
+
+        class Consuming(object):
+            def __init__(self, context):
+                self.context = context
+
+            def traverse(self, name, furtherPath):
+                del furtherPath[:]
+                furtherPath.extend([])
+                furtherPath[:] = []
+                furtherPath.reverse()
+                return name
+
+        zope.component.provideAdapter(Consuming, (C,), ITraversable)
+        self.assertEqual(traverseName(self.folder, 'item'), 'item')
+        path = _noFurtherPath
+        path += []
+        path *= 2
+        self.assertTrue(path is _noFurtherPath)
+        self.assertRaises(IndexError, _noFurtherPath.pop)
+        self.assertEqual(_noFurtherPath, [])
+
+
 def test_suite():
     loader = unittest.TestLoader()
     suite = loader.loadTestsFromTestCase(TraverserTests)
@@ -281,6 +1072,14 @@ def test_suite():
     suite.addTest(loader.loadTestsFromTestCase(UnrestrictedNoTraverseTests))
     suite.addTest(loader.loadTestsFromTestCase(UnrestrictedTraverseTests))
     suite.addTest(loader.loadTestsFromTestCase(RestrictedTraverseTests))
+    suite.addTest(loader.loadTestsFromTestCase(TraversableCacheTests))
+    suite.addTest(loader.loadTestsFromTestCase(TraverseManyTests))
+    if sys.version_info >= (3, 2):
+        suite.addTest(loader.loadTestsFromTestCase(ParallelTraverseManyTests))
+    suite.addTest(loader.loadTestsFromTestCase(IterTraverseTests))
+    suite.addTest(loader.loadTestsFromTestCase(QueryTraversableTests))
+    suite.addTest(loader.loadTestsFromTestCase(SimplifyTests))
+    suite.addTest(loader.loadTestsFromTestCase(TraverseSingleNameTests))
     return suite
 
 if __name__=='__main__':
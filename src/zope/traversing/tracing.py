@@ -0,0 +1,119 @@
+##############################################################################
+#
+# Copyright (c) 2014 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Traversal tracing
+
+An ITraversalTracer installed with setTracer() is told about every
+traversal step taken by traversePathElement(), namespaceLookup() and
+PublicationTraverser.traverseName(), together with the time it took.
+Without a tracer, the only cost is a check of the module global 'tracer'.
+
+The TraceCollector tracer keeps the steps of each request and sums up the
+time spent per namespace and adapter:
+
+  >>> collector = TraceCollector()
+  >>> old = setTracer(collector)
+  >>> old is None
+  True
+  >>> getTracer() is collector
+  True
+  >>> _ = setTracer(old)
+"""
+from collections import namedtuple
+import threading
+import time
+
+import zope.interface
+from zope.traversing.interfaces import ITraversalTracer
+
+# The installed ITraversalTracer, or None
+tracer = None
+
+_wall = getattr(time, 'perf_counter', time.time)
+_cpu = (getattr(time, 'thread_time', None)
+        or getattr(time, 'process_time', None)
+        or time.clock)
+
+_key = 'zope.traversing.tracing.steps'
+
+
+def setTracer(new):
+    """Install the ITraversalTracer 'new', or None to stop tracing
+
+    Returns the previously installed tracer.
+    """
+    global tracer
+    old, tracer = tracer, new
+    return old
+
+
+def getTracer():
+    """Return the installed tracer, or None"""
+    return tracer
+
+
+def clocks():
+    """Return the current wall clock and CPU times"""
+    return _wall(), _cpu()
+
+
+def elapsed(started):
+    """Return the wall clock and CPU time elapsed since clocks() was called
+    """
+    return _wall() - started[0], _cpu() - started[1]
+
+
+Step = namedtuple('Step', 'segment namespace adapter wall cpu')
+
+
+@zope.interface.implementer(ITraversalTracer)
+class TraceCollector(object):
+    """Tracer collecting the steps taken per request
+
+    The steps of each request are kept in the request's annotations (see
+    getTrace()).  Additionally, 'totals' maps (namespace, adapter) pairs
+    to a [count, wall, cpu] list summing up all steps traced.
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def trace(self, request, context, segment, namespace, adapter, wall, cpu):
+        annotations = getattr(request, 'annotations', None)
+        if annotations is not None:
+            annotations.setdefault(_key, []).append(
+                Step(segment, namespace, adapter, wall, cpu))
+        with self._lock:
+            total = self.totals.get((namespace, adapter))
+            if total is None:
+                total = self.totals[(namespace, adapter)] = [0, 0.0, 0.0]
+            total[0] += 1
+            total[1] += wall
+            total[2] += cpu
+
+
+def getTrace(request):
+    """Return the list of Steps traced for 'request'"""
+    annotations = getattr(request, 'annotations', None)
+    if annotations is None:
+        return []
+    return annotations.get(_key, [])
+
+
+try:
+    from zope.testing.cleanup import addCleanUp
+except ImportError:  # pragma: no cover
+    pass
+else:
+    addCleanUp(setTracer, (None,))